@@ -0,0 +1,175 @@
+"""Deterministic, seekable tar and zip streams for catalogue exports.
+
+An archive is described as a list of segments before any byte is produced:
+either literal header bytes or a byte range of a file on disk. The total
+length is therefore known up front, and an HTTP byte range can be served by
+skipping whole segments without reading them.
+"""
+
+import os
+import struct
+import tarfile
+import time
+import zipfile
+import zlib
+
+READ_CHUNK_SIZE = 64 * 1024
+TAR_BLOCK_SIZE = 512
+
+
+class ArchiveEntry:
+    def __init__(self, name: str, path: str, size: int, mtime: float):
+        self.name = name
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+
+
+def tar_segments(entries: list[ArchiveEntry]) -> list[bytes | tuple[str, int, int]]:
+    segments = []
+    for entry in entries:
+        info = tarfile.TarInfo(entry.name)
+        info.size = entry.size
+        info.mtime = int(entry.mtime)
+        info.mode = 0o644
+        segments.append(info.tobuf(format=tarfile.PAX_FORMAT))
+        segments.append((entry.path, 0, entry.size))
+        padding = -entry.size % TAR_BLOCK_SIZE
+        if padding:
+            segments.append(b"\0" * padding)
+    segments.append(b"\0" * (TAR_BLOCK_SIZE * 2))
+    return segments
+
+
+def file_crc32(path: str) -> int:
+    crc = 0
+    with open(path, "rb") as source:
+        while chunk := source.read(READ_CHUNK_SIZE):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def dos_timestamp(mtime: float) -> tuple[int, int]:
+    year, month, day, hour, minute, second = time.localtime(max(mtime, 315532800))[:6]
+    return (
+        (hour << 11) | (minute << 5) | (second // 2),
+        ((year - 1980) << 9) | (month << 5) | day,
+    )
+
+
+def zip_segments(entries: list[ArchiveEntry]) -> list[bytes | tuple[str, int, int]]:
+    """Describe a stored (uncompressed) zip; sizes beyond zip64 limits are rejected."""
+    segments = []
+    central_directory = []
+    offset = 0
+    for entry in entries:
+        if entry.size >= zipfile.ZIP64_LIMIT:
+            raise ValueError(f"{entry.name} is too large for a zip export")
+        name = entry.name.encode("utf-8")
+        crc = file_crc32(entry.path)
+        dos_time, dos_date = dos_timestamp(entry.mtime)
+        utf8_flag = 0x800
+        local_header = struct.pack(
+            "<4s5H3L2H",
+            b"PK\x03\x04",
+            20,
+            utf8_flag,
+            zipfile.ZIP_STORED,
+            dos_time,
+            dos_date,
+            crc,
+            entry.size,
+            entry.size,
+            len(name),
+            0,
+        ) + name
+        central_directory.append(
+            struct.pack(
+                "<4s6H3L5H2L",
+                b"PK\x01\x02",
+                20,
+                20,
+                utf8_flag,
+                zipfile.ZIP_STORED,
+                dos_time,
+                dos_date,
+                crc,
+                entry.size,
+                entry.size,
+                len(name),
+                0,
+                0,
+                0,
+                0,
+                0o100644 << 16,
+                offset,
+            )
+            + name
+        )
+        segments.append(local_header)
+        segments.append((entry.path, 0, entry.size))
+        offset += len(local_header) + entry.size
+
+    if offset >= zipfile.ZIP64_LIMIT or len(entries) >= 0xFFFF:
+        raise ValueError("Catalogue is too large for a zip export; use tar instead")
+    directory = b"".join(central_directory)
+    segments.append(directory)
+    segments.append(
+        struct.pack(
+            "<4s4H2LH",
+            b"PK\x05\x06",
+            0,
+            0,
+            len(entries),
+            len(entries),
+            len(directory),
+            offset,
+            0,
+        )
+    )
+    return segments
+
+
+def segment_length(segment: bytes | tuple[str, int, int]) -> int:
+    if isinstance(segment, bytes):
+        return len(segment)
+    _path, start, end = segment
+    return end - start
+
+
+def archive_length(segments: list[bytes | tuple[str, int, int]]) -> int:
+    return sum(segment_length(segment) for segment in segments)
+
+
+def iter_archive_bytes(
+    segments: list[bytes | tuple[str, int, int]],
+    start: int = 0,
+    end: int | None = None,
+):
+    """Yield bytes start..end (exclusive) of the described archive in bounded chunks."""
+    end = archive_length(segments) if end is None else end
+    position = 0
+    for segment in segments:
+        length = segment_length(segment)
+        segment_start = position
+        position += length
+        if position <= start:
+            continue
+        if segment_start >= end:
+            return
+
+        skip = max(start - segment_start, 0)
+        take = min(end, position) - segment_start - skip
+        if isinstance(segment, bytes):
+            yield segment[skip:skip + take]
+            continue
+
+        path, file_start, _file_end = segment
+        with open(path, "rb") as source:
+            source.seek(file_start + skip)
+            while take > 0:
+                chunk = source.read(min(READ_CHUNK_SIZE, take))
+                if not chunk:
+                    raise OSError(f"{os.path.basename(path)} changed while it was being exported")
+                take -= len(chunk)
+                yield chunk
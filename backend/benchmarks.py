@@ -0,0 +1,419 @@
+"""Ad-hoc performance checks for catalogue-scale backend paths.
+
+Run from the repository root, for example::
+
+    python3 -m backend.benchmarks import --songs 10000
+    python3 -m backend.benchmarks search --songs 50000
+    python3 -m backend.benchmarks facets --songs 50000
+    python3 -m backend.benchmarks split-index --songs 10000
+    python3 -m backend.benchmarks chords --songs 50000
+    python3 -m backend.benchmarks similar --songs 50000
+    python3 -m backend.benchmarks duplicates --songs 50000
+
+The song builder is replaced by a no-op so the numbers measure the backend
+itself rather than Node start-up and JSON publishing.
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import io
+import json
+import os
+import random
+import statistics
+import tarfile
+import tempfile
+import time
+import tracemalloc
+
+import backend.main as main
+from backend.chord_index import SongChordIndex
+from backend.chordpro import parse_chordpro, song_lyrics
+from backend.duplicates import SongDuplicateIndex
+from backend.facets import SongFacetIndex
+from backend.search import SongSearchIndex
+from backend.similarity import SongSimilarityIndex
+
+
+def synthetic_song(index: int) -> str:
+    return (
+        f"{{title: Benchmark Song {index}}}\n"
+        "{key: G}\n"
+        f"{{category: Set {index % 25}}}\n"
+        "{section: Verse}\n"
+        "[G]Amazing grace how [C]sweet the [G]sound\n"
+        "That [G]saved a wretch like [D]me\n"
+        f"Line number {index} with [Em]more [C]words\n"
+    )
+
+
+def synthetic_tar(path: str, songs: int):
+    with tarfile.open(path, "w:gz") as bundle:
+        for index in range(songs):
+            data = synthetic_song(index).encode("utf-8")
+            info = tarfile.TarInfo(f"library/benchmark-song-{index}.pro")
+            info.size = len(data)
+            bundle.addfile(info, io.BytesIO(data))
+
+
+class FileUpload:
+    def __init__(self, path: str, chunk_size: int = 64 * 1024):
+        self.path = path
+        self.chunk_size = chunk_size
+
+    async def stream(self):
+        with open(self.path, "rb") as upload:
+            while chunk := upload.read(self.chunk_size):
+                yield chunk
+
+
+async def no_op_build() -> dict:
+    return {"ok": True, "message": "benchmark build skipped"}
+
+
+def bench_import(songs: int):
+    with tempfile.TemporaryDirectory(prefix="holy-songs-bench-") as root:
+        songs_dir = os.path.join(root, "songs")
+        os.makedirs(songs_dir)
+        archive_path = os.path.join(root, "library.tar.gz")
+        synthetic_tar(archive_path, songs)
+
+        main.SONGS_DIR = songs_dir
+        main.rebuild_songs_async = no_op_build
+        main.enqueue_content_sync = lambda *_args, **_kwargs: None
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        response = asyncio.run(main.import_songs(FileUpload(archive_path)))
+        elapsed = time.perf_counter() - started
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"archive: {os.path.getsize(archive_path) / 1024:.0f} KiB compressed, {songs} songs")
+        print(f"counts: {response['counts']}")
+        print(f"elapsed: {elapsed:.2f}s, traced peak memory: {peak / (1024 * 1024):.1f} MiB")
+
+
+def synthetic_vocabulary(words: int, rng: random.Random) -> list[str]:
+    syllables = ["ra", "le", "mi", "so", "ka", "ve", "lu", "ni", "ter", "gra", "ho", "ly", "sa", "an", "de"]
+    vocabulary = set()
+    while len(vocabulary) < words:
+        vocabulary.add("".join(rng.choice(syllables) for _ in range(rng.randint(1, 4))))
+    return sorted(vocabulary)
+
+
+def synthetic_lyric_song(index: int, vocabulary: list[str], weights: list[float], rng: random.Random) -> str:
+    lines = [
+        f"{{title: {' '.join(rng.choices(vocabulary, weights, k=3)).title()} {index}}}",
+        f"{{artist: {rng.choice(vocabulary).title()} Band}}",
+        f"{{category: Set {index % 25}}}",
+        "{section: Verse}",
+    ]
+    for _line in range(16):
+        words = rng.choices(vocabulary, weights, k=8)
+        lines.append(f"[G]{' '.join(words[:4])} [C]{' '.join(words[4:])}")
+    return "\n".join(lines) + "\n"
+
+
+def bench_search(songs: int, queries: int):
+    rng = random.Random(42)
+    vocabulary = synthetic_vocabulary(20_000, rng)
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    parsed = [parse_chordpro(synthetic_lyric_song(index, vocabulary, weights, rng)) for index in range(songs)]
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    index = SongSearchIndex()
+    for number, song in enumerate(parsed):
+        index.update(f"song-{number}.pro", song)
+    build_elapsed = time.perf_counter() - started
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    query_words = rng.sample(vocabulary[:2000], queries)
+    typo_words = [word[:-2] + word[-1] + word[-2] for word in query_words if len(word) > 4]
+    timings = {}
+    for label, texts in (
+        ("single term", query_words),
+        ("two terms", [f"{first} {second}" for first, second in zip(query_words, reversed(query_words))]),
+        ("prefix", [word[:3] for word in query_words]),
+        ("typo", typo_words),
+    ):
+        elapsed = []
+        for text in texts:
+            started = time.perf_counter()
+            index.search(text, limit=20)
+            elapsed.append((time.perf_counter() - started) * 1000)
+        elapsed.sort()
+        timings[label] = (statistics.median(elapsed), elapsed[int(len(elapsed) * 0.95) - 1])
+
+    started = time.perf_counter()
+    for number in range(100):
+        index.update(f"song-{number}.pro", parsed[-1 - number])
+    update_elapsed = (time.perf_counter() - started) * 10
+
+    print(f"songs: {songs}, vocabulary: {len(index.tokens)} tokens")
+    print(f"build: {build_elapsed:.2f}s, index memory: {current / (1024 * 1024):.1f} MiB")
+    for label, (median, p95) in timings.items():
+        print(f"query {label}: median {median:.2f} ms, p95 {p95:.2f} ms")
+    print(f"single song update: {update_elapsed:.2f} ms")
+
+
+def bench_facets(songs: int, queries: int):
+    rng = random.Random(42)
+    keys = ["C", "D", "E", "F", "G", "A", "B", "Am", "Em", "Bm"]
+    interpreters = [f"Band {number}" for number in range(500)]
+    index = SongFacetIndex()
+    started = time.perf_counter()
+    for number in range(songs):
+        index.update(
+            f"song-{number}.pro",
+            {
+                "id": f"song-{number}",
+                "title": f"Song {rng.random():.8f}",
+                "key": rng.choice(keys),
+                "interpret": rng.choice(interpreters),
+                "categories": rng.sample([f"Set {set_number}" for set_number in range(25)], 2),
+            },
+        )
+    build_elapsed = time.perf_counter() - started
+    started = time.perf_counter()
+    index.query({}, limit=1)
+    compile_elapsed = time.perf_counter() - started
+
+    timings = {}
+    for label, make_filters in (
+        ("unfiltered", lambda: {}),
+        ("interpreter", lambda: {"interpreter": [rng.choice(interpreters)]}),
+        ("interpreter + key", lambda: {"interpreter": [rng.choice(interpreters)], "key": [rng.choice(keys)]}),
+        ("category + key", lambda: {"category": [f"Set {rng.randrange(25)}"], "key": [rng.choice(keys)]}),
+    ):
+        elapsed = []
+        for _query in range(queries):
+            filters = make_filters()
+            started = time.perf_counter()
+            index.query(filters, limit=50)
+            elapsed.append((time.perf_counter() - started) * 1000)
+        elapsed.sort()
+        timings[label] = (statistics.median(elapsed), elapsed[int(len(elapsed) * 0.95) - 1])
+
+    print(f"songs: {songs}, build: {build_elapsed:.2f}s, bitset compile: {compile_elapsed * 1000:.0f} ms")
+    for label, (median, p95) in timings.items():
+        print(f"query {label}: median {median:.3f} ms, p95 {p95:.3f} ms")
+
+
+def search_shard_bucket(song_id: str, shards: int) -> int:
+    """Same bucket as searchShardBucket in scripts/build-songs.ts."""
+    return int(hashlib.sha1(song_id.encode("utf-8")).hexdigest()[:8], 16) % shards
+
+
+def payload_cost(payload: str) -> tuple[int, int, float]:
+    timings = []
+    for _attempt in range(5):
+        started = time.perf_counter()
+        json.loads(payload)
+        timings.append((time.perf_counter() - started) * 1000)
+    parse_ms = min(timings)
+    return len(payload.encode("utf-8")), len(gzip.compress(payload.encode("utf-8"))), parse_ms
+
+
+def bench_split_index(songs: int, shards: int):
+    """Compare the legacy lyric-bearing index with the slim index plus search shards."""
+    rng = random.Random(42)
+    vocabulary = synthetic_vocabulary(20_000, rng)
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    parsed = [parse_chordpro(synthetic_lyric_song(index, vocabulary, weights, rng)) for index in range(songs)]
+
+    def metadata(song):
+        return {key: song[key] for key in ("id", "title", "key", "interpret", "categories")}
+
+    legacy = json.dumps([
+        {
+            **metadata(song),
+            "sections": [
+                line["raw"] for section in song["sections"] for line in section["lines"] if line["raw"].strip()
+            ],
+        }
+        for song in parsed
+    ], indent=2)
+    slim = json.dumps([metadata(song) for song in parsed], indent=2)
+    buckets = [[] for _shard in range(shards)]
+    for song in parsed:
+        buckets[search_shard_bucket(song["id"], shards)].append({"id": song["id"], "lyrics": song_lyrics(song)})
+    shard_payloads = [json.dumps(sorted(bucket, key=lambda entry: entry["id"])) for bucket in buckets]
+
+    legacy_cost = payload_cost(legacy)
+    slim_cost = payload_cost(slim)
+    shard_costs = [payload_cost(payload) for payload in shard_payloads]
+    print(f"songs: {songs}, shards: {shards}")
+    print(
+        f"legacy index: {legacy_cost[0] / 1024:.0f} KiB, {legacy_cost[1] / 1024:.0f} KiB gzip, "
+        f"parse {legacy_cost[2]:.1f} ms"
+    )
+    print(
+        f"slim index (first paint): {slim_cost[0] / 1024:.0f} KiB, {slim_cost[1] / 1024:.0f} KiB gzip, "
+        f"parse {slim_cost[2]:.1f} ms"
+    )
+    print(
+        f"all search shards (first search): {sum(cost[0] for cost in shard_costs) / 1024:.0f} KiB, "
+        f"{sum(cost[1] for cost in shard_costs) / 1024:.0f} KiB gzip, "
+        f"parse {sum(cost[2] for cost in shard_costs):.1f} ms"
+    )
+    print(
+        f"after editing one song: legacy refetch {legacy_cost[1] / 1024:.0f} KiB gzip, "
+        f"split refetch {(slim_cost[1] + max(cost[1] for cost in shard_costs)) / 1024:.0f} KiB gzip"
+    )
+
+
+def synthetic_chord_song(index: int, rng: random.Random) -> dict:
+    roots = ["C", "C#", "D", "Eb", "E", "F", "F#", "G", "Ab", "A", "Bb", "B"]
+    qualities = ["", "", "", "m", "m", "7", "m7", "maj7", "sus4", "add9", "dim"]
+    chords = [f"{rng.choice(roots)}{rng.choice(qualities)}" for _chord in range(rng.randint(3, 8))]
+    return parse_chordpro(
+        f"{{title: Song {rng.random():.8f}}}\n" + " ".join(f"[{chord}]la" for chord in chords) + "\n"
+    ) | {"id": f"song-{index}"}
+
+
+def bench_chords(songs: int, queries: int):
+    rng = random.Random(42)
+    index = SongChordIndex()
+    started = time.perf_counter()
+    for number in range(songs):
+        index.update(f"song-{number}.pro", synthetic_chord_song(number, rng))
+    build_elapsed = time.perf_counter() - started
+    started = time.perf_counter()
+    index.compile()
+    compile_elapsed = time.perf_counter() - started
+
+    chord_sets = [["G", "C", "D", "Em"], ["A", "D", "E", "F#m", "Bm"], ["C", "F", "G", "Am", "Dm", "Em", "E7"]]
+    print(
+        f"songs: {songs}, vocabulary: {len(index.vocabulary)} chords, "
+        f"build: {build_elapsed:.2f}s, bitset compile: {compile_elapsed * 1000:.0f} ms"
+    )
+    for label, options in (
+        ("subset", {}),
+        ("subset, transposed", {"transpose": True}),
+        ("at most 2 missing", {"max_missing": 2}),
+        ("at most 2 missing, transposed", {"max_missing": 2, "transpose": True}),
+    ):
+        elapsed = []
+        for query in range(queries):
+            started = time.perf_counter()
+            result = index.query(chord_sets[query % len(chord_sets)], limit=50, **options)
+            elapsed.append((time.perf_counter() - started) * 1000)
+        elapsed.sort()
+        print(
+            f"query {label}: median {statistics.median(elapsed):.2f} ms, "
+            f"p95 {elapsed[int(len(elapsed) * 0.95) - 1]:.2f} ms, last total {result['total']}"
+        )
+
+
+def bench_similar(songs: int, queries: int):
+    rng = random.Random(42)
+    index = SongSimilarityIndex()
+    started = time.perf_counter()
+    for number in range(songs):
+        song = synthetic_chord_song(number, rng)
+        song["categories"] = rng.sample([f"Set {set_number}" for set_number in range(25)], 2)
+        index.update(f"song-{number}.pro", song)
+    build_elapsed = time.perf_counter() - started
+
+    elapsed = []
+    for _query in range(queries):
+        filename = f"song-{rng.randrange(songs)}.pro"
+        started = time.perf_counter()
+        index.similar(filename, 10)
+        elapsed.append((time.perf_counter() - started) * 1000)
+    elapsed.sort()
+
+    started = time.perf_counter()
+    index.update("song-0.pro", synthetic_chord_song(0, rng))
+    update_elapsed = (time.perf_counter() - started) * 1000
+    print(
+        f"songs: {songs}, build: {build_elapsed:.2f}s, "
+        f"matrix: {index.matrix.shape[0]}x{index.matrix.shape[1]} ({index.matrix.nbytes / 2**20:.1f} MiB)"
+    )
+    print(f"top-10 query: median {statistics.median(elapsed):.2f} ms, p95 {elapsed[int(len(elapsed) * 0.95) - 1]:.2f} ms")
+    print(f"single song update: {update_elapsed:.2f} ms")
+
+
+def bench_duplicates(songs: int, duplicate_every: int):
+    rng = random.Random(42)
+    vocabulary = synthetic_vocabulary(5000, rng)
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    parsed = []
+    for number in range(songs):
+        source = synthetic_lyric_song(number, vocabulary, weights, rng)
+        parsed.append((f"song-{number}.pro", parse_chordpro(source)))
+        if number % duplicate_every == 0:
+            # The same lyrics under another title, with one line changed.
+            lines = source.splitlines()
+            lines[-1] = "an extra closing line"
+            parsed.append((f"song-{number}-copy.pro", parse_chordpro("\n".join(lines))))
+    planted = len(parsed) - songs
+
+    index = SongDuplicateIndex()
+    started = time.perf_counter()
+    for filename, song in parsed:
+        index.update(filename, song)
+    build_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    result = index.duplicates(limit=songs)
+    query_elapsed = time.perf_counter() - started
+    found = sum(
+        1 for pair in result["pairs"]
+        if pair["songs"][0]["filename"].removesuffix("-copy.pro") == pair["songs"][1]["filename"].removesuffix(".pro")
+    )
+    print(f"songs: {len(index)}, signatures: {build_elapsed:.2f}s ({build_elapsed / len(index) * 1000:.2f} ms/song)")
+    print(
+        f"duplicates: {query_elapsed * 1000:.0f} ms, candidate pairs {result['candidates']}, "
+        f"reported {result['total']}, planted pairs found {found}/{planted}"
+    )
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="import a synthetic tar.gz library")
+    import_parser.add_argument("--songs", type=int, default=10_000)
+    search_parser = commands.add_parser("search", help="index synthetic lyrics and time queries")
+    search_parser.add_argument("--songs", type=int, default=50_000)
+    search_parser.add_argument("--queries", type=int, default=200)
+    facets_parser = commands.add_parser("facets", help="time category/key/interpreter queries")
+    facets_parser.add_argument("--songs", type=int, default=50_000)
+    facets_parser.add_argument("--queries", type=int, default=200)
+    split_parser = commands.add_parser("split-index", help="compare index and search shard payloads")
+    split_parser.add_argument("--songs", type=int, default=10_000)
+    split_parser.add_argument("--shards", type=int, default=16)
+    chords_parser = commands.add_parser("chords", help="time playable-with-these-chords queries")
+    chords_parser.add_argument("--songs", type=int, default=50_000)
+    chords_parser.add_argument("--queries", type=int, default=60)
+    similar_parser = commands.add_parser("similar", help="time similar-song recommendations")
+    similar_parser.add_argument("--songs", type=int, default=50_000)
+    similar_parser.add_argument("--queries", type=int, default=200)
+    duplicates_parser = commands.add_parser("duplicates", help="time MinHash near-duplicate detection")
+    duplicates_parser.add_argument("--songs", type=int, default=50_000)
+    duplicates_parser.add_argument("--duplicate-every", type=int, default=100)
+    args = parser.parse_args()
+
+    if args.command == "import":
+        bench_import(args.songs)
+    elif args.command == "search":
+        bench_search(args.songs, args.queries)
+    elif args.command == "facets":
+        bench_facets(args.songs, args.queries)
+    elif args.command == "split-index":
+        bench_split_index(args.songs, args.shards)
+    elif args.command == "chords":
+        bench_chords(args.songs, args.queries)
+    elif args.command == "similar":
+        bench_similar(args.songs, args.queries)
+    elif args.command == "duplicates":
+        bench_duplicates(args.songs, args.duplicate_every)
+
+
+if __name__ == "__main__":
+    main_cli()
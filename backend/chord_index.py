@@ -0,0 +1,188 @@
+"""Find songs that can be played with a given set of chords.
+
+Every chord in the catalogue vocabulary keeps a bitset (a Python int) of the
+songs that use it, with songs numbered in title order as in
+backend.facets. A song is playable with the allowed chords when it appears
+in none of the other chords' bitsets, so a query is a few hundred ``|`` and
+``&`` operations over the whole catalogue instead of a loop over songs.
+Counting "at most N chords missing" uses the same bitsets as saturating
+bit-sliced counters.
+"""
+
+import threading
+
+from backend.chords import chord_identity, chord_label
+from backend.facets import bitset
+from backend.search import fold_text
+
+MAX_MISSING_CHORDS = 3
+# Transpositions tried when a song fits several: the smallest shift wins.
+SHIFT_ORDER = (0, 1, -1, 2, -2, 3, -3, 4, -4, 5, -5, 6)
+
+
+def song_chords(song: dict) -> set[tuple[int, str]]:
+    """Return the normalized chord set of a parsed song (see backend.chordpro)."""
+    chords = set()
+    for section in song["sections"]:
+        for line in section["lines"]:
+            for token in line["tokens"]:
+                identity = chord_identity(token["chord"]) if token["chord"] else None
+                if identity is not None:
+                    chords.add(identity)
+    return chords
+
+
+class SongChordIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.documents: dict[str, dict] = {}
+        self.compiled = False
+        self.positions: list[tuple[str, str]] = []
+        self.vocabulary: dict[tuple[int, str], int] = {}
+        self.chord_masks: list[int] = []
+        self.songs_with_chords = 0
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def update(self, filename: str, song: dict):
+        chords = song_chords(song)
+        with self.lock:
+            self.documents[filename] = {
+                "position": (fold_text(song["title"]), filename),
+                "chords": chords,
+                "song": {
+                    "filename": filename,
+                    "id": song["id"],
+                    "title": song["title"],
+                    "key": song.get("key"),
+                    "interpret": song.get("interpret"),
+                },
+            }
+            self.compiled = False
+
+    def remove(self, filename: str):
+        with self.lock:
+            if self.documents.pop(filename, None) is not None:
+                self.compiled = False
+
+    def compile(self):
+        with self.lock:
+            if not self.compiled:
+                self._compile()
+
+    def _compile(self):
+        self.positions = sorted(document["position"] for document in self.documents.values())
+        members: dict[tuple[int, str], list[int]] = {}
+        for number, (_title, filename) in enumerate(self.positions):
+            for identity in self.documents[filename]["chords"]:
+                members.setdefault(identity, []).append(number)
+        self.vocabulary = {identity: chord_id for chord_id, identity in enumerate(sorted(members))}
+        size = len(self.positions)
+        self.chord_masks = [bitset(members[identity], size) for identity in sorted(members)]
+        self.songs_with_chords = 0
+        for mask in self.chord_masks:
+            self.songs_with_chords |= mask
+        self.compiled = True
+
+    def missing_at_most(self, allowed: set[int], max_missing: int) -> list[int]:
+        """Return bitsets of songs with at most 0..max_missing chords outside ``allowed``."""
+        # at_least[k]: songs using at least k + 1 chords outside the allowed set.
+        at_least = [0] * (max_missing + 1)
+        for chord_id, mask in enumerate(self.chord_masks):
+            if chord_id in allowed:
+                continue
+            for count in range(max_missing, 0, -1):
+                at_least[count] |= at_least[count - 1] & mask
+            at_least[0] |= mask
+        return [self.songs_with_chords & ~mask for mask in at_least]
+
+    def query(
+        self,
+        chords: list[str],
+        *,
+        transpose: bool = False,
+        max_missing: int = 0,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> dict:
+        """Return songs playable with ``chords``, fewest missing chords first.
+
+        With ``transpose`` a song also matches when shifting it by ``steps``
+        semitones makes it playable; the smallest such shift is reported.
+        Raises ValueError naming chords that cannot be understood.
+        """
+        allowed = set()
+        invalid = []
+        for chord in chords:
+            identity = chord_identity(chord)
+            if identity is None:
+                invalid.append(chord)
+            else:
+                allowed.add(identity)
+        if invalid:
+            raise ValueError(invalid)
+        max_missing = max(0, min(max_missing, MAX_MISSING_CHORDS))
+
+        with self.lock:
+            if not self.compiled:
+                self._compile()
+
+            # Shifting a song by ``steps`` makes chord (root, quality) into
+            # (root + steps, quality), so it may use allowed roots minus steps.
+            levels = []
+            for steps in SHIFT_ORDER if transpose else (0,):
+                shifted = {((root - steps) % 12, quality) for root, quality in allowed}
+                allowed_ids = {self.vocabulary[identity] for identity in shifted if identity in self.vocabulary}
+                levels.append((steps, self.missing_at_most(allowed_ids, max_missing)))
+
+            # Assign each song its fewest missing chords, then its smallest shift.
+            groups = []
+            assigned = 0
+            for missing in range(max_missing + 1):
+                for steps, within in levels:
+                    fresh = within[missing] & ~assigned
+                    if fresh:
+                        groups.append((missing, steps, fresh))
+                        assigned |= fresh
+            total = assigned.bit_count()
+
+            results = []
+            skipped = 0
+            for missing in range(max_missing + 1):
+                group_masks = [(steps, mask) for count, steps, mask in groups if count == missing]
+                combined = 0
+                for _steps, mask in group_masks:
+                    combined |= mask
+                size = combined.bit_count()
+                if skipped + size <= offset:
+                    skipped += size
+                    continue
+                remaining = combined
+                while remaining and len(results) < limit:
+                    lowest = remaining & -remaining
+                    number = lowest.bit_length() - 1
+                    remaining ^= lowest
+                    if skipped < offset:
+                        skipped += 1
+                        continue
+                    steps = next(steps for steps, mask in group_masks if mask & lowest)
+                    results.append(self.result(number, steps, allowed))
+                if len(results) >= limit:
+                    break
+
+        return {
+            "chords": sorted(chord_label(identity) for identity in allowed),
+            "total": total,
+            "results": results,
+        }
+
+    def result(self, number: int, steps: int, allowed: set[tuple[int, str]]) -> dict:
+        document = self.documents[self.positions[number][1]]
+        shifted = {((root + steps) % 12, quality) for root, quality in document["chords"]}
+        return {
+            **document["song"],
+            "steps": steps,
+            "chords": sorted(chord_label(identity) for identity in shifted),
+            "missing": sorted(chord_label(identity) for identity in shifted - allowed),
+        }
@@ -0,0 +1,124 @@
+"""ChordPro parsing that matches src/lib/parseChordPro.ts.
+
+The backend indexes song sources directly, so the fields it derives must be
+exactly the ones the song builder publishes.
+"""
+
+import re
+
+CHORDPRO_META_RE = re.compile(r"^\{\s*([^:]+):\s*(.+)\s*\}$")
+CHORD_RE = re.compile(r"\[([^\]]+)\]")
+LINE_SPLIT_RE = re.compile(r"\r?\n")
+
+
+def slugify(value: str) -> str:
+    song_id = re.sub(r"[^a-z0-9]+", "-", value.strip().lower())
+    return re.sub(r"^-+|-+$", "", song_id)
+
+
+def normalize_category_name(category: str) -> str:
+    return re.sub(r"\s+", " ", category.strip())
+
+
+def dedupe_categories(categories: list[str]) -> list[str]:
+    seen = set()
+    deduped = []
+    for category in categories:
+        normalized = normalize_category_name(category)
+        key = normalized.lower()
+        if not normalized or key in seen:
+            continue
+        seen.add(key)
+        deduped.append(normalized)
+    return deduped
+
+
+def parse_category_list(value: str) -> list[str]:
+    return dedupe_categories(re.split(r"[,;]", value))
+
+
+def parse_tokens(line: str) -> list[dict]:
+    """Split a lyric line into chord/lyric pairs like the frontend parser.
+
+    A chord's lyric stops at the next "[", even one that does not open a
+    chord; whatever follows becomes a chord-less token.
+    """
+    tokens = []
+    last_index = 0
+    for match in CHORD_RE.finditer(line):
+        lyric_before = line[last_index:match.start()]
+        if lyric_before:
+            tokens.append({"chord": None, "lyric": lyric_before})
+        remaining = line[match.end():]
+        next_chord = remaining.find("[")
+        lyric_after = remaining if next_chord == -1 else remaining[:next_chord]
+        tokens.append({"chord": match.group(1).strip(), "lyric": lyric_after})
+        last_index = match.end() + len(lyric_after)
+    trailing = line[last_index:]
+    if trailing.strip():
+        tokens.append({"chord": None, "lyric": trailing})
+    if not tokens:
+        tokens.append({"chord": None, "lyric": ""})
+    return tokens
+
+
+def parse_chordpro(source: str) -> dict:
+    """Return the same id, metadata and sections that the song builder publishes."""
+    title = "Untitled"
+    key = None
+    interpret = None
+    categories = []
+    sections = []
+    current_section = {"name": "Verse", "lines": []}
+    is_default_section = True
+
+    def commit_section():
+        lines = current_section["lines"]
+        if lines and not (is_default_section and all(not line["raw"].strip() for line in lines)):
+            sections.append(current_section)
+
+    for line in LINE_SPLIT_RE.split(source):
+        meta_match = CHORDPRO_META_RE.match(line)
+        if meta_match:
+            tag = meta_match.group(1).strip().lower()
+            value = meta_match.group(2).strip()
+            if tag == "title":
+                title = value
+            elif tag == "key":
+                key = value
+            elif tag in ("interpret", "interpreter", "artist"):
+                interpret = value
+            elif tag in ("category", "categories"):
+                categories.extend(parse_category_list(value))
+            elif tag == "section":
+                commit_section()
+                current_section = {"name": value, "lines": []}
+                is_default_section = False
+            continue
+
+        if not line.strip():
+            current_section["lines"].append({"tokens": [{"chord": None, "lyric": ""}], "raw": ""})
+            continue
+        current_section["lines"].append({"tokens": parse_tokens(line), "raw": line})
+
+    commit_section()
+
+    return {
+        "id": slugify(title),
+        "title": title,
+        "key": key,
+        "interpret": interpret,
+        "categories": dedupe_categories(categories),
+        "sections": sections,
+    }
+
+
+def song_lyrics(song: dict) -> list[str]:
+    """Return the non-empty lyric lines of a parsed song with chords removed."""
+    lyrics = []
+    for section in song["sections"]:
+        for line in section["lines"]:
+            text = "".join(token["lyric"] for token in line["tokens"]).strip()
+            if text:
+                lyrics.append(text)
+    return lyrics
@@ -0,0 +1,126 @@
+"""Chord transposition that matches src/lib/chords.ts.
+
+Rendering a song in another key on the server lets projector and tablet
+clients show the result as-is, and the same rendering is shared by every
+device that asks for that key.
+"""
+
+import copy
+import re
+
+NOTE_SEQUENCE = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
+FLAT_NOTE_SEQUENCE = ["C", "Db", "D", "Eb", "E", "F", "Gb", "G", "Ab", "A", "Bb", "B"]
+FLAT_MAP = {"Db": "C#", "Eb": "D#", "Gb": "F#", "Ab": "G#", "Bb": "A#"}
+CHORD_ROOT_RE = re.compile(r"([A-G](?:#|b)?)(.*)", re.IGNORECASE)
+BASS_ROOT_RE = re.compile(r"/([A-G](?:#|b)?)\Z", re.IGNORECASE)
+KEY_ROOT_RE = re.compile(r"^([A-G](?:#|b)?)", re.IGNORECASE)
+INLINE_CHORD_RE = re.compile(r"\[([A-G](?:#|b)?[^\]]*)\]")
+# Qualities and extensions; keeps bracketed words such as [Bridge] out of chord sets.
+CHORD_QUALITY_RE = re.compile(r"(?:maj|min|dim|aug|sus|add|m|M|[0-9]|[#b+°ø()-])*")
+
+
+def normalize_root(root: str) -> str:
+    normalized_case = root[:1].upper() + root[1:]
+    return FLAT_MAP.get(normalized_case, normalized_case)
+
+
+def key_root(key: str) -> str | None:
+    match = KEY_ROOT_RE.match(key)
+    return match.group(1) if match else None
+
+
+def transpose_root(root: str, steps: int, prefer_flats: bool = False) -> str:
+    normalized = normalize_root(root)
+    if normalized not in NOTE_SEQUENCE:
+        return root
+    shifted = (NOTE_SEQUENCE.index(normalized) + steps) % len(NOTE_SEQUENCE)
+    return (FLAT_NOTE_SEQUENCE if prefer_flats else NOTE_SEQUENCE)[shifted]
+
+
+def transpose_chord(chord: str, steps: int, prefer_flats: bool = False, respell: bool = False) -> str:
+    if steps == 0 and not respell:
+        return chord
+    match = CHORD_ROOT_RE.fullmatch(chord)
+    if not match:
+        return chord
+    root, suffix = match.groups()
+    transposed_suffix = BASS_ROOT_RE.sub(
+        lambda bass: f"/{transpose_root(bass.group(1), steps, prefer_flats)}",
+        suffix,
+    )
+    return f"{transpose_root(root, steps, prefer_flats)}{transposed_suffix}"
+
+
+def chord_identity(chord: str) -> tuple[int, str] | None:
+    """Return (root semitone, quality) for a chord, ignoring spelling and slash bass.
+
+    A slash bass is left to the bass player or dropped by a guitarist, so D/F#
+    counts as D when asking which chords a song needs.
+    """
+    match = CHORD_ROOT_RE.fullmatch(chord.strip())
+    if not match:
+        return None
+    root, suffix = match.groups()
+    quality = BASS_ROOT_RE.sub("", suffix)
+    normalized = normalize_root(root)
+    if normalized not in NOTE_SEQUENCE or not CHORD_QUALITY_RE.fullmatch(quality):
+        return None
+    return NOTE_SEQUENCE.index(normalized), quality
+
+
+def chord_label(identity: tuple[int, str], steps: int = 0) -> str:
+    root, quality = identity
+    return f"{NOTE_SEQUENCE[(root + steps) % len(NOTE_SEQUENCE)]}{quality}"
+
+
+def transpose_delta(from_key: str | None, to_key: str | None) -> int:
+    if not from_key or not to_key:
+        return 0
+    from_root = key_root(from_key)
+    to_root = key_root(to_key)
+    if not from_root or not to_root:
+        return 0
+    from_root, to_root = normalize_root(from_root), normalize_root(to_root)
+    if from_root not in NOTE_SEQUENCE or to_root not in NOTE_SEQUENCE:
+        return 0
+    delta = NOTE_SEQUENCE.index(to_root) - NOTE_SEQUENCE.index(from_root)
+    if delta > 6:
+        return delta - len(NOTE_SEQUENCE)
+    if delta < -6:
+        return delta + len(NOTE_SEQUENCE)
+    return delta
+
+
+def render_transposed_song(
+    song: dict,
+    target_key: str | None,
+    spelling: str = "auto",
+) -> dict:
+    """Return a parsed song (see backend.chordpro) with every chord in ``target_key``.
+
+    ``spelling`` is "sharp", "flat" or "auto", which follows the target key
+    like the editor does: flats for keys written with a "b".
+    """
+    steps = transpose_delta(song.get("key"), target_key)
+    if spelling == "auto":
+        prefer_flats = "b" in (target_key or "")
+        respell = target_key is not None
+    else:
+        prefer_flats = spelling == "flat"
+        respell = True
+
+    def transpose(chord: str) -> str:
+        return transpose_chord(chord, steps, prefer_flats, respell)
+
+    rendered = copy.deepcopy(song)
+    for section in rendered["sections"]:
+        for line in section["lines"]:
+            for token in line["tokens"]:
+                if token["chord"]:
+                    token["chord"] = transpose(token["chord"])
+            line["raw"] = INLINE_CHORD_RE.sub(lambda match: f"[{transpose(match.group(1))}]", line["raw"])
+    if song.get("key"):
+        rendered["key"] = target_key if target_key is not None else transpose(song["key"])
+    rendered["original_key"] = song.get("key")
+    rendered["steps"] = steps
+    return rendered
@@ -0,0 +1,122 @@
+"""Unpublished song drafts kept in memory, one per editor and song.
+
+Saving a song rebuilds the catalogue and syncs the content repository, so
+the editor cannot autosave through it. Drafts are plain in-memory entries
+that never touch SONGS_DIR or git; publishing one goes through the normal
+save path. Drafts expire after ``ttl`` seconds. Each draft is limited to
+``max_bytes``, each editor to ``max_per_editor`` drafts, and the store to
+``max_total_bytes``. When a limit is exceeded, the least recently saved
+drafts are dropped first. Drafts do not survive a server restart.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class DraftTooLarge(ValueError):
+    pass
+
+
+class DraftStore:
+    def __init__(
+        self,
+        *,
+        ttl: float = 7 * 24 * 3600.0,
+        max_bytes: int = 256 * 1024,
+        max_per_editor: int = 50,
+        max_total_bytes: int = 64 * 1024 * 1024,
+        clock=time.time,
+    ):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_per_editor = max_per_editor
+        self.max_total_bytes = max_total_bytes
+        self.clock = clock
+        self.lock = threading.Lock()
+        # (editor, filename) -> draft, least recently saved first.
+        self.drafts: OrderedDict[tuple[str, str], dict] = OrderedDict()
+        self.total_bytes = 0
+        self.metrics = {"saves": 0, "published": 0, "discarded": 0, "expired": 0, "evicted": 0}
+
+    def _drop(self, key: tuple[str, str], reason: str | None):
+        draft = self.drafts.pop(key)
+        self.total_bytes -= draft["size"]
+        if reason is not None:
+            self.metrics[reason] += 1
+
+    def _purge_expired(self):
+        cutoff = self.clock() - self.ttl
+        for key in [key for key, draft in self.drafts.items() if draft["saved_at"] <= cutoff]:
+            self._drop(key, "expired")
+
+    def summary(self, draft: dict) -> dict:
+        return {
+            "filename": draft["filename"],
+            "base_revision": draft["base_revision"],
+            "saved_at": draft["saved_at"],
+            "expires_at": draft["saved_at"] + self.ttl,
+            "size": draft["size"],
+        }
+
+    def save(self, editor: str, filename: str, content: str, base_revision: str | None) -> dict:
+        size = len(content.encode("utf-8"))
+        if size > self.max_bytes:
+            raise DraftTooLarge(f"Drafts are limited to {self.max_bytes} bytes; this one has {size}.")
+        key = (editor, filename)
+        with self.lock:
+            self._purge_expired()
+            if key in self.drafts:
+                # Replaced, and moved to the most recently saved end.
+                self._drop(key, None)
+            draft = {
+                "filename": filename,
+                "content": content,
+                "base_revision": base_revision,
+                "saved_at": self.clock(),
+                "size": size,
+            }
+            self.drafts[key] = draft
+            self.total_bytes += size
+            self.metrics["saves"] += 1
+            editor_keys = [other for other in self.drafts if other[0] == editor]
+            for other in editor_keys[:max(0, len(editor_keys) - self.max_per_editor)]:
+                self._drop(other, "evicted")
+            while self.total_bytes > self.max_total_bytes and len(self.drafts) > 1:
+                self._drop(next(iter(self.drafts)), "evicted")
+            return self.summary(draft)
+
+    def get(self, editor: str, filename: str) -> dict | None:
+        with self.lock:
+            self._purge_expired()
+            draft = self.drafts.get((editor, filename))
+            return None if draft is None else {**self.summary(draft), "content": draft["content"]}
+
+    def list(self, editor: str) -> list[dict]:
+        with self.lock:
+            self._purge_expired()
+            drafts = [self.summary(draft) for (owner, _filename), draft in self.drafts.items() if owner == editor]
+        return sorted(drafts, key=lambda draft: draft["saved_at"], reverse=True)
+
+    def discard(self, editor: str, filename: str, *, published: bool = False, saved_at: float | None = None) -> bool:
+        """Drop a draft; with ``saved_at``, only if it was not saved again since."""
+        with self.lock:
+            draft = self.drafts.get((editor, filename))
+            if draft is None or (saved_at is not None and draft["saved_at"] != saved_at):
+                return False
+            self._drop((editor, filename), "published" if published else "discarded")
+            return True
+
+    def stats(self) -> dict:
+        with self.lock:
+            self._purge_expired()
+            return {
+                "drafts": len(self.drafts),
+                "editors": len({editor for editor, _filename in self.drafts}),
+                "total_bytes": self.total_bytes,
+                "max_total_bytes": self.max_total_bytes,
+                "max_bytes": self.max_bytes,
+                "max_per_editor": self.max_per_editor,
+                "ttl": self.ttl,
+                "metrics": dict(self.metrics),
+            }
@@ -0,0 +1,129 @@
+"""Find songs that appear more than once under slightly different titles.
+
+Song ids only catch identical slugs. Here every song's folded lyrics are cut
+into overlapping word shingles and summarised by a MinHash signature, whose
+matching positions estimate the Jaccard similarity of two songs' shingle
+sets. Locality-sensitive hashing splits the signature into bands; songs that
+agree on a whole band land in the same bucket, and only buckets holding more
+than one song produce candidate pairs, so finding duplicates does not
+compare every pair of songs. Signatures and buckets are updated song by
+song as the catalogue changes.
+"""
+
+import hashlib
+import threading
+
+import numpy as np
+
+from backend.chordpro import song_lyrics
+from backend.search import tokenize
+
+SHINGLE_WORDS = 3
+MINHASH_PERMUTATIONS = 128
+LSH_BANDS = 16
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+# A prime just below 2**32: (a * hash + b) stays within uint64.
+MINHASH_PRIME = 4294967291
+DEFAULT_MIN_SIMILARITY = 0.7
+
+_rng = np.random.default_rng(20240229)
+PERMUTATION_A = _rng.integers(1, MINHASH_PRIME, MINHASH_PERMUTATIONS, dtype=np.uint64)
+PERMUTATION_B = _rng.integers(0, MINHASH_PRIME, MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+
+def lyric_shingles(song: dict) -> set[str]:
+    words = tokenize(" ".join(song_lyrics(song)))
+    if len(words) < SHINGLE_WORDS:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[start:start + SHINGLE_WORDS]) for start in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def minhash_signature(shingles: set[str]) -> np.ndarray:
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little")
+         for shingle in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    permuted = (PERMUTATION_A[:, None] * hashes[None, :] + PERMUTATION_B[:, None]) % np.uint64(MINHASH_PRIME)
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def band_keys(signature: np.ndarray) -> list[tuple[int, bytes]]:
+    return [
+        (band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes())
+        for band in range(LSH_BANDS)
+    ]
+
+
+class SongDuplicateIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.signatures: dict[str, np.ndarray] = {}
+        self.documents: dict[str, dict] = {}
+        self.buckets: dict[tuple[int, bytes], set[str]] = {}
+        self.crowded: set[tuple[int, bytes]] = set()
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def update(self, filename: str, song: dict):
+        shingles = lyric_shingles(song)
+        signature = minhash_signature(shingles) if shingles else None
+        with self.lock:
+            self._remove(filename)
+            if signature is None:
+                return
+            self.signatures[filename] = signature
+            self.documents[filename] = {"filename": filename, "id": song["id"], "title": song["title"]}
+            for key in band_keys(signature):
+                bucket = self.buckets.setdefault(key, set())
+                bucket.add(filename)
+                if len(bucket) > 1:
+                    self.crowded.add(key)
+
+    def remove(self, filename: str):
+        with self.lock:
+            self._remove(filename)
+
+    def _remove(self, filename: str):
+        signature = self.signatures.pop(filename, None)
+        if signature is None:
+            return
+        del self.documents[filename]
+        for key in band_keys(signature):
+            bucket = self.buckets[key]
+            bucket.discard(filename)
+            if len(bucket) < 2:
+                self.crowded.discard(key)
+            if not bucket:
+                del self.buckets[key]
+
+    def duplicates(self, min_similarity: float = DEFAULT_MIN_SIMILARITY, limit: int = 100) -> dict:
+        """Return likely duplicate pairs, most similar first.
+
+        ``similarity`` is the MinHash estimate of the Jaccard similarity of the
+        two songs' lyric shingles.
+        """
+        with self.lock:
+            candidates = set()
+            for key in self.crowded:
+                members = sorted(self.buckets[key])
+                for position, first in enumerate(members):
+                    for second in members[position + 1:]:
+                        candidates.add((first, second))
+
+            pairs = []
+            for first, second in candidates:
+                similarity = float(np.mean(self.signatures[first] == self.signatures[second]))
+                if similarity >= min_similarity:
+                    pairs.append((similarity, first, second))
+            pairs.sort(key=lambda pair: (-pair[0], pair[1], pair[2]))
+            results = [
+                {
+                    "similarity": round(similarity, 3),
+                    "songs": [dict(self.documents[first]), dict(self.documents[second])],
+                }
+                for similarity, first, second in pairs[:limit]
+            ]
+        return {"candidates": len(candidates), "total": len(pairs), "pairs": results}
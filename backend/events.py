@@ -0,0 +1,161 @@
+"""Push catalogue-updated events to open browser tabs over Server-Sent Events.
+
+The hub notices a new published generation either because a rebuild nudged
+it or because its periodic check saw the output symlink move (for example
+after a build run from the command line). A burst of publishes within
+``coalesce_delay`` becomes one event.
+
+Each connection holds at most one pending event. Later publishes are merged
+into it, so a slow client never accumulates a backlog. When the merged
+change list grows past ``max_pending_ids`` it is replaced by a reload hint.
+"""
+
+import asyncio
+import json
+
+from backend.generations import active_generation, changes_since, merge_change_sets
+
+KEEPALIVE_SECONDS = 15.0
+MAX_PENDING_SONG_IDS = 500
+
+
+def state_lists(states: dict[str, str]) -> dict[str, list[str]]:
+    return {
+        name: sorted(song_id for song_id, state in states.items() if state == name)
+        for name in ("added", "updated", "removed")
+    }
+
+
+class CatalogueSubscriber:
+    def __init__(self, max_pending_ids: int = MAX_PENDING_SONG_IDS):
+        self.max_pending_ids = max_pending_ids
+        self.pending: dict | None = None
+        self.wakeup = asyncio.Event()
+
+    def offer(self, event: dict):
+        if self.pending is None:
+            self.pending = {**event, "states": dict(event["states"])}
+        else:
+            self.pending["generation"] = event["generation"]
+            self.pending["reload"] = self.pending["reload"] or event["reload"]
+            self.pending["states"] = merge_change_sets(
+                [state_lists(self.pending["states"]), state_lists(event["states"])]
+            )
+        if len(self.pending["states"]) > self.max_pending_ids:
+            self.pending["reload"] = True
+        if self.pending["reload"]:
+            self.pending["states"] = {}
+        self.wakeup.set()
+
+    async def next_event(self, timeout: float) -> dict | None:
+        try:
+            await asyncio.wait_for(self.wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self.wakeup.clear()
+        event, self.pending = self.pending, None
+        return event
+
+
+def event_payload(event: dict) -> dict:
+    return {
+        "generation": event["generation"],
+        "since": event["since"],
+        "reload": event["reload"],
+        **state_lists(event["states"]),
+    }
+
+
+def format_sse(event_name: str, data: dict) -> bytes:
+    return f"event: {event_name}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode("utf-8")
+
+
+class CatalogueEventHub:
+    def __init__(self, poll_interval: float = 5.0, coalesce_delay: float = 0.25):
+        self.poll_interval = poll_interval
+        self.coalesce_delay = coalesce_delay
+        self.subscribers: set[CatalogueSubscriber] = set()
+        self.generation: str | None = None
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.nudged: asyncio.Event | None = None
+        self.published = 0
+
+    def subscribe(self) -> CatalogueSubscriber:
+        subscriber = CatalogueSubscriber()
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: CatalogueSubscriber):
+        self.subscribers.discard(subscriber)
+
+    def nudge(self):
+        """Ask the hub to check for a new generation now; safe from any thread."""
+        loop, nudged = self.loop, self.nudged
+        if loop is None or nudged is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            nudged.set()
+        else:
+            loop.call_soon_threadsafe(nudged.set)
+
+    def detect(self, output_dir: str) -> dict | None:
+        """Return an event if the active generation moved since the last check."""
+        current = active_generation(output_dir)
+        if current is None or current == self.generation:
+            return None
+        since = self.generation
+        if since is None:
+            changes = {"reload": True, "states": {}}
+        else:
+            changes = changes_since(output_dir, since)
+        self.generation = current
+        return {
+            "generation": current,
+            "since": since,
+            "reload": changes["reload"],
+            "states": changes["states"],
+        }
+
+    def broadcast(self, event: dict):
+        """Queue an event for every connection; must run on the event loop."""
+        self.published += 1
+        for subscriber in list(self.subscribers):
+            subscriber.offer(event)
+
+    async def run(self, output_dir_getter):
+        self.loop = asyncio.get_running_loop()
+        self.nudged = asyncio.Event()
+        self.generation = await asyncio.to_thread(active_generation, output_dir_getter())
+        while True:
+            try:
+                await asyncio.wait_for(self.nudged.wait(), self.poll_interval)
+                # Let a burst of publishes settle so it produces one event.
+                await asyncio.sleep(self.coalesce_delay)
+            except asyncio.TimeoutError:
+                pass
+            self.nudged.clear()
+            try:
+                event = await asyncio.to_thread(self.detect, output_dir_getter())
+            except Exception as error:
+                print(f"Catalogue event check failed: {error}")
+                continue
+            if event is not None:
+                self.broadcast(event)
+
+    async def stream(self, subscriber: CatalogueSubscriber, is_disconnected, keepalive: float = KEEPALIVE_SECONDS):
+        """Yield SSE frames for one connection until the client goes away."""
+        try:
+            yield b"retry: 5000\n\n"
+            yield format_sse("catalogue-generation", {"generation": self.generation})
+            while not await is_disconnected():
+                event = await subscriber.next_event(keepalive)
+                if event is None:
+                    yield b": keepalive\n\n"
+                else:
+                    yield format_sse("catalogue-updated", event_payload(event))
+        finally:
+            self.unsubscribe(subscriber)
@@ -0,0 +1,193 @@
+"""Precomputed category, key and interpreter indexes for catalogue filtering.
+
+Songs are numbered in title order and every facet value keeps a bitset
+(a Python int) of the songs carrying it. Filtering is a handful of ``|`` and
+``&`` operations, facet counts are ``bit_count`` calls and a page is read by
+walking the lowest set bits after the cursor, so queries never touch the
+individual songs that are not returned. Updates only record the song; the
+bitsets are recompiled once per refresh, or by the first query after a change.
+"""
+
+import base64
+import binascii
+import bisect
+import json
+import threading
+
+from backend.search import fold_text
+
+FACETS = ("category", "key", "interpreter")
+
+
+def facet_values(song: dict) -> dict[str, list[str]]:
+    return {
+        "category": list(song.get("categories") or []),
+        "key": [song["key"]] if song.get("key") and song["key"].strip() else [],
+        "interpreter": [song["interpret"]] if song.get("interpret") and song["interpret"].strip() else [],
+    }
+
+
+def facet_value_key(facet: str, value: str) -> str:
+    """Keys are case-sensitive (E vs e); categories and interpreters are not."""
+    value = " ".join(value.split())
+    return value if facet == "key" else fold_text(value)
+
+
+def encode_cursor(position: tuple[str, str]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(position)).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        title, filename = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError, binascii.Error, UnicodeError):
+        raise ValueError("Invalid cursor") from None
+    if not isinstance(title, str) or not isinstance(filename, str):
+        raise ValueError("Invalid cursor")
+    return title, filename
+
+
+def bitset(numbers: list[int], size: int) -> int:
+    data = bytearray((size + 7) // 8)
+    for number in numbers:
+        data[number >> 3] |= 1 << (number & 7)
+    return int.from_bytes(data, "little")
+
+
+class SongFacetIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.documents: dict[str, dict] = {}
+        self.compiled = False
+        self.positions: list[tuple[str, str]] = []
+        self.masks: dict[str, dict[str, int]] = {facet: {} for facet in FACETS}
+        self.labels: dict[str, dict[str, str]] = {facet: {} for facet in FACETS}
+        self.counts: dict[str, dict[str, int]] = {facet: {} for facet in FACETS}
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def update(self, filename: str, song: dict):
+        values = {facet: {} for facet in FACETS}
+        for facet, raw_values in facet_values(song).items():
+            for value in raw_values:
+                values[facet].setdefault(facet_value_key(facet, value), " ".join(value.split()))
+        with self.lock:
+            self.documents[filename] = {
+                "position": (fold_text(song["title"]), filename),
+                "values": values,
+                "song": {
+                    "filename": filename,
+                    "id": song["id"],
+                    "title": song["title"],
+                    "key": song.get("key"),
+                    "interpret": song.get("interpret"),
+                    "categories": list(song.get("categories") or []),
+                },
+            }
+            self.compiled = False
+
+    def remove(self, filename: str):
+        with self.lock:
+            if self.documents.pop(filename, None) is not None:
+                self.compiled = False
+
+    def compile(self):
+        with self.lock:
+            if not self.compiled:
+                self._compile()
+
+    def _compile(self):
+        """Number songs in title order and rebuild every value's bitset."""
+        self.positions = sorted(document["position"] for document in self.documents.values())
+        members = {facet: {} for facet in FACETS}
+        labels = {facet: {} for facet in FACETS}
+        for number, (_title, filename) in enumerate(self.positions):
+            for facet, labelled in self.documents[filename]["values"].items():
+                for value_key, label in labelled.items():
+                    members[facet].setdefault(value_key, []).append(number)
+                    labels[facet].setdefault(value_key, label)
+        size = len(self.positions)
+        self.masks = {
+            facet: {value_key: bitset(numbers, size) for value_key, numbers in values.items()}
+            for facet, values in members.items()
+        }
+        self.counts = {
+            facet: {value_key: len(numbers) for value_key, numbers in values.items()}
+            for facet, values in members.items()
+        }
+        self.labels = labels
+        self.compiled = True
+
+    def facet_counts(self, facet: str, base: int | None, facet_limit: int) -> list[dict]:
+        if base is None:
+            counts = self.counts[facet]
+        else:
+            counts = {}
+            for value_key, mask in self.masks[facet].items():
+                count = (mask & base).bit_count()
+                if count:
+                    counts[value_key] = count
+        ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        return [
+            {"value": self.labels[facet][value_key], "count": count}
+            for value_key, count in ranked[:facet_limit]
+        ]
+
+    def query(
+        self,
+        filters: dict[str, list[str]],
+        *,
+        limit: int = 50,
+        cursor: str | None = None,
+        facet_limit: int = 50,
+    ) -> dict:
+        """Return one title-ordered page of songs matching every filtered facet.
+
+        Values within a facet are alternatives; facets are combined. Facet
+        counts for a facet ignore that facet's own filter, so the client can
+        show how many songs each alternative would add.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        with self.lock:
+            if not self.compiled:
+                self._compile()
+
+            selections = {}
+            for facet, values in filters.items():
+                if not values:
+                    continue
+                mask = 0
+                for value in values:
+                    mask |= self.masks[facet].get(facet_value_key(facet, value), 0)
+                selections[facet] = mask
+
+            def intersect(excluded: str | None = None) -> int | None:
+                result = None
+                for facet, mask in selections.items():
+                    if facet != excluded:
+                        result = mask if result is None else result & mask
+                return result
+
+            matches = intersect()
+            if matches is None:
+                matches = (1 << len(self.positions)) - 1
+            start = bisect.bisect_right(self.positions, after) if after else 0
+
+            songs = []
+            remaining = matches >> start
+            number = start
+            while remaining and len(songs) < limit:
+                skip = (remaining & -remaining).bit_length() - 1
+                number += skip
+                songs.append(dict(self.documents[self.positions[number][1]]["song"]))
+                remaining >>= skip + 1
+                number += 1
+            next_cursor = encode_cursor(self.positions[number - 1]) if remaining and songs else None
+
+            facets = {
+                facet: self.facet_counts(facet, intersect(facet), facet_limit)
+                for facet in FACETS
+            }
+        return {"songs": songs, "total": matches.bit_count(), "next_cursor": next_cursor, "facets": facets}
@@ -0,0 +1,104 @@
+"""Read published song-data generations and their change sets.
+
+scripts/build-songs.ts publishes every build as an immutable directory in
+``.<output>-generations`` and points the output path at it with a symlink.
+Each build also records which song ids it added, updated and removed
+relative to the generation it replaced, both inside the generation
+(``changes.json``) and in ``changes/<generation>.json``, which is kept for
+longer than the generations themselves.
+"""
+
+import json
+import os
+import re
+from functools import lru_cache
+
+GENERATION_NAME_RE = re.compile(r"^generation-[a-zA-Z0-9.-]+$")
+MAX_CHANGE_SET_CHAIN = 200
+
+
+def generations_dir(output_dir: str) -> str:
+    output_dir = os.path.abspath(output_dir)
+    return os.path.join(os.path.dirname(output_dir), f".{os.path.basename(output_dir)}-generations")
+
+
+def active_generation(output_dir: str) -> str | None:
+    if not os.path.islink(output_dir):
+        return None
+    return generation_name(os.path.realpath(output_dir))
+
+
+def generation_name(generation_dir: str) -> str | None:
+    """Return the generation a resolved output directory holds, if it is one."""
+    name = os.path.basename(generation_dir)
+    return name if GENERATION_NAME_RE.match(name) else None
+
+
+def read_change_set(output_dir: str, generation: str) -> dict | None:
+    if not GENERATION_NAME_RE.match(generation):
+        return None
+    root = generations_dir(output_dir)
+    for candidate in (
+        os.path.join(root, "changes", f"{generation}.json"),
+        os.path.join(root, generation, "changes.json"),
+    ):
+        try:
+            with open(candidate, "r", encoding="utf-8") as change_file:
+                change_set = json.load(change_file)
+        except (OSError, ValueError):
+            continue
+        if change_set.get("version") == 1 and change_set.get("generation") == generation:
+            return change_set
+    return None
+
+
+def merge_change_sets(change_sets: list[dict]) -> dict[str, str]:
+    """Fold oldest-first change sets into one status per song id."""
+    states = {}
+    for change_set in change_sets:
+        for song_id in change_set["added"]:
+            states[song_id] = "updated" if states.get(song_id) == "removed" else "added"
+        for song_id in change_set["updated"]:
+            if states.get(song_id) != "added":
+                states[song_id] = "updated"
+        for song_id in change_set["removed"]:
+            if states.get(song_id) == "added":
+                del states[song_id]
+            else:
+                states[song_id] = "removed"
+    return states
+
+
+def changes_since(output_dir: str, since: str) -> dict:
+    """Return merged song id changes from ``since`` to the active generation.
+
+    ``reload`` is set when the chain of change sets no longer reaches
+    ``since``, for example because it was pruned or never published here.
+    """
+    current = active_generation(output_dir)
+    result = {"generation": current, "reload": False, "states": {}}
+    if current is None:
+        result["reload"] = True
+        return result
+    if since == current:
+        return result
+
+    chain = []
+    generation = current
+    while generation != since:
+        change_set = read_change_set(output_dir, generation) if generation else None
+        if change_set is None or len(chain) >= MAX_CHANGE_SET_CHAIN:
+            result["reload"] = True
+            return result
+        chain.append(change_set)
+        generation = change_set.get("previous")
+
+    result["states"] = merge_change_sets(list(reversed(chain)))
+    return result
+
+
+@lru_cache(maxsize=2)
+def read_generation_index(generation_dir: str) -> dict[str, dict]:
+    """Index entries by id; generation directories never change once published."""
+    with open(os.path.join(generation_dir, "songs.index.json"), "r", encoding="utf-8") as index_file:
+        return {entry["id"]: entry for entry in json.load(index_file)}
@@ -0,0 +1,167 @@
+"""Local git operations on the content repository, with two interchangeable backends.
+
+``CliGitPlumbing`` runs the git command line, as the sync code always has.
+``DulwichGitPlumbing`` does the same work inside the server process with
+dulwich, a pure-Python git implementation. A sync then no longer forks git
+for status, add, commit and history queries. Rebase, fetch and push always
+use the command line, whichever backend is selected.
+"""
+
+import os
+import re
+import subprocess
+
+try:
+    from dulwich import porcelain
+    from dulwich.graph import can_fast_forward
+    from dulwich.ignore import IgnoreFilterManager
+    from dulwich.objectspec import parse_commit
+    from dulwich.repo import Repo
+except ImportError:  # dulwich is only needed for CONTENT_REPO_GIT_BACKEND=dulwich.
+    porcelain = None
+
+SHA_RE = re.compile(r"[0-9a-f]{40}")
+
+
+def path_prefix(rel_path: str) -> str:
+    return "" if rel_path == "." else rel_path.replace(os.sep, "/").rstrip("/") + "/"
+
+
+def under(path: str, prefix: str) -> bool:
+    return (path + "/").startswith(prefix)
+
+
+class CliGitPlumbing:
+    name = "cli"
+
+    def __init__(self, repo_dir: str):
+        self.repo_dir = repo_dir
+
+    def git(self, *args: str, check: bool = True) -> subprocess.CompletedProcess:
+        return subprocess.run(["git", *args], cwd=self.repo_dir, check=check, capture_output=True, text=True)
+
+    def status(self, rel_path: str) -> tuple[bool, bool]:
+        """Return (changes staged under rel_path, tracked edits a commit would leave behind).
+
+        A commit takes the whole index, so only unstaged edits to tracked
+        files remain afterwards.
+        """
+        output = self.git("status", "--porcelain", "-z", "--no-renames", "--untracked-files=no").stdout
+        prefix = path_prefix(rel_path)
+        staged = pending_elsewhere = False
+        for entry in filter(None, output.split("\0")):
+            index_state, worktree_state, path = entry[0], entry[1], entry[3:]
+            if index_state != " " and under(path, prefix):
+                staged = True
+            if worktree_state != " ":
+                pending_elsewhere = True
+        return staged, pending_elsewhere
+
+    def add(self, rel_path: str):
+        self.git("add", "--", rel_path)
+
+    def commit(self, message: str, user_name: str, user_email: str):
+        self.git("-c", f"user.name={user_name}", "-c", f"user.email={user_email}", "commit", "-m", message)
+
+    def rev_parse(self, ref: str) -> str:
+        return self.git("rev-parse", ref).stdout.strip()
+
+    def is_ancestor(self, ancestor: str, descendant: str) -> bool:
+        result = self.git("merge-base", "--is-ancestor", ancestor, descendant, check=False)
+        if result.returncode not in (0, 1):
+            result.check_returncode()
+        return result.returncode == 0
+
+    def count_commits(self, base: str, head: str) -> int:
+        """Return how many commits ``head`` has that ``base`` does not."""
+        return int(self.git("rev-list", "--count", f"{base}..{head}").stdout.strip() or "0")
+
+
+class DulwichGitPlumbing:
+    name = "dulwich"
+
+    def __init__(self, repo_dir: str):
+        if porcelain is None:
+            raise RuntimeError("CONTENT_REPO_GIT_BACKEND=dulwich needs the dulwich package.")
+        self.repo_dir = repo_dir
+
+    def open(self) -> "Repo":
+        # Opening is cheap, and a fresh handle sees refs and packs written by
+        # the git command line in between.
+        return Repo(self.repo_dir)
+
+    def resolve(self, repo: "Repo", ref: str) -> bytes:
+        if SHA_RE.fullmatch(ref):
+            return ref.encode("ascii")
+        if ref == "FETCH_HEAD":
+            # dulwich does not read FETCH_HEAD; like git, use its first line.
+            with open(os.path.join(repo.controldir(), "FETCH_HEAD"), encoding="utf-8") as fetch_head:
+                return fetch_head.readline()[:40].encode("ascii")
+        return parse_commit(repo, ref.encode("utf-8")).id
+
+    def status(self, rel_path: str) -> tuple[bool, bool]:
+        prefix = path_prefix(rel_path)
+        with self.open() as repo:
+            result = porcelain.status(repo, untracked_files="no")
+        staged = any(
+            under(path.decode("utf-8"), prefix)
+            for paths in result.staged.values()
+            for path in paths
+        )
+        return staged, bool(result.unstaged)
+
+    def add(self, rel_path: str):
+        prefix = path_prefix(rel_path)
+        with self.open() as repo:
+            absolute = os.path.join(self.repo_dir, rel_path)
+            if not os.path.isdir(absolute):
+                paths = {rel_path.replace(os.sep, "/")}
+            else:
+                # Like `git add <dir>`: new and changed files on disk plus
+                # tracked files that were deleted.
+                ignore = IgnoreFilterManager.from_repo(repo)
+                paths = {
+                    path.decode("utf-8")
+                    for path in repo.open_index()
+                    if under(path.decode("utf-8"), prefix)
+                }
+                for directory, subdirectories, filenames in os.walk(absolute):
+                    subdirectories[:] = [name for name in subdirectories if name != ".git"]
+                    for filename in filenames:
+                        path = os.path.relpath(os.path.join(directory, filename), self.repo_dir).replace(os.sep, "/")
+                        if not ignore.is_ignored(path):
+                            paths.add(path)
+            repo.get_worktree().stage(sorted(paths))
+
+    def commit(self, message: str, user_name: str, user_email: str):
+        identity = f"{user_name} <{user_email}>".encode("utf-8")
+        with self.open() as repo:
+            porcelain.commit(repo, message=message.encode("utf-8"), author=identity, committer=identity)
+
+    def rev_parse(self, ref: str) -> str:
+        with self.open() as repo:
+            return self.resolve(repo, ref).decode("ascii")
+
+    def is_ancestor(self, ancestor: str, descendant: str) -> bool:
+        with self.open() as repo:
+            return can_fast_forward(repo, self.resolve(repo, ancestor), self.resolve(repo, descendant))
+
+    def count_commits(self, base: str, head: str) -> int:
+        with self.open() as repo:
+            walker = repo.get_walker(include=[self.resolve(repo, head)], exclude=[self.resolve(repo, base)])
+            return sum(1 for _entry in walker)
+
+
+GIT_PLUMBING_BACKENDS = {"cli": CliGitPlumbing, "dulwich": DulwichGitPlumbing}
+
+
+def plumbing_backend(name: str) -> type:
+    """Return the backend class for ``name``, falling back to the command line."""
+    backend = GIT_PLUMBING_BACKENDS.get(name)
+    if backend is None:
+        print(f"Unknown git backend {name!r}; using the git command line.")
+        return CliGitPlumbing
+    if backend is DulwichGitPlumbing and porcelain is None:
+        print("dulwich is not installed; using the git command line.")
+        return CliGitPlumbing
+    return backend
@@ -0,0 +1,235 @@
+"""Timeouts, retries and a circuit breaker for git fetch and push.
+
+A forge that stops answering used to hang the content sync worker, and the
+song mutation lock with it, until someone restarted the server. Every
+transport attempt now runs with a timeout. Failures that look like network
+trouble are retried with exponential backoff. Other failures, such as a
+rejected push or bad credentials, mean the remote answered; they are
+returned to the caller at once and do not count against the remote.
+
+After ``failure_threshold`` operations in a row have failed, the circuit
+opens. While it is open, calls fail immediately instead of waiting on the
+network. Once ``reset_after`` seconds pass, a single trial call is let
+through. If the trial succeeds the circuit closes; if it fails the circuit
+opens again.
+"""
+
+import asyncio
+import re
+import subprocess
+import threading
+import time
+
+TRANSIENT_GIT_ERROR_RE = re.compile(
+    r"could not resolve host|connection (?:timed out|refused|reset)|operation timed out|"
+    r"the remote end hung up unexpectedly|early eof|rpc failed|network is unreachable|"
+    r"temporary failure in name resolution|failed to connect|ssl_read|gnutls|"
+    r"the requested url returned error: (?:429|5\d\d)|http/2 stream \d+ was not closed cleanly",
+    re.IGNORECASE,
+)
+
+
+class GitTransportUnavailable(subprocess.CalledProcessError):
+    """Raised without running git while the circuit breaker is open."""
+
+
+def is_transient_git_failure(error: subprocess.CalledProcessError) -> bool:
+    if isinstance(error, GitTransportUnavailable):
+        return False
+    return bool(TRANSIENT_GIT_ERROR_RE.search(f"{error.stderr or ''}\n{error.stdout or ''}"))
+
+
+def timed_out_error(error: subprocess.TimeoutExpired) -> subprocess.CalledProcessError:
+    return subprocess.CalledProcessError(
+        -1,
+        error.cmd,
+        output="",
+        stderr=f"git {transport_operation(error.cmd)} timed out after {error.timeout:g}s",
+    )
+
+
+def transport_operation(command) -> str:
+    """Return the git subcommand ("fetch", "push", ...) of a transport command line."""
+    args = list(command)
+    position = 1 if args and args[0] == "git" else 0
+    while position < len(args):
+        if args[position] == "-c":
+            position += 2
+        elif args[position].startswith("-"):
+            position += 1
+        else:
+            return args[position]
+    return "git"
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_after: float = 60.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at: float | None = None
+        self.trial_in_flight = False
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and self.clock() - self.opened_at >= self.reset_after:
+                self.state = "half_open"
+            if self.state == "half_open" and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def retry_in(self) -> float:
+        with self.lock:
+            if self.opened_at is None:
+                return 0.0
+            return max(0.0, self.reset_after - (self.clock() - self.opened_at))
+
+    def record_success(self):
+        with self.lock:
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.consecutive_failures += 1
+            self.trial_in_flight = False
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = self.clock()
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_after": self.reset_after,
+                "rejected": self.rejected,
+            }
+
+
+class GitTransportPolicy:
+    def __init__(
+        self,
+        timeouts: dict[str, float],
+        *,
+        default_timeout: float = 60.0,
+        retries: int = 2,
+        backoff: float = 1.0,
+        max_backoff: float = 30.0,
+        breaker: CircuitBreaker | None = None,
+        describe_error=lambda error: (error.stderr or error.stdout or str(error)).strip(),
+    ):
+        self.timeouts = timeouts
+        self.default_timeout = default_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.describe_error = describe_error
+        self.lock = threading.Lock()
+        self.counters = {"attempts": 0, "retries": 0, "timeouts": 0, "failures": 0}
+        self.last_error: str | None = None
+
+    def timeout_for(self, operation: str) -> float:
+        return self.timeouts.get(operation, self.default_timeout)
+
+    def retry_delay(self, attempt: int) -> float:
+        return min(self.backoff * (2 ** attempt), self.max_backoff)
+
+    def _count(self, name: str):
+        with self.lock:
+            self.counters[name] += 1
+
+    def _admit(self, command: list[str]):
+        if not self.breaker.allow():
+            raise GitTransportUnavailable(
+                -1,
+                command,
+                output="",
+                stderr=(
+                    f"Content remote is unavailable after repeated failures; not trying again "
+                    f"for {self.breaker.retry_in():.0f}s. Commits were kept locally."
+                ),
+            )
+
+    def _failed(self, error: subprocess.CalledProcessError, attempt: int, transient: bool) -> bool:
+        """Record a failed attempt and return whether it should be retried."""
+        with self.lock:
+            self.last_error = self.describe_error(error)
+        if not transient:
+            # The remote answered; the problem is the request, not the connection.
+            self.breaker.record_success()
+            return False
+        if attempt < self.retries:
+            self._count("retries")
+            return True
+        self._count("failures")
+        self.breaker.record_failure()
+        return False
+
+    def _timed_out(self, error: subprocess.TimeoutExpired) -> subprocess.CalledProcessError:
+        self._count("timeouts")
+        return timed_out_error(error)
+
+    def run(self, command: list[str], attempt) -> subprocess.CompletedProcess:
+        """Run ``attempt(timeout)``, which must raise CalledProcessError on failure."""
+        self._admit(command)
+        operation = transport_operation(command)
+        for number in range(self.retries + 1):
+            self._count("attempts")
+            try:
+                result = attempt(self.timeout_for(operation))
+            except subprocess.TimeoutExpired as error:
+                failure, transient = self._timed_out(error), True
+            except subprocess.CalledProcessError as error:
+                failure, transient = error, is_transient_git_failure(error)
+            else:
+                self.breaker.record_success()
+                return result
+            if not self._failed(failure, number, transient):
+                raise failure
+            time.sleep(self.retry_delay(number))
+        raise AssertionError("unreachable")
+
+    async def run_async(self, command: list[str], attempt) -> subprocess.CompletedProcess:
+        """Async counterpart of ``run``; ``attempt(timeout)`` is a coroutine function."""
+        self._admit(command)
+        operation = transport_operation(command)
+        for number in range(self.retries + 1):
+            self._count("attempts")
+            try:
+                result = await attempt(self.timeout_for(operation))
+            except subprocess.TimeoutExpired as error:
+                failure, transient = self._timed_out(error), True
+            except subprocess.CalledProcessError as error:
+                failure, transient = error, is_transient_git_failure(error)
+            else:
+                self.breaker.record_success()
+                return result
+            if not self._failed(failure, number, transient):
+                raise failure
+            await asyncio.sleep(self.retry_delay(number))
+        raise AssertionError("unreachable")
+
+    def stats(self) -> dict:
+        with self.lock:
+            counters = dict(self.counters)
+            last_error = self.last_error
+        return {
+            "timeout_seconds": {**self.timeouts, "default": self.default_timeout},
+            "retries": self.retries,
+            "circuit": {**self.breaker.stats(), "retry_in": round(self.breaker.retry_in(), 3)},
+            "counters": counters,
+            "last_error": last_error,
+        }
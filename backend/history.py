@@ -0,0 +1,192 @@
+"""Per-song change history from the content repository's git log.
+
+The index reads ``git log --name-status`` once and then only the commits
+added since the last indexed HEAD, so answering "who changed this song and
+when" never walks the whole log. When HEAD was rewritten, as a rebase or a
+squash does to local commits, entries from the abandoned commits are
+dropped and indexing resumes from the merge base.
+"""
+
+import subprocess
+import threading
+
+LOG_FORMAT = "%x01%H%x00%an%x00%ae%x00%at%x00%s"
+
+
+def git(repo_dir: str, *args: str, check: bool = True) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", *args], cwd=repo_dir, check=check, capture_output=True, text=True)
+
+
+def parse_log(output: str, songs_path: str) -> list[dict]:
+    """Parse ``git log -z --name-status`` output into per-file changes, oldest first."""
+    prefix = f"{songs_path}/" if songs_path else ""
+    changes = []
+    for chunk in output.split("\x01")[1:]:
+        fields = chunk.split("\0")
+        commit, author, email, timestamp, subject = fields[:5]
+        rest = fields[5:]
+        position = 0
+        while position < len(rest):
+            status = rest[position].strip()
+            if not status:
+                position += 1
+                continue
+            if status[0] in "RC":
+                previous_path, path = rest[position + 1], rest[position + 2]
+                position += 3
+            else:
+                previous_path, path = None, rest[position + 1]
+                position += 2
+            filename = song_filename(path, prefix)
+            if filename is None:
+                continue
+            changes.append({
+                "commit": commit,
+                "author": author,
+                "email": email,
+                "timestamp": int(timestamp),
+                "subject": subject,
+                "status": status[0],
+                "filename": filename,
+                "previous_filename": song_filename(previous_path, prefix) if previous_path else None,
+            })
+    return changes
+
+
+def song_filename(path: str, prefix: str) -> str | None:
+    if not path.startswith(prefix):
+        return None
+    filename = path[len(prefix):]
+    if "/" in filename or not filename.endswith(".pro"):
+        return None
+    return filename
+
+
+class SongHistoryIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.head: str | None = None
+        self.commits: list[str] = []
+        self.entries: dict[str, list[dict]] = {}
+        # filename -> (sequence, commit) of each commit that renamed it away.
+        self.renamed_away: dict[str, list[tuple[int, str]]] = {}
+        # Increases with every indexed commit, even after a rewrite drops some.
+        self.sequence = 0
+
+    def __len__(self) -> int:
+        return len(self.commits)
+
+    @property
+    def built(self) -> bool:
+        return self.head is not None
+
+    def update(self, repo_dir: str, songs_path: str) -> int:
+        """Index commits added since the last update; return how many were read.
+
+        ``songs_path`` is the songs directory relative to the repository root.
+        """
+        with self.lock:
+            head = git(repo_dir, "rev-parse", "HEAD").stdout.strip()
+            if head == self.head:
+                return 0
+            since = self.head
+            if since is not None and git(repo_dir, "merge-base", "--is-ancestor", since, head, check=False).returncode:
+                since = self._forget_rewritten(repo_dir, since, head)
+
+            revisions = f"{since}..{head}" if since else head
+            output = git(
+                repo_dir,
+                "log",
+                "--reverse",
+                "-M",
+                "--name-status",
+                "-z",
+                f"--format={LOG_FORMAT}",
+                revisions,
+                "--",
+                songs_path or ".",
+            ).stdout
+            changes = parse_log(output, songs_path)
+            indexed = set()
+            for change in changes:
+                if change["commit"] not in indexed:
+                    indexed.add(change["commit"])
+                    self.commits.append(change["commit"])
+                    self.sequence += 1
+                self.entries.setdefault(change["filename"], []).append({**change, "sequence": self.sequence})
+                if change["status"] == "R" and change["previous_filename"]:
+                    self.renamed_away.setdefault(change["previous_filename"], []).append(
+                        (self.sequence, change["commit"])
+                    )
+            self.head = head
+            return len(indexed)
+
+    def _forget_rewritten(self, repo_dir: str, old_head: str, head: str) -> str | None:
+        """Drop entries from commits that are no longer in history; return where to resume."""
+        merge_base = git(repo_dir, "merge-base", old_head, head, check=False).stdout.strip()
+        abandoned = git(repo_dir, "rev-list", f"{merge_base}..{old_head}", check=False) if merge_base else None
+        if abandoned is None or abandoned.returncode:
+            self.commits = []
+            self.entries = {}
+            self.renamed_away = {}
+            return None
+        dropped = set(abandoned.stdout.split())
+        self.commits = [commit for commit in self.commits if commit not in dropped]
+        for filename in list(self.entries):
+            kept = [entry for entry in self.entries[filename] if entry["commit"] not in dropped]
+            if kept:
+                self.entries[filename] = kept
+            else:
+                del self.entries[filename]
+        for filename in list(self.renamed_away):
+            kept = [rename for rename in self.renamed_away[filename] if rename[1] not in dropped]
+            if kept:
+                self.renamed_away[filename] = kept
+            else:
+                del self.renamed_away[filename]
+        return merge_base
+
+    def _lifetime(self, filename: str, before: int | None) -> list[dict]:
+        """Return the changes to one file under ``filename``, newest first.
+
+        A name that was renamed away and later reused belongs to a different
+        song, so only changes after the last rename away (and before
+        ``before``, when following a rename back) are returned.
+        """
+        after = max(
+            (sequence for sequence, _commit in self.renamed_away.get(filename, []) if before is None or sequence < before),
+            default=0,
+        )
+        return [
+            entry
+            for entry in reversed(self.entries.get(filename, []))
+            if entry["sequence"] >= after and (before is None or entry["sequence"] < before)
+        ]
+
+    def history(self, filename: str, limit: int = 50, offset: int = 0) -> dict | None:
+        """Return changes to ``filename``, newest first, following renames.
+
+        Returns None when the file never appeared in the indexed history.
+        """
+        with self.lock:
+            if filename not in self.entries:
+                return None
+            changes = []
+            seen = set()
+            current, before = filename, None
+            while current is not None and current not in seen:
+                seen.add(current)
+                entries = self._lifetime(current, before)
+                changes.extend(entries)
+                rename = next((entry for entry in entries if entry["status"] == "R"), None)
+                if rename is None:
+                    break
+                current, before = rename["previous_filename"], rename["sequence"]
+        return {
+            "filename": filename,
+            "total": len(changes),
+            "history": [
+                {name: value for name, value in change.items() if name != "sequence"}
+                for change in changes[offset:offset + limit]
+            ],
+        }
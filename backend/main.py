@@ -1,34 +1,79 @@
-from fastapi import Depends, FastAPI, Header, HTTPException, WebSocket, WebSocketDisconnect, status
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from fastapi import Request as HttpRequest
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
+from typing import Literal
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager, contextmanager
 import asyncio
 import hashlib
+import hmac
 import json
 import os
 import queue
 import subprocess
 import re
+import shutil
+import tarfile
 import tempfile
 import threading
 import time
 import uuid
+import zipfile
+import zlib
 from urllib.parse import quote
 from urllib.request import Request, urlopen
 
+from backend.archive import ArchiveEntry, archive_length, iter_archive_bytes, tar_segments, zip_segments
+from backend.chord_index import MAX_MISSING_CHORDS, SongChordIndex
+from backend.chordpro import CHORDPRO_META_RE, parse_chordpro, slugify
+from backend.chords import key_root, render_transposed_song
+from backend.drafts import DraftStore, DraftTooLarge
+from backend.duplicates import DEFAULT_MIN_SIMILARITY, SongDuplicateIndex
+from backend.events import CatalogueEventHub
+from backend.facets import SongFacetIndex
+from backend.generations import changes_since, generation_name, generations_dir, read_generation_index
+from backend.git_plumbing import plumbing_backend
+from backend.git_transport import CircuitBreaker, GitTransportPolicy
+from backend.history import SongHistoryIndex
+from backend.patches import PatchConflict, apply_changes, diff_lines, join_lines, merge_changes, split_lines
+from backend.push_scheduler import PushScheduler, squash_runs
+from backend.remote_poller import RemotePoller
+from backend.repo_maintenance import RepoMaintenance
+from backend.render_cache import RenderCache
+from backend.search import SongSearchIndex
+from backend.similarity import SongSimilarityIndex
 from backend.utils import sanitize_filename
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     ensure_sync_worker_started()
+    remove_stale_song_temporaries()
+    remove_stale_export_snapshots()
     if os.path.exists(SONGS_DIR) and not os.path.exists(DIST_INDEX_PATH):
-        rebuild_songs()
+        await rebuild_songs_async()
     recover_pending_content_repo_backup()
+    if content_remote_poller is not None and CONTENT_REPO_DIR:
+        content_remote_poller.start()
+    if content_push_scheduler is not None:
+        content_push_scheduler.start()
+    if CONTENT_REPO_MAINTENANCE:
+        content_repo_maintenance.start()
+    # Large catalogues take seconds to index; serve requests while that runs.
+    threading.Thread(target=warm_song_indexes, name="song-index-warmup", daemon=True).start()
+    catalogue_event_task = asyncio.create_task(catalogue_events.run(lambda: SONGS_OUTPUT_DIR))
     yield
+    catalogue_event_task.cancel()
+    content_repo_maintenance.stop()
+    if content_remote_poller is not None:
+        content_remote_poller.stop()
+    if content_push_scheduler is not None:
+        # Push what the last edits committed locally before the process exits.
+        await asyncio.to_thread(content_push_scheduler.stop)
 
 
 app = FastAPI(lifespan=lifespan)
@@ -68,6 +113,10 @@ class SelectiveGZipMiddleware:
 
 
 def should_gzip_path(path: str) -> bool:
+    # Exports are already packed and must keep exact byte offsets for Range requests.
+    # The event stream must reach the browser frame by frame, not in gzip blocks.
+    if path in ("/api/export", "/api/events"):
+        return False
     return path.startswith("/api/") or path.endswith((".css", ".html", ".js", ".json", ".svg"))
 
 
@@ -76,7 +125,8 @@ app.add_middleware(SelectiveGZipMiddleware, minimum_size=1024)
 
 def cache_control_for_static_path(path: str) -> str:
     normalized_path = path.replace("\\", "/").lstrip("/")
-    if normalized_path.startswith("assets/"):
+    # Lyric search shards are named after their content hash.
+    if normalized_path.startswith(("assets/", "data/search/")):
         return "public, max-age=31536000, immutable"
     if normalized_path.startswith("data/") and normalized_path.endswith(".json"):
         return "public, max-age=0, must-revalidate"
@@ -314,6 +364,26 @@ CONTENT_REPO_DIR = resolve_content_repo_dir()
 
 DEFAULT_GIT_USER_NAME = "Holy Songs Bot"
 DEFAULT_GIT_USER_EMAIL = "holy-songs-bot@local"
+CONTENT_WEBHOOK_SECRET = os.environ.get("CONTENT_WEBHOOK_SECRET", "").strip()
+CONTENT_WEBHOOK_MAX_BYTES = 5 * 1024 * 1024
+# Seconds between background fetches of the content remote; 0 turns them off.
+CONTENT_REPO_PREFETCH_INTERVAL = float(os.environ.get("CONTENT_REPO_PREFETCH_INTERVAL", "0"))
+CONTENT_REPO_PREFETCH_REF = "refs/holy-songs/prefetch"
+GIT_REVISION_RE = re.compile(r"[0-9a-f]{7,40}")
+# Seconds between pushes of local editor commits; 0 pushes after every save.
+CONTENT_REPO_PUSH_INTERVAL = float(os.environ.get("CONTENT_REPO_PUSH_INTERVAL", "0"))
+CONTENT_REPO_SQUASH_COMMITS = os.environ.get("CONTENT_REPO_SQUASH_COMMITS", "false").strip().lower() in {
+    "1",
+    "true",
+    "yes",
+}
+CONTENT_REPO_MAINTENANCE = os.environ.get("CONTENT_REPO_MAINTENANCE", "true").strip().lower() not in {
+    "0",
+    "false",
+    "no",
+}
+# "cli" or "dulwich"; the latter keeps status, add and commit in-process.
+content_git_plumbing = plumbing_backend(os.environ.get("CONTENT_REPO_GIT_BACKEND", "cli").strip().lower())
 
 
 def content_repo_token() -> str:
@@ -397,8 +467,27 @@ def git_auth_environment():
             pass
 
 
+content_git_transport = GitTransportPolicy(
+    {
+        "fetch": float(os.environ.get("CONTENT_REPO_FETCH_TIMEOUT", "60")),
+        "push": float(os.environ.get("CONTENT_REPO_PUSH_TIMEOUT", "120")),
+    },
+    retries=int(os.environ.get("CONTENT_REPO_TRANSPORT_RETRIES", "2")),
+    backoff=float(os.environ.get("CONTENT_REPO_TRANSPORT_BACKOFF", "1")),
+    breaker=CircuitBreaker(
+        failure_threshold=int(os.environ.get("CONTENT_REPO_CIRCUIT_FAILURES", "5")),
+        reset_after=float(os.environ.get("CONTENT_REPO_CIRCUIT_RESET_SECONDS", "60")),
+    ),
+    describe_error=git_error_detail,
+)
+
+
 def run_git_transport(args: list[str], **kwargs) -> subprocess.CompletedProcess:
-    """Run a fetch/push with non-interactive, argv-safe token authentication."""
+    """Run a fetch/push with non-interactive, argv-safe token authentication.
+
+    Attempts are bounded by content_git_transport: each has a timeout,
+    network failures are retried, and an open circuit fails the call at once.
+    """
     with git_auth_environment() as auth_env:
         command = ["git", *args]
         if auth_env is not None:
@@ -406,12 +495,89 @@ def run_git_transport(args: list[str], **kwargs) -> subprocess.CompletedProcess:
             # Do not let a machine-level helper silently substitute a different
             # credential; the empty helper falls through to our askpass program.
             command = ["git", "-c", "credential.helper=", *args]
-        return subprocess.run(command, **kwargs)
+        return content_git_transport.run(
+            command,
+            lambda timeout: subprocess.run(command, timeout=timeout, **kwargs),
+        )
+
+
+async def run_subprocess_async(
+    args: list[str],
+    *,
+    cwd: str | None = None,
+    env: dict | None = None,
+    check: bool = True,
+    timeout: float | None = None,
+) -> subprocess.CompletedProcess:
+    """Run a command on the event loop and capture text output like subprocess.run."""
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        cwd=cwd,
+        env=env,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise subprocess.TimeoutExpired(args, timeout) from None
+    result = subprocess.CompletedProcess(
+        args,
+        process.returncode,
+        stdout.decode("utf-8", errors="replace"),
+        stderr.decode("utf-8", errors="replace"),
+    )
+    if check:
+        result.check_returncode()
+    return result
+
+
+async def run_git_transport_async(args: list[str], *, cwd: str, check: bool = True) -> subprocess.CompletedProcess:
+    """Async counterpart of run_git_transport with the same askpass handling."""
+    with git_auth_environment() as auth_env:
+        command = ["git", *args]
+        if auth_env is not None:
+            command = ["git", "-c", "credential.helper=", *args]
+        return await content_git_transport.run_async(
+            command,
+            lambda timeout: run_subprocess_async(command, cwd=cwd, env=auth_env, check=check, timeout=timeout),
+        )
+
+content_repo_metadata: dict[tuple, str] = {}
+content_repo_metadata_lock = threading.Lock()
+
+
+def cached_content_repo_fact(key: tuple, compute) -> str:
+    """Return a repository fact, computing it once per content repo and key.
+
+    Branch, remote URL and safe.directory status do not change while the
+    server runs, so sync jobs should not spawn git to ask again. Call
+    forget_content_repo_metadata() after anything that may have changed them.
+    """
+    key = (CONTENT_REPO_DIR, *key)
+    with content_repo_metadata_lock:
+        if key in content_repo_metadata:
+            return content_repo_metadata[key]
+    value = compute()
+    with content_repo_metadata_lock:
+        content_repo_metadata[key] = value
+    return value
+
+
+def forget_content_repo_metadata():
+    with content_repo_metadata_lock:
+        content_repo_metadata.clear()
+
 
 def ensure_content_repo_safe_directory():
     if not CONTENT_REPO_DIR:
         return
+    cached_content_repo_fact(("safe.directory",), _ensure_content_repo_safe_directory)
 
+
+def _ensure_content_repo_safe_directory() -> str:
     safe_directories = subprocess.run(
         ["git", "config", "--global", "--get-all", "safe.directory"],
         check=False,
@@ -419,7 +585,7 @@ def ensure_content_repo_safe_directory():
         text=True,
     ).stdout.splitlines()
     if CONTENT_REPO_DIR in safe_directories:
-        return
+        return CONTENT_REPO_DIR
 
     subprocess.run(
         ["git", "config", "--global", "--add", "safe.directory", CONTENT_REPO_DIR],
@@ -427,34 +593,67 @@ def ensure_content_repo_safe_directory():
         capture_output=True,
         text=True,
     )
+    return CONTENT_REPO_DIR
+
+def song_builder_environment() -> dict:
+    env = os.environ.copy()
+    # The song builder never needs repository credentials.
+    env.pop("CONTENT_REPO_TOKEN", None)
+    env.pop("GITHUB_TOKEN", None)
+    env["SONGS_OUTPUT_DIR"] = SONGS_OUTPUT_DIR
+    env["SONGS_DIR"] = SONGS_DIR
+    env["SONGS_BUILD_DURABILITY"] = song_write_durability()
+    return env
+
+
+def failed_build_result(error: subprocess.CalledProcessError) -> dict:
+    stderr = (error.stderr or "").strip()
+    stdout = (error.stdout or "").strip()
+    message = redact_secrets(f"Error during build: {stderr or stdout or error}")
+    print(message)
+    return {"ok": False, "message": message}
+
 
 def rebuild_songs() -> dict:
     """Build generated song data without deploying."""
     try:
-        env = os.environ.copy()
-        # The song builder never needs repository credentials.
-        env.pop("CONTENT_REPO_TOKEN", None)
-        env.pop("GITHUB_TOKEN", None)
-        env["SONGS_OUTPUT_DIR"] = SONGS_OUTPUT_DIR
-        env["SONGS_DIR"] = SONGS_DIR
-        
         subprocess.run(
             ["npm", "run", "build:songs"],
             cwd=BASE_DIR,
             check=True,
-            env=env,
+            env=song_builder_environment(),
             capture_output=True,
             text=True,
         )
         message = "Build script executed successfully."
         print(message)
+        catalogue_events.nudge()
         return {"ok": True, "message": message}
     except subprocess.CalledProcessError as e:
-        stderr = (e.stderr or "").strip()
-        stdout = (e.stdout or "").strip()
-        message = redact_secrets(f"Error during build: {stderr or stdout or e}")
+        return failed_build_result(e)
+
+
+async def rebuild_songs_async(changed_files: dict | None = None) -> dict:
+    """Build generated song data without holding a threadpool worker.
+
+    ``changed_files`` ({"files": [...], "previousIds": [...]}) asks the builder
+    to re-parse only those .pro files and keep every other published song.
+    """
+    env = song_builder_environment()
+    if changed_files is not None:
+        env["SONGS_BUILD_CHANGED"] = json.dumps(changed_files)
+    try:
+        await run_subprocess_async(
+            ["npm", "run", "build:songs"],
+            cwd=BASE_DIR,
+            env=env,
+        )
+        message = "Build script executed successfully."
         print(message)
-        return {"ok": False, "message": message}
+        catalogue_events.nudge()
+        return {"ok": True, "message": message}
+    except subprocess.CalledProcessError as e:
+        return failed_build_result(e)
 
 def build_push_target(remote_name: str) -> str:
     token = content_repo_token()
@@ -463,13 +662,16 @@ def build_push_target(remote_name: str) -> str:
     if explicit_remote_url:
         remote_url = explicit_remote_url
     elif token:
-        remote_url = subprocess.run(
-            ["git", "remote", "get-url", remote_name],
-            cwd=CONTENT_REPO_DIR,
-            check=True,
-            capture_output=True,
-            text=True,
-        ).stdout.strip()
+        remote_url = cached_content_repo_fact(
+            ("remote-url", remote_name),
+            lambda: subprocess.run(
+                ["git", "remote", "get-url", remote_name],
+                cwd=CONTENT_REPO_DIR,
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout.strip(),
+        )
     else:
         return remote_name
 
@@ -482,28 +684,57 @@ def build_push_target(remote_name: str) -> str:
         return f"https://github.com/{remote_path}"
     return remote_url
 
+def content_repo_branch() -> str:
+    branch = os.environ.get("CONTENT_REPO_PUSH_BRANCH")
+    if branch:
+        return branch
+    # symbolic-ref fails on a detached HEAD (e.g. mid-rebase) instead of
+    # answering "HEAD", so that answer is never cached as the branch.
+    return cached_content_repo_fact(
+        ("branch",),
+        lambda: subprocess.run(
+            ["git", "symbolic-ref", "--short", "HEAD"],
+            cwd=CONTENT_REPO_DIR,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip(),
+    )
+
 def get_git_identity() -> tuple[str, str]:
     user_name = os.environ.get("CONTENT_REPO_GIT_USER_NAME", DEFAULT_GIT_USER_NAME)
     user_email = os.environ.get("CONTENT_REPO_GIT_USER_EMAIL", DEFAULT_GIT_USER_EMAIL)
     return user_name, user_email
 
-def rebase_content_repo(remote_name: str, branch: str, user_name: str, user_email: str) -> bool:
-    push_target = build_push_target(remote_name)
-    before = subprocess.run(
-        ["git", "rev-parse", "HEAD"],
-        cwd=CONTENT_REPO_DIR,
-        check=True,
-        capture_output=True,
-        text=True,
-    ).stdout.strip()
-
+def fetch_content_remote(remote_name: str, branch: str):
     run_git_transport(
-        ["fetch", push_target, branch],
+        ["fetch", build_push_target(remote_name), branch],
         cwd=CONTENT_REPO_DIR,
         check=True,
         capture_output=True,
         text=True,
     )
+
+
+def rebase_content_repo(
+    remote_name: str,
+    branch: str,
+    user_name: str,
+    user_email: str,
+    onto: str | None = None,
+) -> bool:
+    """Rebase local commits onto the remote branch and return whether HEAD moved.
+
+    Without ``onto`` the branch is fetched first and the rebase goes onto
+    FETCH_HEAD; with it, the rebase goes onto that commit without a fetch.
+    """
+    if onto is None:
+        fetch_content_remote(remote_name, branch)
+        onto = "FETCH_HEAD"
+    # If the remote commit is already in HEAD the rebase would not move it;
+    # otherwise it always does, so HEAD never has to be compared.
+    if content_git().is_ancestor(onto, "HEAD"):
+        return False
     try:
         subprocess.run(
             [
@@ -513,7 +744,7 @@ def rebase_content_repo(remote_name: str, branch: str, user_name: str, user_emai
                 "-c",
                 f"user.email={user_email}",
                 "rebase",
-                "FETCH_HEAD",
+                onto,
             ],
             cwd=CONTENT_REPO_DIR,
             check=True,
@@ -531,38 +762,60 @@ def rebase_content_repo(remote_name: str, branch: str, user_name: str, user_emai
             text=True,
         )
         raise
+    return True
 
-    after = subprocess.run(
-        ["git", "rev-parse", "HEAD"],
-        cwd=CONTENT_REPO_DIR,
-        check=True,
-        capture_output=True,
-        text=True,
-    ).stdout.strip()
-    return before != after
-
-def content_repo_has_uncommitted_tracked_changes() -> bool:
-    status = subprocess.run(
-        ["git", "status", "--porcelain", "--untracked-files=no"],
-        cwd=CONTENT_REPO_DIR,
-        check=True,
-        capture_output=True,
-        text=True,
-    ).stdout.strip()
-    return bool(status)
 
-def content_repo_has_unpushed_commits() -> bool:
-    count = subprocess.run(
-        ["git", "rev-list", "--count", "FETCH_HEAD..HEAD"],
-        cwd=CONTENT_REPO_DIR,
-        check=True,
-        capture_output=True,
-        text=True,
-    ).stdout.strip()
-    return int(count or "0") > 0
+async def rebase_content_repo_async(
+    remote_name: str,
+    branch: str,
+    user_name: str,
+    user_email: str,
+) -> str | None:
+    """Async counterpart of rebase_content_repo used by request handlers.
+
+    Returns the commit HEAD pointed at before the rebase, or None when the
+    fetched commit was already in HEAD and nothing was rebased.
+    """
+    push_target = await asyncio.to_thread(build_push_target, remote_name)
+    await run_git_transport_async(["fetch", push_target, branch], cwd=CONTENT_REPO_DIR)
+    if await asyncio.to_thread(content_git().is_ancestor, "FETCH_HEAD", "HEAD"):
+        return None
 
-def push_content_repo_if_needed(remote_name: str, branch: str) -> bool:
-    if not content_repo_has_unpushed_commits():
+    before = (await run_subprocess_async(["git", "rev-parse", "HEAD"], cwd=CONTENT_REPO_DIR)).stdout.strip()
+    try:
+        await run_subprocess_async(
+            [
+                "git",
+                "-c",
+                f"user.name={user_name}",
+                "-c",
+                f"user.email={user_email}",
+                "rebase",
+                "FETCH_HEAD",
+            ],
+            cwd=CONTENT_REPO_DIR,
+        )
+    except subprocess.CalledProcessError:
+        await run_subprocess_async(["git", "rebase", "--abort"], cwd=CONTENT_REPO_DIR, check=False)
+        raise
+    return before
+
+def content_git():
+    """Return the local git operations for the content repo (see backend.git_plumbing)."""
+    return content_git_plumbing(CONTENT_REPO_DIR)
+
+def content_repo_has_unpushed_commits(base: str = "FETCH_HEAD") -> bool:
+    return content_git().count_commits(base, "HEAD") > 0
+
+def push_content_repo_if_needed(
+    remote_name: str,
+    branch: str,
+    base: str = "FETCH_HEAD",
+    has_unpushed_commits: bool | None = None,
+) -> bool:
+    if has_unpushed_commits is None:
+        has_unpushed_commits = content_repo_has_unpushed_commits(base)
+    if not has_unpushed_commits:
         return False
 
     push_target = build_push_target(remote_name)
@@ -575,6 +828,52 @@ def push_content_repo_if_needed(remote_name: str, branch: str) -> bool:
     )
     return True
 
+def prefetch_content_remote() -> str:
+    """Fetch the content branch into a private ref and return the commit it points to.
+
+    The fetch leaves FETCH_HEAD alone, which sync jobs running at the same
+    time rely on.
+    """
+    ensure_content_repo_safe_directory()
+    remote_name = os.environ.get("CONTENT_REPO_PUSH_REMOTE", "origin")
+    try:
+        branch = content_repo_branch()
+        run_git_transport(
+            [
+                "fetch",
+                "--quiet",
+                "--no-write-fetch-head",
+                build_push_target(remote_name),
+                f"+refs/heads/{branch}:{CONTENT_REPO_PREFETCH_REF}",
+            ],
+            cwd=CONTENT_REPO_DIR,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        return subprocess.run(
+            ["git", "rev-parse", CONTENT_REPO_PREFETCH_REF],
+            cwd=CONTENT_REPO_DIR,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except subprocess.CalledProcessError as error:
+        raise RuntimeError(f"Content remote prefetch failed: {git_error_detail(error)}") from None
+
+
+content_remote_poller = (
+    RemotePoller(prefetch_content_remote, CONTENT_REPO_PREFETCH_INTERVAL)
+    if CONTENT_REPO_PREFETCH_INTERVAL > 0
+    else None
+)
+
+content_push_scheduler = (
+    PushScheduler(lambda: push_scheduled_content_commits(), CONTENT_REPO_PUSH_INTERVAL)
+    if CONTENT_REPO_PUSH_INTERVAL > 0
+    else None
+)
+
 def recover_pending_content_repo_backup() -> dict | None:
     if not CONTENT_REPO_DIR or not os.path.isdir(os.path.join(CONTENT_REPO_DIR, ".git")):
         return None
@@ -596,6 +895,148 @@ def failed_combined_rebuild_result(changed_path: str, build_result: dict) -> dic
     return {"ok": False, "pushed": False, "message": message}
 
 
+def rebuild_rebase_and_push_content_repo(
+    changed_path: str,
+    remote_name: str,
+    branch: str,
+    user_name: str,
+    user_email: str,
+    squash: bool = False,
+) -> dict:
+    """Rebase local commits onto the remote, validate the combined catalogue and push it.
+
+    With ``squash``, runs of local commits with the same subject are merged
+    into one before the push.
+    """
+    prefetched = content_remote_poller.fresh_commit() if content_remote_poller is not None else None
+    remote_changed = rebase_content_repo(remote_name, branch, user_name, user_email, onto=prefetched)
+    base = prefetched or "FETCH_HEAD"
+    has_unpushed_commits = content_repo_has_unpushed_commits(base)
+    squashed = squash_unpushed_content_commits(base, user_name, user_email) if squash and has_unpushed_commits else 0
+    if remote_changed or has_unpushed_commits:
+        build_result = rebuild_songs()
+        if not build_result.get("ok"):
+            return failed_combined_rebuild_result(changed_path, build_result)
+
+    if prefetched is not None and has_unpushed_commits:
+        # The prefetched branch may be a poll interval old. Its objects are
+        # already local, so this fetch is quick; if the branch moved, rebase
+        # again and validate that catalogue instead before pushing.
+        fetch_content_remote(remote_name, branch)
+        base = "FETCH_HEAD"
+        if rebase_content_repo(remote_name, branch, user_name, user_email, onto="FETCH_HEAD"):
+            remote_changed = True
+            build_result = rebuild_songs()
+            if not build_result.get("ok"):
+                return failed_combined_rebuild_result(changed_path, build_result)
+        # Local commits on top of the remote branch are still unpushed.
+
+    # The push is intentionally after the build. Two independently valid
+    # branches can form an invalid catalogue (for example, duplicate IDs).
+    pushed = push_content_repo_if_needed(remote_name, branch, base, has_unpushed_commits)
+    return {"ok": True, "remote_changed": remote_changed, "pushed": pushed, "squashed": squashed}
+
+
+def squash_unpushed_content_commits(base: str, user_name: str, user_email: str) -> int:
+    """Merge consecutive local commits with the same subject; return how many disappeared.
+
+    The final tree is unchanged, so only the branch ref moves and the index
+    and working tree stay as they are.
+    """
+    log = subprocess.run(
+        ["git", "log", "--reverse", "--format=%H%x00%P%x00%T%x00%an%x00%ae%x00%ad%x00%s", "--date=raw", f"{base}..HEAD"],
+        cwd=CONTENT_REPO_DIR,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    commits = [line.split("\0") for line in log.splitlines() if line]
+    if len(commits) < 2 or any(len(commit[1].split()) != 1 for commit in commits):
+        return 0
+    runs = squash_runs([commit[6] for commit in commits])
+    if len(runs) == len(commits):
+        return 0
+
+    parent = commits[0][1]
+    for start, end in runs:
+        first, last = commits[start], commits[end - 1]
+        env = os.environ.copy()
+        env.update({
+            "GIT_AUTHOR_NAME": first[3],
+            "GIT_AUTHOR_EMAIL": first[4],
+            "GIT_AUTHOR_DATE": last[5],
+            "GIT_COMMITTER_NAME": user_name,
+            "GIT_COMMITTER_EMAIL": user_email,
+        })
+        parent = subprocess.run(
+            ["git", "commit-tree", last[2], "-p", parent, "-m", last[6]],
+            cwd=CONTENT_REPO_DIR,
+            check=True,
+            capture_output=True,
+            text=True,
+            env=env,
+        ).stdout.strip()
+    subprocess.run(
+        ["git", "update-ref", "-m", "Squash editor commits", "HEAD", parent, commits[-1][0]],
+        cwd=CONTENT_REPO_DIR,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    squashed = len(commits) - len(runs)
+    if content_push_scheduler is not None:
+        content_push_scheduler.record_squashed(squashed)
+    return squashed
+
+
+def scheduled_push_result(rel_path: str, prefix: str) -> dict:
+    wait = content_push_scheduler.seconds_until_push() or 0
+    message = f"{prefix} for {rel_path}; the content repo push is scheduled in {wait:.0f}s."
+    print(message)
+    return {"ok": True, "pushed": False, "message": message}
+
+
+def push_scheduled_content_commits() -> dict:
+    """Rebase, validate and push every commit the push scheduler has collected."""
+    if not CONTENT_REPO_DIR or not os.path.isdir(os.path.join(CONTENT_REPO_DIR, ".git")):
+        message = "Skipping content repo push: CONTENT_REPO_DIR is not a git repository."
+        print(message)
+        return {"ok": False, "pushed": False, "message": message}
+
+    with song_mutation_lock:
+        try:
+            ensure_content_repo_safe_directory()
+            remote_name = os.environ.get("CONTENT_REPO_PUSH_REMOTE", "origin")
+            branch = content_repo_branch()
+            user_name, user_email = get_git_identity()
+            result = rebuild_rebase_and_push_content_repo(
+                SONGS_DIR,
+                remote_name,
+                branch,
+                user_name,
+                user_email,
+                squash=CONTENT_REPO_SQUASH_COMMITS,
+            )
+        except subprocess.CalledProcessError as error:
+            forget_content_repo_metadata()
+            message = redact_secrets(f"Scheduled content repo push failed: {git_error_detail(error)}")
+            print(message)
+            return {"ok": False, "pushed": False, "message": message}
+        # A squash or rebase rewrites the commits the history index has seen.
+        refresh_song_history()
+        if not result["ok"]:
+            return result
+        if result["remote_changed"]:
+            refresh_song_indexes()
+    message = (
+        f"Scheduled content repo push done; {result['squashed']} commit(s) squashed."
+        if result["pushed"]
+        else "Scheduled content repo push found nothing to push."
+    )
+    print(message)
+    return {**result, "message": message}
+
+
 def sync_content_repo(changed_path: str, action: str) -> dict:
     if not CONTENT_REPO_DIR or not os.path.isdir(os.path.join(CONTENT_REPO_DIR, ".git")):
         message = "Skipping content repo sync: CONTENT_REPO_DIR is not a git repository."
@@ -618,37 +1059,20 @@ def sync_content_repo(changed_path: str, action: str) -> dict:
             return {"ok": False, "pushed": False, "message": message}
 
         remote_name = os.environ.get("CONTENT_REPO_PUSH_REMOTE", "origin")
-        branch = os.environ.get("CONTENT_REPO_PUSH_BRANCH")
-        if not branch:
-            branch = subprocess.run(
-                ["git", "rev-parse", "--abbrev-ref", "HEAD"],
-                cwd=CONTENT_REPO_DIR,
-                check=True,
-                capture_output=True,
-                text=True,
-            ).stdout.strip()
+        branch = content_repo_branch()
 
         user_name, user_email = get_git_identity()
-        subprocess.run(["git", "add", "--", rel_path], cwd=CONTENT_REPO_DIR, check=True)
+        content_git().add(rel_path)
 
-        staged = subprocess.run(
-            ["git", "diff", "--cached", "--name-only", "--", rel_path],
-            cwd=CONTENT_REPO_DIR,
-            check=True,
-            capture_output=True,
-            text=True,
-        ).stdout.strip()
+        staged, pending_elsewhere = content_git().status(rel_path)
+        if not staged and content_push_scheduler is not None:
+            content_push_scheduler.request()
+            return scheduled_push_result(rel_path, "No new changes")
         if not staged:
-            remote_changed = rebase_content_repo(remote_name, branch, user_name, user_email)
-            has_unpushed_commits = content_repo_has_unpushed_commits()
-            if remote_changed or has_unpushed_commits:
-                build_result = rebuild_songs()
-                if not build_result.get("ok"):
-                    return failed_combined_rebuild_result(changed_path, build_result)
-
-            # The push is intentionally after the build. Two independently valid
-            # branches can form an invalid catalogue (for example, duplicate IDs).
-            pushed = push_content_repo_if_needed(remote_name, branch)
+            result = rebuild_rebase_and_push_content_repo(changed_path, remote_name, branch, user_name, user_email)
+            if not result["ok"]:
+                return result
+            remote_changed, pushed = result["remote_changed"], result["pushed"]
             if remote_changed:
                 if pushed:
                     message = f"Content repo refreshed from GitHub and pending commits were synced for {rel_path}."
@@ -666,24 +1090,9 @@ def sync_content_repo(changed_path: str, action: str) -> dict:
             return {"ok": True, "pushed": False, "message": message}
 
         commit_message = f"{action}: {os.path.basename(rel_path)} via Holy Songs editor"
-        subprocess.run(
-            [
-                "git",
-                "-c",
-                f"user.name={user_name}",
-                "-c",
-                f"user.email={user_email}",
-                "commit",
-                "-m",
-                commit_message,
-            ],
-            cwd=CONTENT_REPO_DIR,
-            check=True,
-            capture_output=True,
-            text=True,
-        )
+        content_git().commit(commit_message, user_name, user_email)
 
-        if content_repo_has_uncommitted_tracked_changes():
+        if pending_elsewhere:
             message = (
                 f"Content repo sync paused for {rel_path}: another tracked edit is still "
                 "waiting to be committed. The local commit was kept and nothing was pushed."
@@ -691,19 +1100,21 @@ def sync_content_repo(changed_path: str, action: str) -> dict:
             print(message)
             return {"ok": False, "pushed": False, "message": message}
 
-        remote_changed = rebase_content_repo(remote_name, branch, user_name, user_email)
-        has_unpushed_commits = content_repo_has_unpushed_commits()
-        if remote_changed or has_unpushed_commits:
-            build_result = rebuild_songs()
-            if not build_result.get("ok"):
-                return failed_combined_rebuild_result(changed_path, build_result)
+        if content_push_scheduler is not None:
+            content_push_scheduler.request()
+            return scheduled_push_result(rel_path, "Committed locally")
 
         # Validation of the combined local/remote HEAD is the gate for every push.
-        pushed = push_content_repo_if_needed(remote_name, branch)
+        result = rebuild_rebase_and_push_content_repo(changed_path, remote_name, branch, user_name, user_email)
+        if not result["ok"]:
+            return result
+        pushed = result["pushed"]
         message = f"Content repo synced successfully for {rel_path}."
         print(message)
         return {"ok": True, "pushed": pushed, "message": message}
     except subprocess.CalledProcessError as error:
+        # The failure may come from a renamed branch or a changed remote.
+        forget_content_repo_metadata()
         message = redact_secrets(
             f"Content repo sync failed for {changed_path}: {git_error_detail(error)}"
         )
@@ -717,7 +1128,83 @@ sync_jobs: dict[str, dict] = {}
 sync_jobs_lock = threading.Lock()
 sync_worker_started = False
 sync_worker_lock = threading.Lock()
-song_mutation_lock = threading.RLock()
+
+
+class SongMutationLock:
+    """Serialize catalogue mutations across worker threads and async handlers.
+
+    Threads use ``with``. Coroutines use ``async with`` and queue on an asyncio
+    lock, so a burst of waiting saves occupies no threadpool workers; only the
+    head of that queue polls the underlying thread lock.
+    """
+
+    POLL_INTERVAL = 0.005
+    MAX_POLL_INTERVAL = 0.05
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._async_queue: asyncio.Lock | None = None
+        self._async_queue_loop: asyncio.AbstractEventLoop | None = None
+        self.last_released_at = time.monotonic()
+
+    def acquire(self, blocking: bool = True) -> bool:
+        return self._lock.acquire(blocking)
+
+    def release(self, activity: bool = True):
+        """Release the lock; ``activity=False`` leaves the idle clock running."""
+        if activity:
+            self.last_released_at = time.monotonic()
+        self._lock.release()
+
+    def locked(self) -> bool:
+        return self._lock.locked()
+
+    def idle_for(self) -> float:
+        """Seconds since a catalogue mutation last released the lock, or 0 while it is held."""
+        if self._lock.locked():
+            return 0.0
+        return time.monotonic() - self.last_released_at
+
+    def __enter__(self):
+        self._lock.acquire()
+        return self
+
+    def __exit__(self, *_exc_info):
+        self.release()
+
+    def _queue_for_running_loop(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._async_queue is None or self._async_queue_loop is not loop:
+            self._async_queue = asyncio.Lock()
+            self._async_queue_loop = loop
+        return self._async_queue
+
+    async def __aenter__(self):
+        async_queue = self._queue_for_running_loop()
+        await async_queue.acquire()
+        try:
+            delay = self.POLL_INTERVAL
+            # Polling keeps cancellation safe: a cancelled waiter never leaves a
+            # thread behind that acquires the lock after nobody is waiting.
+            while not self._lock.acquire(blocking=False):
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.MAX_POLL_INTERVAL)
+        except BaseException:
+            async_queue.release()
+            raise
+        return self
+
+    async def __aexit__(self, *_exc_info):
+        self.release()
+        self._async_queue.release()
+
+
+song_mutation_lock = SongMutationLock()
+content_repo_maintenance = RepoMaintenance(
+    lambda: CONTENT_REPO_DIR if CONTENT_REPO_DIR and os.path.isdir(os.path.join(CONTENT_REPO_DIR, ".git")) else None,
+    song_mutation_lock,
+    idle_after=float(os.environ.get("CONTENT_REPO_MAINTENANCE_IDLE_SECONDS", "300")),
+)
 
 
 def public_job_status(job: dict) -> dict:
@@ -781,6 +1268,9 @@ def run_sync_job(job_id: str):
             message="Song data rebuilt. Syncing content repo...",
         )
         sync_result = sync_content_repo(changed_path, action)
+        # A rebase may have pulled in songs edited elsewhere.
+        refresh_song_indexes()
+        refresh_song_history()
         if sync_result.get("ok"):
             update_sync_job(
                 job_id,
@@ -866,7 +1356,43 @@ class SongContent(BaseModel):
     expected_revision: str | None = None
 
 
-CHORDPRO_META_RE = re.compile(r"^\{\s*([^:]+):\s*(.+)\s*\}$")
+class SongLineChange(BaseModel):
+    start: int
+    delete: int = 0
+    lines: list[str] = []
+
+
+class SongPatch(BaseModel):
+    changes: list[SongLineChange]
+    expected_revision: str | None = None
+
+
+class SongDraft(BaseModel):
+    content: str
+    base_revision: str | None = None
+
+
+class SongBatchOperation(BaseModel):
+    action: Literal["create", "update", "delete"]
+    filename: str | None = None
+    content: str | None = None
+    expected_revision: str | None = None
+
+
+class SongBatch(BaseModel):
+    operations: list[SongBatchOperation]
+
+
+class SongBulkRequest(BaseModel):
+    ids: list[str]
+
+
+MAX_SONG_BATCH_OPERATIONS = 500
+SONG_WRITE_DURABILITY_MODES = {"strict", "group", "relaxed"}
+SONG_WRITE_DURABILITY = os.environ.get("SONG_WRITE_DURABILITY", "strict").strip().lower()
+SONG_IMPORT_MAX_BYTES = int(os.environ.get("SONG_IMPORT_MAX_BYTES", str(256 * 1024 * 1024)))
+MAX_IMPORT_SONG_BYTES = 1024 * 1024
+IMPORT_SPOOL_MEMORY_BYTES = 1024 * 1024
 
 
 def extract_song_title(content: str, *, require_directive: bool = False) -> str:
@@ -892,8 +1418,7 @@ def extract_song_title(content: str, *, require_directive: bool = False) -> str:
 
 def normalized_song_id(title: str) -> str:
     """Match the frontend/build slugify implementation exactly."""
-    song_id = re.sub(r"[^a-z0-9]+", "-", title.lower().strip())
-    return re.sub(r"^-+|-+$", "", song_id)
+    return slugify(title)
 
 
 def song_revision(content: str) -> str:
@@ -946,23 +1471,403 @@ def ensure_unique_song_id(content: str, *, exclude_filename: str | None = None)
     return title, song_id
 
 
-def fsync_directory(directory: str):
-    """Persist a completed rename/removal when the filesystem supports directory fsync."""
+def is_unsafe_song_filename(filename: str) -> bool:
+    return ".." in filename or "/" in filename or "\\" in filename
+
+
+def read_song_sources() -> dict[str, str]:
+    sources = {}
+    if not os.path.exists(SONGS_DIR):
+        return sources
+    for filename in sorted(os.listdir(SONGS_DIR)):
+        if not filename.endswith(".pro"):
+            continue
+        with open(os.path.join(SONGS_DIR, filename), "r", encoding="utf-8") as song_file:
+            sources[filename] = song_file.read()
+    return sources
+
+
+song_search_index = SongSearchIndex()
+song_facet_index = SongFacetIndex()
+song_chord_index = SongChordIndex()
+song_similarity_index = SongSimilarityIndex()
+song_duplicate_index = SongDuplicateIndex()
+song_index_lock = threading.Lock()
+catalogue_events = CatalogueEventHub()
+song_history_index = SongHistoryIndex()
+song_render_cache = RenderCache(int(os.environ.get("SONG_RENDER_CACHE_SIZE", "512")))
+# Recently served song contents by (filename, revision): the bases PATCH merges against.
+song_base_cache = RenderCache(int(os.environ.get("SONG_PATCH_BASE_CACHE_SIZE", "512")))
+# How many past commits of a song PATCH searches for a base that is not cached.
+SONG_PATCH_HISTORY_DEPTH = int(os.environ.get("SONG_PATCH_HISTORY_DEPTH", "20"))
+song_drafts = DraftStore(
+    ttl=float(os.environ.get("SONG_DRAFT_TTL_SECONDS", str(7 * 24 * 3600))),
+    max_bytes=int(os.environ.get("SONG_DRAFT_MAX_BYTES", str(256 * 1024))),
+    max_per_editor=int(os.environ.get("SONG_DRAFTS_PER_EDITOR", "50")),
+    max_total_bytes=int(os.environ.get("SONG_DRAFT_MAX_TOTAL_BYTES", str(64 * 1024 * 1024))),
+)
+EDITOR_ID_RE = re.compile(r"[A-Za-z0-9_-]{1,64}")
+song_index_signatures: dict[str, tuple[int, int, int]] = {}
+
+
+def song_file_signature(filepath: str) -> tuple[int, int, int] | None:
     try:
-        directory_fd = os.open(directory, os.O_RDONLY)
-    except OSError:
-        return
+        stat_result = os.stat(filepath)
+    except FileNotFoundError:
+        return None
+    return stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size
+
+
+def refresh_song_indexes(filenames: list[str] | None = None) -> int:
+    """Re-index songs whose files changed and return how many were touched.
+
+    With no filenames the whole SONGS_DIR is reconciled, which only reads the
+    files whose inode, mtime or size differ from the indexed version.
+    """
+    with song_index_lock:
+        if filenames is None:
+            present = set()
+            if os.path.exists(SONGS_DIR):
+                present = {filename for filename in os.listdir(SONGS_DIR) if filename.endswith(".pro")}
+            filenames = sorted(present | set(song_index_signatures))
+
+        touched = 0
+        for filename in filenames:
+            filepath = os.path.join(SONGS_DIR, filename)
+            signature = song_file_signature(filepath) if filename.endswith(".pro") else None
+            if signature == song_index_signatures.get(filename):
+                continue
+            touched += 1
+            if signature is None:
+                song_index_signatures.pop(filename, None)
+                song_search_index.remove(filename)
+                song_facet_index.remove(filename)
+                song_chord_index.remove(filename)
+                song_similarity_index.remove(filename)
+                song_duplicate_index.remove(filename)
+                continue
+            try:
+                with open(filepath, "r", encoding="utf-8") as song_file:
+                    song = parse_chordpro(song_file.read())
+            except (OSError, UnicodeDecodeError) as error:
+                print(f"Could not index {filename}: {error}")
+                continue
+            song_search_index.update(filename, song)
+            song_facet_index.update(filename, song)
+            song_chord_index.update(filename, song)
+            song_similarity_index.update(filename, song)
+            song_duplicate_index.update(filename, song)
+            song_index_signatures[filename] = signature
+        song_facet_index.compile()
+        song_chord_index.compile()
+        return touched
+
+
+def content_songs_path() -> str | None:
+    """Return SONGS_DIR relative to the content repository root, or None when outside it."""
+    songs_path = os.path.relpath(SONGS_DIR, CONTENT_REPO_DIR)
+    if songs_path == ".." or songs_path.startswith(".." + os.sep):
+        return None
+    return "" if songs_path == "." else songs_path.replace(os.sep, "/")
+
+
+def refresh_song_history() -> int:
+    """Extend the song history index with commits made since it was last updated."""
+    if not CONTENT_REPO_DIR or not os.path.isdir(os.path.join(CONTENT_REPO_DIR, ".git")):
+        return 0
+    songs_path = content_songs_path()
+    if songs_path is None:
+        return 0
     try:
-        os.fsync(directory_fd)
-    except OSError:
-        pass
-    finally:
-        os.close(directory_fd)
+        return song_history_index.update(CONTENT_REPO_DIR, songs_path)
+    except subprocess.CalledProcessError as error:
+        print(f"Could not index content repo history: {git_error_detail(error)}")
+    except OSError as error:
+        print(f"Could not index content repo history: {error}")
+    return 0
 
 
-def atomic_write_text(filepath: str, content: str):
-    """Write a complete file and atomically replace the previous version."""
-    directory = os.path.dirname(filepath)
+def warm_song_indexes():
+    refresh_song_indexes()
+    refresh_song_history()
+
+
+def batch_operation_error(index: int, error: HTTPException) -> HTTPException:
+    detail = error.detail if isinstance(error.detail, dict) else {"message": error.detail}
+    return HTTPException(status_code=error.status_code, detail={**detail, "operation_index": index})
+
+
+def require_batch_song_id(content: str) -> tuple[str, str]:
+    title = extract_song_title(content, require_directive=True)
+    song_id = normalized_song_id(title)
+    if not song_id:
+        raise HTTPException(
+            status_code=400,
+            detail="Song title must contain at least one letter or number",
+        )
+    return title, song_id
+
+
+def plan_song_batch(
+    operations: list[SongBatchOperation],
+) -> tuple[list[tuple[str, str | None, str | None]], list[dict]]:
+    """Validate a whole batch against one catalogue snapshot before anything is written."""
+    if not operations:
+        raise HTTPException(status_code=400, detail="A batch needs at least one operation")
+    if len(operations) > MAX_SONG_BATCH_OPERATIONS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"A batch can contain at most {MAX_SONG_BATCH_OPERATIONS} operations",
+        )
+
+    current = read_song_sources()
+    planned = dict(current)
+    touched: set[str] = set()
+    changes = []
+    results = []
+    for index, operation in enumerate(operations):
+        try:
+            if operation.action == "create":
+                if operation.content is None:
+                    raise HTTPException(status_code=400, detail="A create operation needs content")
+                title, song_id = require_batch_song_id(operation.content)
+                base_filename = sanitize_filename(title)
+                filename = f"{base_filename}.pro"
+                counter = 1
+                while filename in planned or filename in touched:
+                    filename = f"{base_filename}-{counter}.pro"
+                    counter += 1
+                planned[filename] = operation.content
+                touched.add(filename)
+                changes.append((os.path.join(SONGS_DIR, filename), operation.content, None))
+                results.append({"action": "create", "filename": filename, "id": song_id})
+                continue
+
+            filename = operation.filename
+            if not filename or is_unsafe_song_filename(filename):
+                raise HTTPException(status_code=400, detail="Invalid filename")
+            if filename in touched:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"{filename} appears more than once in this batch",
+                )
+            if filename not in current:
+                raise HTTPException(status_code=404, detail="Song not found")
+            require_matching_revision(filename, operation.expected_revision, current[filename])
+            touched.add(filename)
+
+            if operation.action == "delete":
+                del planned[filename]
+                changes.append((os.path.join(SONGS_DIR, filename), None, current[filename]))
+                results.append({"action": "delete", "filename": filename})
+                continue
+
+            if operation.content is None:
+                raise HTTPException(status_code=400, detail="An update operation needs content")
+            _title, song_id = require_batch_song_id(operation.content)
+            planned[filename] = operation.content
+            changes.append((os.path.join(SONGS_DIR, filename), operation.content, current[filename]))
+            results.append({"action": "update", "filename": filename, "id": song_id})
+        except HTTPException as error:
+            raise batch_operation_error(index, error)
+
+    files_by_id: dict[str, list[dict]] = {}
+    for filename, content in planned.items():
+        title = extract_song_title(content)
+        files_by_id.setdefault(normalized_song_id(title), []).append(
+            {"filename": filename, "title": title}
+        )
+    for result in results:
+        song_id = result.get("id")
+        if song_id is None or len(files_by_id[song_id]) < 2:
+            continue
+        conflicts = [song for song in files_by_id[song_id] if song["filename"] != result["filename"]]
+        conflicting_files = ", ".join(conflict["filename"] for conflict in conflicts)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "code": "duplicate_song_id",
+                "message": (
+                    f'A song with the normalized ID "{song_id}" already exists in '
+                    f"{conflicting_files}. Choose a different title."
+                ),
+                "song_id": song_id,
+                "conflicts": conflicts,
+                "operation_index": results.index(result),
+            },
+        )
+
+    for result, (_filepath, content, _previous) in zip(results, changes):
+        result["revision"] = song_revision(content) if content is not None else None
+    return changes, results
+
+
+async def spool_request_body(request: HttpRequest, limit: int):
+    """Copy an upload to a temporary file chunk by chunk, keeping memory bounded."""
+    spool = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_MEMORY_BYTES)
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > limit:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Archive is larger than the {limit} byte import limit",
+                )
+            await asyncio.to_thread(spool.write, chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+def is_importable_song_path(path: str) -> bool:
+    parts = path.replace("\\", "/").split("/")
+    return (
+        parts[-1].endswith(".pro")
+        and not any(part.startswith(".") or part == "__MACOSX" for part in parts)
+    )
+
+
+def iter_archive_songs(archive):
+    """Yield (member path, bytes, error) for each .pro member, one member at a time."""
+    if zipfile.is_zipfile(archive):
+        archive.seek(0)
+        with zipfile.ZipFile(archive) as bundle:
+            for info in bundle.infolist():
+                if info.is_dir() or not is_importable_song_path(info.filename):
+                    continue
+                if info.file_size > MAX_IMPORT_SONG_BYTES:
+                    yield info.filename, None, "Song file is too large"
+                    continue
+                try:
+                    with bundle.open(info) as member:
+                        data = member.read(MAX_IMPORT_SONG_BYTES + 1)
+                except (zipfile.BadZipFile, RuntimeError, NotImplementedError, zlib.error) as error:
+                    # Corrupt, encrypted or unsupported members fail alone.
+                    yield info.filename, None, f"Song file could not be read: {error}"
+                    continue
+                if len(data) > MAX_IMPORT_SONG_BYTES:
+                    yield info.filename, None, "Song file is too large"
+                    continue
+                yield info.filename, data, None
+        return
+
+    archive.seek(0)
+    try:
+        # Stream mode reads members sequentially and never seeks backwards.
+        with tarfile.open(fileobj=archive, mode="r|*") as bundle:
+            for member in bundle:
+                if not member.isfile() or not is_importable_song_path(member.name):
+                    continue
+                if member.size > MAX_IMPORT_SONG_BYTES:
+                    yield member.name, None, "Song file is too large"
+                    continue
+                yield member.name, bundle.extractfile(member).read(), None
+    except tarfile.TarError as error:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Upload must be a zip or tar archive of .pro files: {error}",
+        )
+
+
+def plan_song_import(
+    archive,
+    existing: str,
+) -> tuple[list[tuple[str, str | None, str | None]], list[dict]]:
+    """Validate archive members incrementally and plan one catalogue change."""
+    current = read_song_sources()
+    filename_by_id = {
+        normalized_song_id(extract_song_title(content)): filename
+        for filename, content in current.items()
+    }
+    taken_filenames = set(current)
+    imported_paths_by_id: dict[str, str] = {}
+    changes = []
+    results = []
+
+    for path, data, error in iter_archive_songs(archive):
+        result = {"path": path}
+        results.append(result)
+        if error is None:
+            try:
+                content = data.decode("utf-8")
+            except UnicodeDecodeError:
+                error = "Song file is not valid UTF-8"
+        if error is None:
+            try:
+                _title, song_id = require_batch_song_id(content)
+            except HTTPException as invalid:
+                error = invalid.detail
+        if error is None and song_id in imported_paths_by_id:
+            error = f'Duplicate song ID "{song_id}" (also in {imported_paths_by_id[song_id]})'
+        if error is not None:
+            result.update({"status": "failed", "error": error})
+            continue
+
+        imported_paths_by_id[song_id] = path
+        result["id"] = song_id
+        existing_filename = filename_by_id.get(song_id)
+        if existing_filename is not None:
+            result["filename"] = existing_filename
+            if current[existing_filename] == content:
+                result["status"] = "unchanged"
+            elif existing == "update":
+                changes.append(
+                    (os.path.join(SONGS_DIR, existing_filename), content, current[existing_filename])
+                )
+                result.update({"status": "updated", "revision": song_revision(content)})
+            else:
+                result["status"] = "skipped"
+            continue
+
+        base_filename = sanitize_filename(extract_song_title(content))
+        filename = f"{base_filename}.pro"
+        counter = 1
+        while filename in taken_filenames:
+            filename = f"{base_filename}-{counter}.pro"
+            counter += 1
+        taken_filenames.add(filename)
+        changes.append((os.path.join(SONGS_DIR, filename), content, None))
+        result.update({"status": "created", "filename": filename, "revision": song_revision(content)})
+
+    return changes, results
+
+
+def fsync_directory(directory: str):
+    """Persist a completed rename/removal when the filesystem supports directory fsync."""
+    try:
+        directory_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(directory_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(directory_fd)
+
+
+def song_write_durability() -> str:
+    """Return strict, group or relaxed; unknown values fall back to strict."""
+    return SONG_WRITE_DURABILITY if SONG_WRITE_DURABILITY in SONG_WRITE_DURABILITY_MODES else "strict"
+
+
+def inject_write_failure(point: str):
+    """Mirror the song builder's failpoints so crash-consistency tests can stop a write."""
+    if os.environ.get("SONG_WRITE_ENABLE_FAILURE_INJECTION") != "1":
+        return
+    if os.environ.get("SONG_WRITE_FAILPOINT") != point:
+        return
+    if os.environ.get("SONG_WRITE_FAILURE_MODE") == "crash":
+        os._exit(86)
+    raise OSError(f"Injected song write failure at {point}")
+
+
+def write_temporary_file(filepath: str, content: str, *, sync: bool) -> str:
+    """Write content beside filepath and return the temporary path that will replace it."""
+    directory = os.path.dirname(filepath)
     os.makedirs(directory, exist_ok=True)
     existing_mode = (os.stat(filepath).st_mode & 0o777) if os.path.exists(filepath) else 0o644
     file_descriptor, temporary_path = tempfile.mkstemp(
@@ -976,43 +1881,145 @@ def atomic_write_text(filepath: str, content: str):
             file_descriptor = -1
             temporary_file.write(content)
             temporary_file.flush()
-            os.fsync(temporary_file.fileno())
-        os.replace(temporary_path, filepath)
-        fsync_directory(directory)
-    finally:
+            if sync:
+                os.fsync(temporary_file.fileno())
+    except BaseException:
         if file_descriptor >= 0:
             os.close(file_descriptor)
+        os.unlink(temporary_path)
+        raise
+    return temporary_path
+
+
+def fsync_file(filepath: str):
+    file_descriptor = os.open(filepath, os.O_RDONLY)
+    try:
+        os.fsync(file_descriptor)
+    finally:
+        os.close(file_descriptor)
+
+
+def atomic_write_text(filepath: str, content: str):
+    """Write a complete file and atomically replace the previous version."""
+    durable = song_write_durability() != "relaxed"
+    temporary_path = write_temporary_file(filepath, content, sync=durable)
+    try:
+        inject_write_failure("before-replace")
+        os.replace(temporary_path, filepath)
+        inject_write_failure("after-replace")
+        if durable:
+            fsync_directory(os.path.dirname(filepath))
+    finally:
         if os.path.exists(temporary_path):
             os.unlink(temporary_path)
 
 
-def transactional_song_write(filepath: str, content: str, previous_content: str | None):
-    """Write and verify a song, restoring the prior catalogue state if the build fails."""
-    atomic_write_text(filepath, content)
-    try:
-        build_result = rebuild_songs()
-    except Exception as error:
-        build_result = {"ok": False, "message": f"Song build failed unexpectedly: {error}"}
+class SongWriteBarrier:
+    """One fsync barrier for the files of a single song transaction.
 
-    if build_result.get("ok"):
+    Writes are staged as unsynced temporary files. ``commit`` then flushes all
+    of them in one parallel pass, renames them into place in order and syncs
+    each affected directory once, instead of once per file.
+
+    This is not a group commit across requests: each save writes, rebuilds
+    and may roll back under the song mutation lock, so concurrent saves do not
+    share a barrier. Group mode speeds up batches, imports and the catalogue
+    build; a single-song save costs the same as in strict mode.
+    """
+
+    MAX_SYNC_WORKERS = 8
+
+    def __init__(self):
+        self.staged: list[tuple[str, str | None]] = []
+
+    def write(self, filepath: str, content: str):
+        self.staged.append((filepath, write_temporary_file(filepath, content, sync=False)))
+
+    def remove(self, filepath: str):
+        self.staged.append((filepath, None))
+
+    def commit(self):
+        temporaries = [temporary for _filepath, temporary in self.staged if temporary is not None]
+        if temporaries:
+            workers = min(self.MAX_SYNC_WORKERS, len(temporaries))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="song-fsync") as pool:
+                list(pool.map(fsync_file, temporaries))
+        inject_write_failure("group-before-rename")
+
+        directories = []
+        for position, (filepath, temporary) in enumerate(self.staged):
+            if temporary is None:
+                try:
+                    os.remove(filepath)
+                except FileNotFoundError:
+                    pass
+            else:
+                os.replace(temporary, filepath)
+            directory = os.path.dirname(filepath)
+            if directory not in directories:
+                directories.append(directory)
+            if position == 0:
+                inject_write_failure("group-after-first-rename")
+        for directory in directories:
+            fsync_directory(directory)
+        self.staged = []
+
+    def discard(self):
+        for _filepath, temporary in self.staged:
+            if temporary is not None and os.path.exists(temporary):
+                os.unlink(temporary)
+        self.staged = []
+
+
+def write_song_files(files: list[tuple[str, str | None]]):
+    """Write each (path, content) in order; ``None`` content removes the path."""
+    if song_write_durability() == "group":
+        barrier = SongWriteBarrier()
+        try:
+            for filepath, content in files:
+                if content is None:
+                    barrier.remove(filepath)
+                else:
+                    barrier.write(filepath, content)
+            barrier.commit()
+        finally:
+            barrier.discard()
         return
 
-    rollback_error = None
-    recovery_result = None
-    try:
-        if previous_content is None:
+    for filepath, content in files:
+        if content is not None:
+            atomic_write_text(filepath, content)
+            continue
+        try:
             os.remove(filepath)
+        except FileNotFoundError:
+            continue
+        if song_write_durability() == "strict":
             fsync_directory(os.path.dirname(filepath))
-        else:
-            atomic_write_text(filepath, previous_content)
-        recovery_result = rebuild_songs()
-    except Exception as error:
-        rollback_error = str(error)
 
+
+def remove_stale_song_temporaries() -> list[str]:
+    """Delete temporary files left in SONGS_DIR by a write that was interrupted by a crash."""
+    removed = []
+    if not os.path.isdir(SONGS_DIR):
+        return removed
+    for filename in os.listdir(SONGS_DIR):
+        if filename.startswith(".") and filename.endswith(".tmp") and ".pro." in filename:
+            os.unlink(os.path.join(SONGS_DIR, filename))
+            removed.append(filename)
+    return removed
+
+
+def song_build_failure(
+    message: str,
+    build_result: dict,
+    recovery_result: dict | None,
+    rollback_error: str | None,
+) -> HTTPException:
     rollback_succeeded = rollback_error is None and bool(recovery_result and recovery_result.get("ok"))
     detail = {
         "code": "song_build_failed",
-        "message": "The song could not be built, so the change was not saved.",
+        "message": message,
         "build_error": build_result.get("message") or "Unknown build error",
         "rollback_succeeded": rollback_succeeded,
     }
@@ -1021,47 +2028,78 @@ def transactional_song_write(filepath: str, content: str, previous_content: str
     if rollback_error:
         detail["recovery_error"] = rollback_error
 
-    raise HTTPException(
+    return HTTPException(
         status_code=422 if rollback_succeeded else 500,
         detail=detail,
     )
 
 
-def transactional_song_delete(filepath: str, previous_content: str):
-    """Delete and verify a song, restoring it if the catalogue cannot be rebuilt."""
-    os.remove(filepath)
-    fsync_directory(os.path.dirname(filepath))
+async def guarded_rebuild_songs() -> dict:
     try:
-        build_result = rebuild_songs()
+        return await rebuild_songs_async()
     except Exception as error:
-        build_result = {"ok": False, "message": f"Song build failed unexpectedly: {error}"}
+        return {"ok": False, "message": f"Song build failed unexpectedly: {error}"}
+
 
+def restore_song_files(changes: list[tuple[str, str | None, str | None]]):
+    """Put every changed path back to its previous content, newest change first."""
+    write_song_files([(filepath, previous_content) for filepath, _content, previous_content in reversed(changes)])
+
+
+def apply_song_files(changes: list[tuple[str, str | None, str | None]]):
+    """Write or remove each path, putting every path back if one of the writes fails."""
+    try:
+        write_song_files([(filepath, content) for filepath, content, _previous_content in changes])
+    except Exception:
+        restore_song_files(changes)
+        raise
+
+
+async def transactional_songs_apply(
+    changes: list[tuple[str, str | None, str | None]],
+    failure_message: str,
+):
+    """Apply (path, content, previous content) changes with one verifying rebuild.
+
+    ``None`` content deletes a path and ``None`` previous content means the path
+    did not exist. If the combined catalogue cannot be built, every change is
+    undone before the catalogue is rebuilt again.
+    """
+    # Writing and fsyncing block; keep them off the event loop so reads and
+    # event streams are served while the disk flushes.
+    await asyncio.to_thread(apply_song_files, changes)
+    build_result = await guarded_rebuild_songs()
     if build_result.get("ok"):
+        await asyncio.to_thread(
+            refresh_song_indexes,
+            [os.path.basename(filepath) for filepath, _content, _previous_content in changes],
+        )
         return
 
     rollback_error = None
     recovery_result = None
     try:
-        atomic_write_text(filepath, previous_content)
-        recovery_result = rebuild_songs()
+        await asyncio.to_thread(restore_song_files, changes)
+        recovery_result = await rebuild_songs_async()
     except Exception as error:
         rollback_error = str(error)
 
-    rollback_succeeded = rollback_error is None and bool(recovery_result and recovery_result.get("ok"))
-    detail = {
-        "code": "song_build_failed",
-        "message": "The song catalogue could not be rebuilt, so the deletion was undone.",
-        "build_error": build_result.get("message") or "Unknown build error",
-        "rollback_succeeded": rollback_succeeded,
-    }
-    if recovery_result and not recovery_result.get("ok"):
-        detail["recovery_error"] = recovery_result.get("message") or "Recovery build failed"
-    if rollback_error:
-        detail["recovery_error"] = rollback_error
+    raise song_build_failure(failure_message, build_result, recovery_result, rollback_error)
 
-    raise HTTPException(
-        status_code=422 if rollback_succeeded else 500,
-        detail=detail,
+
+async def transactional_song_write(filepath: str, content: str, previous_content: str | None):
+    """Write and verify a song, restoring the prior catalogue state if the build fails."""
+    await transactional_songs_apply(
+        [(filepath, content, previous_content)],
+        "The song could not be built, so the change was not saved.",
+    )
+
+
+async def transactional_song_delete(filepath: str, previous_content: str):
+    """Delete and verify a song, restoring it if the catalogue cannot be rebuilt."""
+    await transactional_songs_apply(
+        [(filepath, None, previous_content)],
+        "The song catalogue could not be rebuilt, so the deletion was undone.",
     )
 
 
@@ -1097,6 +2135,235 @@ def require_matching_revision(
     return current_revision
 
 
+EXPORT_SNAPSHOT_PREFIX = ".holy-songs-export-"
+
+
+def export_snapshot_parents(include_generated: bool) -> list[str]:
+    """Directories that hold export snapshots: one beside each set of exported files."""
+    parents = [SONGS_DIR]
+    if include_generated and os.path.isdir(SONGS_OUTPUT_DIR):
+        parents.append(os.path.dirname(os.path.realpath(SONGS_OUTPUT_DIR)))
+    return parents
+
+
+def make_export_snapshot_dir(parent: str) -> str:
+    try:
+        return tempfile.mkdtemp(prefix=EXPORT_SNAPSHOT_PREFIX, dir=parent)
+    except OSError:
+        # A read-only catalogue still exports; its files are copied instead.
+        return tempfile.mkdtemp(prefix=EXPORT_SNAPSHOT_PREFIX)
+
+
+def remove_stale_export_snapshots() -> list[str]:
+    """Delete export snapshots left behind by a server that stopped mid-download."""
+    removed = []
+    for parent in export_snapshot_parents(include_generated=True):
+        if not os.path.isdir(parent):
+            continue
+        for filename in os.listdir(parent):
+            if filename.startswith(EXPORT_SNAPSHOT_PREFIX):
+                shutil.rmtree(os.path.join(parent, filename), ignore_errors=True)
+                removed.append(os.path.join(parent, filename))
+    return removed
+
+
+def create_export_snapshot(include_generated: bool) -> tuple[list[str], list[tuple[str, str, str, bool]]]:
+    """Freeze the catalogue for an export while the caller holds song_mutation_lock.
+
+    Song writes replace files by rename, so a hard link keeps pointing at the
+    content that existed when the snapshot was taken. The songs and the
+    published generation may live on different filesystems, so each gets a
+    hidden snapshot directory beside it. Returns the snapshot directories and
+    (name, source, snapshot path, linked) per file; files that could not be
+    linked are copied by finish_export_snapshot once the lock is released.
+    """
+    snapshot_dirs = []
+    files = []
+    try:
+        sources = []
+        if os.path.isdir(SONGS_DIR):
+            snapshot_dirs.append(make_export_snapshot_dir(SONGS_DIR))
+            sources.extend(
+                (f"songs/{filename}", os.path.join(SONGS_DIR, filename), snapshot_dirs[-1])
+                for filename in sorted(os.listdir(SONGS_DIR))
+                if filename.endswith(".pro")
+            )
+        if include_generated and os.path.isdir(SONGS_OUTPUT_DIR):
+            generation_dir = os.path.realpath(SONGS_OUTPUT_DIR)
+            snapshot_dirs.append(make_export_snapshot_dir(os.path.dirname(generation_dir)))
+            for directory, subdirectories, filenames in os.walk(generation_dir):
+                subdirectories.sort()
+                relative_dir = os.path.relpath(directory, generation_dir).replace(os.sep, "/")
+                prefix = "data/" if relative_dir == "." else f"data/{relative_dir}/"
+                sources.extend(
+                    (f"{prefix}{filename}", os.path.join(directory, filename), snapshot_dirs[-1])
+                    for filename in sorted(filenames)
+                    if not filename.startswith(".")
+                )
+
+        for index, (name, source, snapshot_dir) in enumerate(sources):
+            snapshot_path = os.path.join(snapshot_dir, str(index))
+            try:
+                os.link(source, snapshot_path)
+                linked = True
+            except OSError:
+                linked = False
+            files.append((name, source, snapshot_path, linked))
+    except BaseException:
+        remove_export_snapshot(snapshot_dirs)
+        raise
+    return snapshot_dirs, files
+
+
+def finish_export_snapshot(files: list[tuple[str, str, str, bool]]) -> list[ArchiveEntry]:
+    """Copy the files that could not be linked and describe every snapshot file.
+
+    This runs after song_mutation_lock is released so a slow copy never holds
+    up saves; a copied song is whole but may be a save newer than the rest.
+    """
+    entries = []
+    for name, source, snapshot_path, linked in files:
+        if not linked:
+            try:
+                shutil.copy2(source, snapshot_path)
+            except FileNotFoundError:
+                continue
+        stat = os.stat(snapshot_path)
+        entries.append(ArchiveEntry(name, snapshot_path, stat.st_size, stat.st_mtime))
+    return entries
+
+
+def remove_export_snapshot(snapshot_dirs: list[str]):
+    for snapshot_dir in snapshot_dirs:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+
+
+def export_etag(archive_format: str, entries: list[ArchiveEntry]) -> str:
+    digest = hashlib.sha256(archive_format.encode("utf-8"))
+    for entry in entries:
+        digest.update(f"\0{entry.name}\0{entry.size}\0{entry.mtime!r}".encode("utf-8"))
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def parse_byte_range(range_header: str | None, total_length: int) -> tuple[int, int] | None:
+    """Return an inclusive (start, end) for one bytes range, or None to send everything."""
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+    ranges = range_header[len("bytes="):].split(",")
+    if len(ranges) != 1:
+        return None
+
+    start_text, _, end_text = ranges[0].strip().partition("-")
+    try:
+        if not start_text:
+            suffix_length = int(end_text)
+            if suffix_length <= 0:
+                raise ValueError
+            return max(total_length - suffix_length, 0), total_length - 1
+        start = int(start_text)
+        end = int(end_text) if end_text else total_length - 1
+    except ValueError:
+        return None
+    if start >= total_length or end < start:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range is not satisfiable",
+            headers={"Content-Range": f"bytes */{total_length}"},
+        )
+    return start, min(end, total_length - 1)
+
+
+def remove_snapshot_after(chunks, snapshot_dirs: list[str]):
+    try:
+        yield from chunks
+    finally:
+        remove_export_snapshot(snapshot_dirs)
+
+
+MAX_BULK_SONGS = 200
+SONG_ID_RE = re.compile(r"^[a-z0-9]+(?:-[a-z0-9]+)*$")
+
+
+def parse_bulk_song_ids(values: list[str]) -> list[str]:
+    """Accept repeated and comma-separated ids; keep the first occurrence's order."""
+    song_ids = list(dict.fromkeys(
+        song_id.strip() for value in values for song_id in value.split(",") if song_id.strip()
+    ))
+    if not song_ids:
+        raise HTTPException(status_code=400, detail={"code": "no_song_ids", "message": "Pass at least one song id."})
+    if len(song_ids) > MAX_BULK_SONGS:
+        raise HTTPException(
+            status_code=413,
+            detail={"code": "too_many_songs", "message": f"Request at most {MAX_BULK_SONGS} songs at once."},
+        )
+    invalid = [song_id for song_id in song_ids if not SONG_ID_RE.match(song_id)]
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "invalid_song_id", "message": "Song ids must be slugs.", "ids": invalid},
+        )
+    return song_ids
+
+
+def read_published_songs(song_ids: list[str]) -> tuple[str | None, list[tuple[str, bytes | None]]]:
+    """Read song JSON from one published generation so a publish mid-request cannot mix versions."""
+    # Resolve the pointer once; the generation id must name the directory read.
+    data_dir = os.path.realpath(SONGS_OUTPUT_DIR)
+    generation = generation_name(data_dir)
+    songs = []
+    for song_id in song_ids:
+        try:
+            with open(os.path.join(data_dir, "songs", f"{song_id}.json"), "rb") as song_file:
+                songs.append((song_id, song_file.read()))
+        except FileNotFoundError:
+            songs.append((song_id, None))
+    return generation, songs
+
+
+def bulk_songs_etag(response_format: str, generation: str | None, songs: list[tuple[str, bytes | None]]) -> str:
+    digest = hashlib.sha256(f"{response_format}\0{generation}".encode("utf-8"))
+    for song_id, content in songs:
+        digest.update(f"\0{song_id}\0".encode("utf-8"))
+        digest.update(hashlib.sha256(content).digest() if content is not None else b"missing")
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def bulk_song_entry(song_id: str, content: bytes | None) -> bytes:
+    # Splice the published JSON instead of parsing and re-serializing every song.
+    if content is None:
+        return b'{"id":' + json.dumps(song_id).encode("utf-8") + b',"missing":true}'
+    return b'{"id":' + json.dumps(song_id).encode("utf-8") + b',"song":' + content.strip() + b"}"
+
+
+def bulk_song_lines(songs: list[tuple[str, bytes | None]]):
+    for song_id, content in songs:
+        yield bulk_song_entry(song_id, content) + b"\n"
+
+
+def bulk_songs_response(
+    song_ids: list[str],
+    response_format: str,
+    if_none_match: str | None,
+) -> Response:
+    generation, songs = read_published_songs(song_ids)
+    etag = bulk_songs_etag(response_format, generation, songs)
+    headers = {"Cache-Control": "no-cache", "ETag": etag}
+    if if_none_match is not None and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    if response_format == "ndjson":
+        return StreamingResponse(bulk_song_lines(songs), media_type="application/x-ndjson", headers=headers)
+
+    found = [bulk_song_entry(song_id, content) for song_id, content in songs if content is not None]
+    missing = [song_id for song_id, content in songs if content is None]
+    body = (
+        b'{"generation":' + json.dumps(generation).encode("utf-8")
+        + b',"songs":[' + b",".join(found)
+        + b'],"missing":' + json.dumps(missing).encode("utf-8") + b"}"
+    )
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @app.websocket("/api/live")
 async def live_websocket(websocket: WebSocket):
     """Authenticate one band member and relay only WebRTC negotiation messages."""
@@ -1137,6 +2404,153 @@ def get_version():
     return {"git_sha": GIT_SHA, "image_ref": IMAGE_REF}
 
 
+@app.get("/api/diagnostics/render-cache")
+def get_render_cache_diagnostics():
+    return song_render_cache.stats()
+
+
+@app.get("/api/diagnostics/git-transport")
+def get_git_transport_diagnostics():
+    return content_git_transport.stats()
+
+
+@app.get("/api/diagnostics/push-scheduler")
+def get_push_scheduler_diagnostics():
+    if content_push_scheduler is None:
+        return {"enabled": False}
+    return {"enabled": True, **content_push_scheduler.stats()}
+
+
+@app.post("/api/admin/push", dependencies=[Depends(require_write_access)])
+def push_content_repo_now():
+    """Push locally committed edits now instead of waiting for the scheduler"""
+    if content_push_scheduler is None:
+        raise HTTPException(
+            status_code=409,
+            detail={"code": "push_scheduler_disabled", "message": "Edits are already pushed after every save."},
+        )
+    return content_push_scheduler.flush_now()
+
+
+@app.get("/api/diagnostics/content-repo-maintenance")
+def get_content_repo_maintenance_diagnostics():
+    return {"enabled": CONTENT_REPO_MAINTENANCE, **content_repo_maintenance.stats()}
+
+
+@app.get("/api/diagnostics/drafts")
+def get_draft_diagnostics():
+    return song_drafts.stats()
+
+
+@app.get("/api/diagnostics/content-remote")
+def get_content_remote_diagnostics():
+    if content_remote_poller is None:
+        return {"enabled": False}
+    return {"enabled": True, **content_remote_poller.stats()}
+
+
+@app.get("/api/export")
+async def export_catalogue(
+    archive_format: Literal["zip", "tar"] = Query(default="zip", alias="format"),
+    include_generated: bool = False,
+    range_header: str | None = Header(default=None, alias="Range"),
+    if_range: str | None = Header(default=None),
+):
+    """Stream the .pro sources (and optionally the published JSON) as one archive."""
+    async with song_mutation_lock:
+        snapshot_dirs, files = await asyncio.to_thread(create_export_snapshot, include_generated)
+
+    try:
+        entries = await asyncio.to_thread(finish_export_snapshot, files)
+        segments = await asyncio.to_thread(zip_segments if archive_format == "zip" else tar_segments, entries)
+        total_length = archive_length(segments)
+        etag = export_etag(archive_format, entries)
+        byte_range = parse_byte_range(range_header, total_length)
+        if byte_range is not None and if_range is not None and if_range != etag:
+            byte_range = None
+    except BaseException:
+        remove_export_snapshot(snapshot_dirs)
+        raise
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "no-cache",
+        "Content-Disposition": f'attachment; filename="holy-songs.{archive_format}"',
+        "ETag": etag,
+    }
+    status_code = 200
+    start, end = 0, total_length - 1
+    if byte_range is not None:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{total_length}"
+    headers["Content-Length"] = str(end - start + 1)
+
+    return StreamingResponse(
+        remove_snapshot_after(iter_archive_bytes(segments, start, end + 1), snapshot_dirs),
+        status_code=status_code,
+        media_type="application/zip" if archive_format == "zip" else "application/x-tar",
+        headers=headers,
+    )
+
+
+@app.get("/api/events")
+async def catalogue_event_stream(request: HttpRequest):
+    """Push a catalogue-updated event whenever a new song-data generation is published"""
+    return StreamingResponse(
+        catalogue_events.stream(catalogue_events.subscribe(), request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/index/changes")
+def get_index_changes(since: str):
+    """Return the index entries changed since a published generation, or ask for a full reload"""
+    changes = changes_since(SONGS_OUTPUT_DIR, since)
+    response = {
+        "generation": changes["generation"],
+        "since": since,
+        "reload": changes["reload"],
+        "added": [],
+        "updated": [],
+        "removed": [],
+    }
+    if changes["reload"] or not changes["states"]:
+        return response
+
+    try:
+        entries = read_generation_index(os.path.join(generations_dir(SONGS_OUTPUT_DIR), changes["generation"]))
+    except (OSError, ValueError):
+        return {**response, "reload": True}
+    for song_id, state in sorted(changes["states"].items()):
+        if state == "removed":
+            response["removed"].append(song_id)
+        elif song_id in entries:
+            response[state].append(entries[song_id])
+    return response
+
+
+@app.get("/api/search")
+def search_songs(
+    q: str = "",
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+):
+    """Rank songs by title, interpreter, category and lyric matches, tolerating typos"""
+    result = song_search_index.search(q, limit=limit, offset=offset)
+    return {**result, "limit": limit, "offset": offset}
+
+
+@app.get("/api/admin/duplicates", dependencies=[Depends(require_write_access)])
+def list_duplicate_songs(
+    min_similarity: float = Query(DEFAULT_MIN_SIMILARITY, ge=0.3, le=1.0),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """List pairs of songs whose lyrics are near-duplicates"""
+    return song_duplicate_index.duplicates(min_similarity, limit)
+
+
 @app.get("/api/sync-jobs/{job_id}")
 def get_sync_job(job_id: str):
     with sync_jobs_lock:
@@ -1146,38 +2560,38 @@ def get_sync_job(job_id: str):
         return public_job_status(job.copy())
 
 
+async def content_repo_branch_async() -> str:
+    return await asyncio.to_thread(content_repo_branch)
+
+
 @app.post("/api/refresh", dependencies=[Depends(require_write_access)])
-def refresh_from_github():
-    with song_mutation_lock:
-        return _refresh_from_github()
+async def refresh_from_github():
+    async with song_mutation_lock:
+        return await _refresh_from_github()
 
 
-def _refresh_from_github():
+async def _refresh_from_github():
     """Pull the content repository from GitHub and rebuild generated song data."""
     if not CONTENT_REPO_DIR or not os.path.isdir(os.path.join(CONTENT_REPO_DIR, ".git")):
         message = "Cannot refresh: CONTENT_REPO_DIR is not a git repository."
         print(message)
         return {"ok": False, "changed": False, "message": message}
 
+    # A manual refresh is also the way to pick up a changed branch or remote.
+    forget_content_repo_metadata()
     try:
-        ensure_content_repo_safe_directory()
+        await asyncio.to_thread(ensure_content_repo_safe_directory)
 
         remote_name = os.environ.get("CONTENT_REPO_PUSH_REMOTE", "origin")
-        branch = os.environ.get("CONTENT_REPO_PUSH_BRANCH")
-        if not branch:
-            branch = subprocess.run(
-                ["git", "rev-parse", "--abbrev-ref", "HEAD"],
-                cwd=CONTENT_REPO_DIR,
-                check=True,
-                capture_output=True,
-                text=True,
-            ).stdout.strip()
+        branch = await content_repo_branch_async()
 
         user_name, user_email = get_git_identity()
-        changed = rebase_content_repo(remote_name, branch, user_name, user_email)
-        build_result = rebuild_songs()
+        changed = await rebase_content_repo_async(remote_name, branch, user_name, user_email) is not None
+        build_result = await rebuild_songs_async()
         if not build_result["ok"]:
             return {"ok": False, "changed": changed, "message": build_result["message"]}
+        await asyncio.to_thread(refresh_song_indexes)
+        await asyncio.to_thread(refresh_song_history)
 
         if changed:
             message = "Content repo refreshed from GitHub."
@@ -1190,6 +2604,177 @@ def _refresh_from_github():
         print(message)
         return {"ok": False, "changed": False, "message": message}
 
+def touched_song_files(before: str, after: str) -> tuple[list[str], list[str]] | None:
+    """Return the .pro files changed between two commits and the song ids they had before.
+
+    Returns None when SONGS_DIR is not inside the content repository.
+    """
+    songs_path = content_songs_path()
+    if songs_path is None:
+        return None
+    diff = subprocess.run(
+        ["git", "diff", "--name-only", "-z", "--no-renames", before, after, "--", songs_path or "."],
+        cwd=CONTENT_REPO_DIR,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    # The builder only reads .pro files directly inside SONGS_DIR.
+    paths = sorted(
+        path for path in diff.split("\0")
+        if path.endswith(".pro") and os.path.dirname(path) == songs_path
+    )
+    previous_ids = set()
+    for path in paths:
+        previous = subprocess.run(
+            ["git", "show", f"{before}:{path}"],
+            cwd=CONTENT_REPO_DIR,
+            check=False,
+            capture_output=True,
+            text=True,
+        )
+        if previous.returncode == 0:
+            previous_ids.add(parse_chordpro(previous.stdout)["id"])
+    return [os.path.basename(path) for path in paths], sorted(previous_ids)
+
+
+async def _refresh_changed_songs_from_push() -> dict:
+    """Pull the content repository and rebuild only the song files the pull changed."""
+    if not CONTENT_REPO_DIR or not os.path.isdir(os.path.join(CONTENT_REPO_DIR, ".git")):
+        message = "Cannot refresh: CONTENT_REPO_DIR is not a git repository."
+        print(message)
+        return {"ok": False, "changed": False, "files": [], "message": message}
+
+    try:
+        await asyncio.to_thread(ensure_content_repo_safe_directory)
+        remote_name = os.environ.get("CONTENT_REPO_PUSH_REMOTE", "origin")
+        branch = await content_repo_branch_async()
+        user_name, user_email = get_git_identity()
+        before = await rebase_content_repo_async(remote_name, branch, user_name, user_email)
+        if before is None:
+            return {"ok": True, "changed": False, "files": [], "message": "Content repo already up to date."}
+
+        touched = await asyncio.to_thread(touched_song_files, before, "HEAD")
+        if touched is None:
+            build_result = await rebuild_songs_async()
+            files = None
+        else:
+            files, previous_ids = touched
+            if not files:
+                await asyncio.to_thread(refresh_song_history)
+                message = "Content repo refreshed; no song files changed."
+                print(message)
+                return {"ok": True, "changed": True, "files": [], "message": message}
+            build_result = await rebuild_songs_async({"files": files, "previousIds": previous_ids})
+        if not build_result["ok"]:
+            return {"ok": False, "changed": True, "files": files or [], "message": build_result["message"]}
+        touched_count = await asyncio.to_thread(refresh_song_indexes, files)
+        await asyncio.to_thread(refresh_song_history)
+
+        message = f"Content repo refreshed; rebuilt {len(files) if files is not None else touched_count} song file(s)."
+        print(message)
+        return {"ok": True, "changed": True, "files": files or [], "message": message}
+    except subprocess.CalledProcessError as error:
+        message = f"Content repo refresh failed: {git_error_detail(error)}"
+        print(message)
+        return {"ok": False, "changed": False, "files": [], "message": message}
+
+
+class PushRefreshRunner:
+    """Run one webhook-triggered refresh at a time.
+
+    Deliveries that arrive while a refresh runs do not start their own; they
+    mark it for exactly one more pass, which picks up every push so far.
+    """
+
+    def __init__(self):
+        self.task: asyncio.Task | None = None
+        self.rerun = False
+        self.last_result: dict | None = None
+
+    def trigger(self) -> str:
+        if self.task is not None and not self.task.done():
+            self.rerun = True
+            return "coalesced"
+        self.rerun = False
+        self.task = asyncio.create_task(self.run())
+        return "started"
+
+    async def run(self) -> dict:
+        while True:
+            self.rerun = False
+            async with song_mutation_lock:
+                try:
+                    self.last_result = await _refresh_changed_songs_from_push()
+                except Exception as error:
+                    message = f"Webhook refresh failed unexpectedly: {error}"
+                    print(message)
+                    self.last_result = {"ok": False, "changed": False, "files": [], "message": message}
+            if not self.rerun:
+                return self.last_result
+
+
+push_refresh = PushRefreshRunner()
+
+
+def webhook_signature_valid(body: bytes, headers) -> bool:
+    expected = hmac.new(CONTENT_WEBHOOK_SECRET.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    # compare_digest raises TypeError on non-ASCII str, so compare bytes; a
+    # header with any non-ASCII character simply does not match.
+    github_signature = headers.get("x-hub-signature-256")
+    if github_signature:
+        return hmac.compare_digest(github_signature.strip().encode("utf-8"), f"sha256={expected}".encode("ascii"))
+    forge_signature = headers.get("x-forgejo-signature") or headers.get("x-gitea-signature")
+    if forge_signature:
+        return hmac.compare_digest(forge_signature.strip().encode("utf-8"), expected.encode("ascii"))
+    return False
+
+
+@app.post("/api/webhooks/content", status_code=202)
+async def content_webhook(request: HttpRequest):
+    """Refresh changed songs when Forgejo, Gitea or GitHub reports a push"""
+    if not CONTENT_WEBHOOK_SECRET:
+        raise HTTPException(
+            status_code=404,
+            detail={"code": "webhook_disabled", "message": "Set CONTENT_WEBHOOK_SECRET to enable the webhook."},
+        )
+    body = bytearray()
+    async for chunk in request.stream():
+        body.extend(chunk)
+        if len(body) > CONTENT_WEBHOOK_MAX_BYTES:
+            raise HTTPException(status_code=413, detail={"code": "payload_too_large", "message": "Webhook payload is too large."})
+    if not webhook_signature_valid(bytes(body), request.headers):
+        raise HTTPException(status_code=401, detail={"code": "invalid_signature", "message": "Webhook signature does not match."})
+
+    event = (
+        request.headers.get("x-forgejo-event")
+        or request.headers.get("x-gitea-event")
+        or request.headers.get("x-github-event")
+        or ""
+    )
+    if event == "ping":
+        return {"ok": True, "status": "pong"}
+    if event != "push":
+        return {"ok": True, "status": "ignored", "event": event}
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail={"code": "invalid_payload", "message": "Webhook payload is not JSON."})
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail={"code": "invalid_payload", "message": "Webhook payload is not a JSON object."})
+
+    try:
+        branch = await content_repo_branch_async()
+    except (OSError, subprocess.CalledProcessError):
+        raise HTTPException(
+            status_code=503,
+            detail={"code": "content_branch_unknown", "message": "The content repo is not on a branch."},
+        )
+    if payload.get("ref") != f"refs/heads/{branch}":
+        return {"ok": True, "status": "ignored", "ref": payload.get("ref")}
+    return {"ok": True, "status": push_refresh.trigger()}
+
+
 @app.get("/api/songs")
 def list_songs():
     songs = []
@@ -1199,11 +2784,127 @@ def list_songs():
                 songs.append(filename)
     return {"songs": sorted(songs)}
 
+@app.get("/api/songs/query")
+def query_songs(
+    category: list[str] = Query(default=[]),
+    key: list[str] = Query(default=[]),
+    interpreter: list[str] = Query(default=[]),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = None,
+    facet_limit: int = Query(50, ge=0, le=500),
+):
+    """Filter songs by category, key and interpreter with facet counts and cursor paging"""
+    try:
+        return song_facet_index.query(
+            {"category": category, "key": key, "interpreter": interpreter},
+            limit=limit,
+            cursor=cursor,
+            facet_limit=facet_limit,
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "invalid_cursor", "message": "The cursor is not valid for this query."},
+        )
+
+@app.get("/api/songs/playable")
+def playable_songs(
+    chords: list[str] = Query(default=[]),
+    transpose: bool = False,
+    max_missing: int = Query(0, ge=0, le=MAX_MISSING_CHORDS),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+):
+    """Find songs playable with only the given chords, optionally after transposing"""
+    chord_list = [chord.strip() for value in chords for chord in value.split(",") if chord.strip()]
+    if not chord_list:
+        raise HTTPException(status_code=400, detail={"code": "no_chords", "message": "Pass at least one chord."})
+    try:
+        return song_chord_index.query(
+            chord_list,
+            transpose=transpose,
+            max_missing=max_missing,
+            limit=limit,
+            offset=offset,
+        )
+    except ValueError as error:
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "invalid_chord", "message": "Some chords could not be read.", "chords": error.args[0]},
+        )
+
+@app.get("/api/songs/bulk")
+def get_songs_bulk(
+    ids: list[str] = Query(default=[]),
+    response_format: Literal["json", "ndjson"] = Query(default="json", alias="format"),
+    if_none_match: str | None = Header(default=None),
+):
+    """Return several published songs in one response, e.g. a whole set list"""
+    return bulk_songs_response(parse_bulk_song_ids(ids), response_format, if_none_match)
+
+@app.post("/api/songs/bulk")
+def post_songs_bulk(
+    bulk: SongBulkRequest,
+    response_format: Literal["json", "ndjson"] = Query(default="json", alias="format"),
+    if_none_match: str | None = Header(default=None),
+):
+    """Same as GET /api/songs/bulk for id lists too long for a URL"""
+    return bulk_songs_response(parse_bulk_song_ids(bulk.ids), response_format, if_none_match)
+
+@app.post("/api/songs/batch", dependencies=[Depends(require_write_access)])
+async def batch_update_songs(batch: SongBatch):
+    """Create, update and delete several songs with one rebuild and one sync job"""
+    async with song_mutation_lock:
+        changes, results = await asyncio.to_thread(plan_song_batch, batch.operations)
+        await transactional_songs_apply(
+            changes,
+            "The song catalogue could not be built, so none of the batch changes were saved.",
+        )
+        sync = enqueue_content_sync(
+            SONGS_DIR,
+            f"Batch edit {len(changes)} song{'s' if len(changes) != 1 else ''}",
+            rebuild_required=False,
+        )
+
+    return {"message": "Songs saved locally", "results": results, "sync": sync}
+
+@app.post("/api/songs/import", dependencies=[Depends(require_write_access)])
+async def import_songs(request: HttpRequest, existing: Literal["skip", "update"] = "skip"):
+    """Import a zip or tar upload of .pro files as one transactional change"""
+    archive = await spool_request_body(request, SONG_IMPORT_MAX_BYTES)
+    try:
+        async with song_mutation_lock:
+            changes, results = await asyncio.to_thread(plan_song_import, archive, existing)
+            sync = None
+            if changes:
+                await transactional_songs_apply(
+                    changes,
+                    "The song catalogue could not be built, so nothing from the archive was saved.",
+                )
+                sync = enqueue_content_sync(
+                    SONGS_DIR,
+                    f"Import {len(changes)} song{'s' if len(changes) != 1 else ''}",
+                    rebuild_required=False,
+                )
+    finally:
+        archive.close()
+
+    counts = {
+        state: sum(1 for result in results if result["status"] == state)
+        for state in ("created", "updated", "unchanged", "skipped", "failed")
+    }
+    return {
+        "message": f"Imported {counts['created'] + counts['updated']} song(s) locally",
+        "counts": counts,
+        "results": results,
+        "sync": sync,
+    }
+
 @app.post("/api/songs/create", dependencies=[Depends(require_write_access)])
-def create_song(song: SongContent):
+async def create_song(song: SongContent):
     """Create a new song file with auto-generated filename from title"""
-    with song_mutation_lock:
-        title, song_id = ensure_unique_song_id(song.content)
+    async with song_mutation_lock:
+        title, song_id = await asyncio.to_thread(ensure_unique_song_id, song.content)
         base_filename = sanitize_filename(title)
         filename = f"{base_filename}.pro"
         filepath = os.path.join(SONGS_DIR, filename)
@@ -1216,7 +2917,7 @@ def create_song(song: SongContent):
             counter += 1
 
         validate_song_path(filepath)
-        transactional_song_write(filepath, song.content, previous_content=None)
+        await transactional_song_write(filepath, song.content, previous_content=None)
         revision = song_revision(song.content)
         sync = enqueue_content_sync(filepath, "Create song", rebuild_required=False)
 
@@ -1228,8 +2929,45 @@ def create_song(song: SongContent):
         "sync": sync,
     }
 
-@app.get("/api/songs/{filename}")
-def get_song(filename: str):
+def remember_song_base(filename: str, content: str) -> str:
+    revision = song_revision(content)
+    song_base_cache.put((filename, revision), {"content": content})
+    return revision
+
+
+def find_song_base(filename: str, revision: str) -> str | None:
+    """Return the content a client loaded as ``revision``, if it can still be found."""
+    cached = song_base_cache.get((filename, revision))
+    if cached is not None:
+        return cached["content"]
+    if not song_history_index.built:
+        refresh_song_history()
+    history = song_history_index.history(filename, SONG_PATCH_HISTORY_DEPTH)
+    songs_path = content_songs_path() if CONTENT_REPO_DIR else None
+    if history is None or songs_path is None:
+        return None
+    for entry in history["history"]:
+        if entry["status"] == "D":
+            continue
+        path = f"{songs_path}/{entry['filename']}" if songs_path else entry["filename"]
+        shown = subprocess.run(
+            ["git", "show", f"{entry['commit']}:{path}"],
+            cwd=CONTENT_REPO_DIR,
+            capture_output=True,
+            text=True,
+        )
+        if shown.returncode == 0 and song_revision(shown.stdout) == revision:
+            remember_song_base(filename, shown.stdout)
+            return shown.stdout
+    return None
+
+
+def read_song_text(filepath: str) -> str:
+    with open(filepath, "r", encoding="utf-8") as song_file:
+        return song_file.read()
+
+
+def read_song_source(filename: str) -> str:
     # Basic security check to prevent directory traversal
     if ".." in filename or "/" in filename or "\\" in filename:
          raise HTTPException(status_code=400, detail="Invalid filename")
@@ -1242,12 +2980,94 @@ def get_song(filename: str):
 
         with open(filepath, "r", encoding="utf-8") as f:
             content = f.read()
+    remember_song_base(filename, content)
+    return content
 
+@app.get("/api/songs/{filename}")
+def get_song(filename: str):
+    content = read_song_source(filename)
     return {"content": content, "revision": song_revision(content)}
 
+@app.get("/api/songs/{filename}/render")
+def render_song(
+    filename: str,
+    key: str | None = None,
+    spelling: Literal["auto", "sharp", "flat"] = "auto",
+):
+    """Return a song parsed and transposed to ``key``, ready to display"""
+    if key is not None:
+        key = key.strip()
+        if key_root(key) is None:
+            raise HTTPException(
+                status_code=400,
+                detail={"code": "invalid_key", "message": "The key must start with a note from A to G."},
+            )
+    content = read_song_source(filename)
+    revision = song_revision(content)
+    rendered = song_render_cache.get_or_render(
+        (revision, key, spelling),
+        lambda: render_transposed_song(parse_chordpro(content), key, spelling),
+    )
+    return {**rendered, "revision": revision, "spelling": spelling}
+
+@app.get("/api/songs/{filename}/similar")
+def similar_songs(filename: str, limit: int = Query(10, ge=1, le=100)):
+    """Recommend songs with similar chord progressions and categories"""
+    results = song_similarity_index.similar(filename, limit)
+    if results is None:
+        raise HTTPException(status_code=404, detail="Song not found")
+    return {"filename": filename, "results": results}
+
+@app.get("/api/songs/{filename}/history")
+def song_history(
+    filename: str,
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+):
+    """List the commits that changed a song, newest first"""
+    if is_unsafe_song_filename(filename):
+        raise HTTPException(status_code=400, detail="Invalid filename")
+    if not song_history_index.built:
+        refresh_song_history()
+    history = song_history_index.history(filename, limit, offset)
+    if history is None:
+        raise HTTPException(status_code=404, detail="Song not found")
+    return history
+
+@app.get("/api/songs/{filename}/revisions/{commit}")
+def song_at_revision(filename: str, commit: str):
+    """Return a song as it was at a content repository commit"""
+    if is_unsafe_song_filename(filename) or not GIT_REVISION_RE.fullmatch(commit):
+        raise HTTPException(status_code=400, detail="Invalid filename or revision")
+    songs_path = content_songs_path() if CONTENT_REPO_DIR else None
+    if songs_path is None or not os.path.isdir(os.path.join(CONTENT_REPO_DIR, ".git")):
+        raise HTTPException(
+            status_code=409,
+            detail={"code": "no_content_repo", "message": "Song history needs SONGS_DIR inside a git repository."},
+        )
+    resolved = subprocess.run(
+        ["git", "rev-parse", "--verify", "--quiet", f"{commit}^{{commit}}"],
+        cwd=CONTENT_REPO_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if resolved.returncode:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    full_commit = resolved.stdout.strip()
+    path = f"{songs_path}/{filename}" if songs_path else filename
+    shown = subprocess.run(
+        ["git", "show", f"{full_commit}:{path}"],
+        cwd=CONTENT_REPO_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if shown.returncode:
+        raise HTTPException(status_code=404, detail="Song not found at this revision")
+    return {"filename": filename, "commit": full_commit, "content": shown.stdout, "revision": song_revision(shown.stdout)}
+
 @app.post("/api/songs/{filename}", dependencies=[Depends(require_write_access)])
 @app.put("/api/songs/{filename}", dependencies=[Depends(require_write_access)])
-def update_song(filename: str, song: SongContent):
+async def update_song(filename: str, song: SongContent):
     """Update an existing song file"""
     # Basic security check to prevent directory traversal
     if ".." in filename or "/" in filename or "\\" in filename:
@@ -1256,16 +3076,19 @@ def update_song(filename: str, song: SongContent):
     filepath = os.path.join(SONGS_DIR, filename)
     validate_song_path(filepath)
 
-    with song_mutation_lock:
+    async with song_mutation_lock:
         if not os.path.exists(filepath):
             raise HTTPException(status_code=404, detail="Song not found")
 
-        with open(filepath, "r", encoding="utf-8") as song_file:
-            previous_content = song_file.read()
+        previous_content = await asyncio.to_thread(read_song_text, filepath)
         require_matching_revision(filename, song.expected_revision, previous_content)
-        _title, song_id = ensure_unique_song_id(song.content, exclude_filename=filename)
-        transactional_song_write(filepath, song.content, previous_content)
-        revision = song_revision(song.content)
+        _title, song_id = await asyncio.to_thread(
+            ensure_unique_song_id,
+            song.content,
+            exclude_filename=filename,
+        )
+        await transactional_song_write(filepath, song.content, previous_content)
+        revision = remember_song_base(filename, song.content)
         sync = enqueue_content_sync(filepath, "Update song", rebuild_required=False)
 
     return {
@@ -1276,8 +3099,106 @@ def update_song(filename: str, song: SongContent):
         "sync": sync,
     }
 
+def patch_conflict(filename: str, expected_revision: str, current_content: str, base_content: str | None, reason: str):
+    detail = {
+        "code": "revision_conflict",
+        "message": "This song changed after you opened it. Review the latest version before trying again.",
+        "filename": filename,
+        "expected_revision": expected_revision,
+        "current_revision": song_revision(current_content),
+        "reason": reason,
+    }
+    if base_content is None:
+        # Without the client's base there is nothing to diff against.
+        detail["current_content"] = current_content
+    else:
+        detail["changes"] = diff_lines(split_lines(base_content), split_lines(current_content))
+    return HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detail)
+
+
+@app.patch("/api/songs/{filename}", dependencies=[Depends(require_write_access)])
+async def patch_song(filename: str, patch: SongPatch):
+    """Apply line changes made against ``expected_revision`` to a song.
+
+    A stale base is merged with the changes made since, unless both touch the
+    same lines; the response then carries the changes the client is missing.
+    A conflict returns the changes from the client's base to the current song
+    instead of the whole song when that base is known.
+    """
+    if is_unsafe_song_filename(filename):
+        raise HTTPException(status_code=400, detail="Invalid filename")
+
+    filepath = os.path.join(SONGS_DIR, filename)
+    validate_song_path(filepath)
+    changes = [change.model_dump() for change in patch.changes]
+
+    async with song_mutation_lock:
+        if not os.path.exists(filepath):
+            raise HTTPException(status_code=404, detail="Song not found")
+
+        previous_content = await asyncio.to_thread(read_song_text, filepath)
+        current_revision = song_revision(previous_content)
+        if patch.expected_revision is None:
+            raise HTTPException(
+                status_code=428,
+                detail={
+                    "code": "revision_required",
+                    "message": "Reload the song before saving it, then try again.",
+                    "filename": filename,
+                    "current_revision": current_revision,
+                },
+            )
+
+        merged = patch.expected_revision != current_revision
+        base_content = (
+            await asyncio.to_thread(find_song_base, filename, patch.expected_revision)
+            if merged
+            else previous_content
+        )
+        if base_content is None:
+            raise patch_conflict(
+                filename,
+                patch.expected_revision,
+                previous_content,
+                None,
+                "The revision you edited is no longer known to the server.",
+            )
+        base_lines = split_lines(base_content)
+        try:
+            if merged:
+                lines = merge_changes(base_lines, changes, diff_lines(base_lines, split_lines(previous_content)))
+            else:
+                lines = apply_changes(base_lines, changes)
+        except PatchConflict as conflict:
+            raise patch_conflict(filename, patch.expected_revision, previous_content, base_content, str(conflict))
+        except ValueError as error:
+            raise HTTPException(status_code=400, detail={"code": "invalid_patch", "message": str(error)})
+        content = join_lines(lines)
+
+        _title, song_id = await asyncio.to_thread(
+            ensure_unique_song_id,
+            content,
+            exclude_filename=filename,
+        )
+        await transactional_song_write(filepath, content, previous_content)
+        revision = remember_song_base(filename, content)
+        sync = enqueue_content_sync(filepath, "Update song", rebuild_required=False)
+
+    response = {
+        "message": "Song saved locally",
+        "filename": filename,
+        "id": song_id,
+        "revision": revision,
+        "merged": merged,
+        "sync": sync,
+    }
+    if merged:
+        # What the client must apply to its own edited copy to hold ``revision``.
+        response["changes"] = diff_lines(apply_changes(base_lines, changes), lines)
+    return response
+
 @app.delete("/api/songs/{filename}", dependencies=[Depends(require_write_access)])
-def delete_song(filename: str, expected_revision: str | None = None):
+async def delete_song(filename: str, expected_revision: str | None = None):
     """Delete a song file"""
     # Basic security check to prevent directory traversal
     if ".." in filename or "/" in filename or "\\" in filename:
@@ -1286,18 +3207,93 @@ def delete_song(filename: str, expected_revision: str | None = None):
     filepath = os.path.join(SONGS_DIR, filename)
     validate_song_path(filepath)
 
-    with song_mutation_lock:
+    async with song_mutation_lock:
         if not os.path.exists(filepath):
             raise HTTPException(status_code=404, detail="Song not found")
 
-        with open(filepath, "r", encoding="utf-8") as song_file:
-            previous_content = song_file.read()
+        previous_content = await asyncio.to_thread(read_song_text, filepath)
         require_matching_revision(filename, expected_revision, previous_content)
-        transactional_song_delete(filepath, previous_content)
+        await transactional_song_delete(filepath, previous_content)
         sync = enqueue_content_sync(filepath, "Delete song", rebuild_required=False)
 
     return {"message": "Song deleted locally", "sync": sync}
 
+def require_editor_id(
+    x_editor_id: str | None = Header(default=None),
+    x_forwarded_email: str | None = Header(default=None),
+    x_auth_request_email: str | None = Header(default=None),
+    x_forwarded_user: str | None = Header(default=None),
+) -> str:
+    """Return the key this editor's drafts are kept under.
+
+    Behind the auth proxy that is the signed-in user (the identity
+    live_websocket trusts), so one person's devices share their drafts and
+    nobody can name someone else's. X-Editor-Id is only used without a proxy.
+    """
+    for identity in (x_forwarded_email, x_auth_request_email, x_forwarded_user):
+        if isinstance(identity, str) and identity:
+            return f"user:{identity}"
+    if not isinstance(x_editor_id, str) or not EDITOR_ID_RE.fullmatch(x_editor_id):
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "editor_id_required", "message": "Send an X-Editor-Id header of up to 64 letters, digits, - or _."},
+        )
+    return f"editor:{x_editor_id}"
+
+def require_draft_song(filename: str) -> str:
+    if is_unsafe_song_filename(filename):
+        raise HTTPException(status_code=400, detail="Invalid filename")
+    filepath = os.path.join(SONGS_DIR, filename)
+    validate_song_path(filepath)
+    if not os.path.exists(filepath):
+        raise HTTPException(status_code=404, detail="Song not found")
+    return filepath
+
+@app.get("/api/drafts", dependencies=[Depends(require_write_access)])
+def list_drafts(editor_id: str = Depends(require_editor_id)):
+    """List this editor's unpublished drafts, newest first"""
+    return {"drafts": song_drafts.list(editor_id)}
+
+@app.get("/api/drafts/{filename}", dependencies=[Depends(require_write_access)])
+def get_draft(filename: str, editor_id: str = Depends(require_editor_id)):
+    draft = song_drafts.get(editor_id, filename)
+    if draft is None:
+        raise HTTPException(status_code=404, detail="Draft not found")
+    return draft
+
+@app.put("/api/drafts/{filename}", dependencies=[Depends(require_write_access)])
+def save_draft(filename: str, draft: SongDraft, editor_id: str = Depends(require_editor_id)):
+    """Keep an autosaved draft of a song without rebuilding or syncing anything"""
+    require_draft_song(filename)
+    try:
+        return song_drafts.save(editor_id, filename, draft.content, draft.base_revision)
+    except DraftTooLarge as error:
+        raise HTTPException(status_code=413, detail={"code": "draft_too_large", "message": str(error)})
+
+@app.delete("/api/drafts/{filename}", dependencies=[Depends(require_write_access)])
+def discard_draft(filename: str, editor_id: str = Depends(require_editor_id)):
+    if not song_drafts.discard(editor_id, filename):
+        raise HTTPException(status_code=404, detail="Draft not found")
+    return {"message": "Draft discarded", "filename": filename}
+
+@app.post("/api/drafts/{filename}/publish", dependencies=[Depends(require_write_access)])
+async def publish_draft(filename: str, editor_id: str = Depends(require_editor_id)):
+    """Save a draft as the song through the normal save path.
+
+    The draft's base revision guards the save, so a song changed since the
+    draft was started is reported as a conflict and the draft is kept.
+    """
+    draft = song_drafts.get(editor_id, filename)
+    if draft is None:
+        raise HTTPException(status_code=404, detail="Draft not found")
+    response = await update_song(
+        filename,
+        SongContent(content=draft["content"], expected_revision=draft["base_revision"]),
+    )
+    # An autosave that arrived while publishing is newer than what was published.
+    song_drafts.discard(editor_id, filename, published=True, saved_at=draft["saved_at"])
+    return response
+
 def find_song_file_by_id(song_id: str) -> str | None:
     """Find a .pro file by song ID (slug of title)"""
     if not os.path.exists(SONGS_DIR):
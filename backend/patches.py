@@ -0,0 +1,94 @@
+"""Line-based song patches and three-way merges.
+
+A patch is a list of changes against the lines of a base revision, where
+lines are the song split on "\\n". Each change replaces ``delete`` lines
+starting at line ``start`` (0-based, in the base) with ``lines``; a change
+with ``delete`` 0 is a pure insertion before line ``start``. Changes are
+ordered and do not overlap.
+
+When the base is stale, the client's changes and the changes made since
+the base are merged as long as they touch different lines of the base.
+"""
+
+import difflib
+
+
+class PatchConflict(ValueError):
+    """Raised when two sets of changes edit the same lines of a base."""
+
+
+def split_lines(content: str) -> list[str]:
+    return content.split("\n")
+
+
+def join_lines(lines: list[str]) -> str:
+    return "\n".join(lines)
+
+
+def diff_lines(old: list[str], new: list[str]) -> list[dict]:
+    """Return the changes that turn ``old`` into ``new``."""
+    matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+    return [
+        {"start": old_start, "delete": old_end - old_start, "lines": new[new_start:new_end]}
+        for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes()
+        if tag != "equal"
+    ]
+
+
+def validate_changes(changes: list[dict], line_count: int):
+    """Raise ValueError unless ``changes`` are ordered, disjoint and inside the base."""
+    position = 0
+    for index, change in enumerate(changes):
+        start, delete = change["start"], change["delete"]
+        if start < 0 or delete < 0:
+            raise ValueError(f"Change {index} has a negative start or delete count.")
+        if start < position:
+            raise ValueError(f"Change {index} overlaps or comes before the change preceding it.")
+        if start + delete > line_count:
+            raise ValueError(f"Change {index} reaches past the end of the song ({line_count} lines).")
+        position = start + delete
+
+
+def apply_changes(lines: list[str], changes: list[dict]) -> list[str]:
+    validate_changes(changes, len(lines))
+    result = []
+    position = 0
+    for change in changes:
+        result.extend(lines[position:change["start"]])
+        result.extend(change["lines"])
+        position = change["start"] + change["delete"]
+    result.extend(lines[position:])
+    return result
+
+
+def changes_overlap(first: dict, second: dict) -> bool:
+    if first["start"] == second["start"]:
+        # Two insertions at one place, or an insertion before the other's
+        # replaced lines: either order could be meant.
+        return True
+    first_end = first["start"] + first["delete"]
+    second_end = second["start"] + second["delete"]
+    return first["start"] < second_end and second["start"] < first_end
+
+
+def merge_changes(base: list[str], ours: list[dict], theirs: list[dict]) -> list[str]:
+    """Apply two independent sets of changes to ``base``.
+
+    Raises PatchConflict when a change from each side touches the same base
+    lines, unless both sides made exactly the same change.
+    """
+    validate_changes(ours, len(base))
+    validate_changes(theirs, len(base))
+    merged = list(theirs)
+    for change in ours:
+        if change in theirs:
+            continue
+        clash = next((other for other in theirs if changes_overlap(change, other)), None)
+        if clash is not None:
+            raise PatchConflict(
+                f"Lines {change['start'] + 1}-{change['start'] + max(change['delete'], 1)} "
+                "were also changed by someone else."
+            )
+        merged.append(change)
+    merged.sort(key=lambda change: (change["start"], change["delete"]))
+    return apply_changes(base, merged)
@@ -0,0 +1,146 @@
+"""Push local content commits at most once per interval.
+
+Every save is committed locally straight away, but pushing each one makes
+an editing session a storm of pushes. The scheduler collects push requests
+and runs one flush when the interval since the last push has passed. A
+flush also runs on demand and when the server shuts down. A failed flush
+keeps the request pending and tries again one interval later.
+"""
+
+import threading
+import time
+
+
+def squash_runs(subjects: list[str]) -> list[tuple[int, int]]:
+    """Return [start, end) ranges of consecutive commits sharing a subject.
+
+    Editor commits are titled "<action>: <file> via Holy Songs editor", so
+    a run is repeated saves of one file with the same action.
+    """
+    runs = []
+    start = 0
+    for position in range(1, len(subjects) + 1):
+        if position == len(subjects) or subjects[position] != subjects[start]:
+            runs.append((start, position))
+            start = position
+    return runs
+
+
+class PushScheduler:
+    def __init__(self, flush, interval: float, clock=time.monotonic):
+        """``flush()`` pushes every pending commit and returns a sync result dict."""
+        self.flush = flush
+        self.interval = interval
+        self.clock = clock
+        self.condition = threading.Condition()
+        self.thread: threading.Thread | None = None
+        self.stopping = False
+        self.pending = 0
+        self.due_at: float | None = None
+        self.last_flush_at: float | None = None
+        self.flushing = False
+        self.last_result: dict | None = None
+        self.metrics = {"requests": 0, "flushes": 0, "pushes": 0, "failed_flushes": 0, "squashed_commits": 0}
+
+    def request(self):
+        """Note a new local commit; the next flush pushes it."""
+        with self.condition:
+            self.pending += 1
+            self.metrics["requests"] += 1
+            if self.due_at is None:
+                now = self.clock()
+                earliest = now if self.last_flush_at is None else self.last_flush_at + self.interval
+                self.due_at = max(now, earliest)
+            self.condition.notify_all()
+
+    def record_squashed(self, commits: int):
+        with self.condition:
+            self.metrics["squashed_commits"] += commits
+
+    def seconds_until_push(self) -> float | None:
+        with self.condition:
+            if self.due_at is None:
+                return None
+            return max(0.0, self.due_at - self.clock())
+
+    def flush_now(self) -> dict:
+        """Push now, whether or not anything was requested; waits for a running flush."""
+        with self.condition:
+            while self.flushing:
+                self.condition.wait()
+            self.flushing = True
+            requested = self.pending
+        return self._run_flush(requested)
+
+    def _run_flush(self, requested: int) -> dict:
+        try:
+            result = self.flush()
+        except Exception as error:
+            result = {"ok": False, "pushed": False, "message": f"Scheduled push failed unexpectedly: {error}"}
+        with self.condition:
+            self.flushing = False
+            self.last_flush_at = self.clock()
+            self.last_result = result
+            self.metrics["flushes"] += 1
+            if result.get("ok"):
+                if result.get("pushed"):
+                    self.metrics["pushes"] += 1
+                # Requests made while the flush ran are not covered by it.
+                self.pending -= requested
+                self.due_at = self.last_flush_at + self.interval if self.pending else None
+            else:
+                self.metrics["failed_flushes"] += 1
+                self.due_at = self.last_flush_at + self.interval
+            self.condition.notify_all()
+        return result
+
+    def run(self):
+        with self.condition:
+            while not self.stopping:
+                if self.flushing or self.due_at is None:
+                    self.condition.wait()
+                    continue
+                remaining = self.due_at - self.clock()
+                if remaining > 0:
+                    self.condition.wait(remaining)
+                    continue
+                self.flushing = True
+                requested = self.pending
+                self.condition.release()
+                try:
+                    self._run_flush(requested)
+                finally:
+                    self.condition.acquire()
+
+    def start(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stopping = False
+        self.thread = threading.Thread(target=self.run, name="content-push-scheduler", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> dict | None:
+        """Stop the background thread and push whatever is still pending."""
+        with self.condition:
+            self.stopping = True
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+        with self.condition:
+            pending = self.pending
+        return self.flush_now() if pending else None
+
+    def stats(self) -> dict:
+        with self.condition:
+            metrics = dict(self.metrics)
+            pending = self.pending
+            last_result = self.last_result
+        # Without the scheduler every request would have been its own push.
+        metrics["pushes_saved"] = max(0, metrics["requests"] - pending - metrics["pushes"])
+        return {
+            "interval": self.interval,
+            "pending": pending,
+            "next_push_in": self.seconds_until_push(),
+            "metrics": metrics,
+            "last_result": last_result,
+        }
@@ -0,0 +1,106 @@
+"""Keep a local copy of the content remote's branch fresh in the background.
+
+Content sync jobs used to fetch from the remote before every rebase. With
+the poller running, a job rebases onto the commit it fetched most recently,
+so the objects are already local and the job's own fetch only has to confirm
+that the branch has not moved since.
+
+Polls are spaced ``interval`` seconds apart with random jitter, so several
+servers sharing one remote do not fetch in lockstep. After a failure, the
+delay doubles with each further failure up to ``max_backoff``.
+"""
+
+import random
+import threading
+import time
+
+
+class RemotePoller:
+    def __init__(
+        self,
+        fetch,
+        interval: float,
+        *,
+        max_backoff: float = 600.0,
+        jitter: float = 0.2,
+        clock=time.monotonic,
+        rng: random.Random | None = None,
+    ):
+        """``fetch()`` updates the local ref and returns the commit it now points to."""
+        self.fetch = fetch
+        self.interval = interval
+        self.max_backoff = max(max_backoff, interval)
+        self.jitter = jitter
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread: threading.Thread | None = None
+        self.commit: str | None = None
+        self.fetched_at: float | None = None
+        self.failures = 0
+        self.last_error: str | None = None
+        self.polls = 0
+
+    def next_delay(self) -> float:
+        with self.lock:
+            failures = self.failures
+        delay = min(self.interval * (2 ** failures), self.max_backoff)
+        return delay * self.rng.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def poll_once(self) -> bool:
+        try:
+            commit = self.fetch()
+        except Exception as error:
+            with self.lock:
+                self.polls += 1
+                self.failures += 1
+                self.last_error = str(error)
+            return False
+        with self.lock:
+            self.polls += 1
+            self.commit = commit
+            self.fetched_at = self.clock()
+            self.failures = 0
+            self.last_error = None
+        return True
+
+    def fresh_commit(self, max_age: float | None = None) -> str | None:
+        """Return the last fetched commit, or None if it is older than ``max_age``.
+
+        The default age allows one late poll before the copy counts as stale.
+        """
+        max_age = 2 * self.interval if max_age is None else max_age
+        with self.lock:
+            if self.commit is None or self.fetched_at is None:
+                return None
+            if self.clock() - self.fetched_at > max_age:
+                return None
+            return self.commit
+
+    def run(self):
+        while not self.stop_event.is_set():
+            self.poll_once()
+            self.stop_event.wait(self.next_delay())
+
+    def start(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name="content-remote-poller", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def stats(self) -> dict:
+        with self.lock:
+            age = None if self.fetched_at is None else round(self.clock() - self.fetched_at, 3)
+            return {
+                "interval": self.interval,
+                "commit": self.commit,
+                "age": age,
+                "polls": self.polls,
+                "failures": self.failures,
+                "last_error": self.last_error,
+            }
@@ -0,0 +1,58 @@
+"""A bounded least-recently-used cache for rendered songs.
+
+Entries are keyed by the song source revision, so an edited song simply
+stops being asked for and ages out; nothing has to be invalidated.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class RenderCache:
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries: OrderedDict[tuple, dict] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple) -> dict | None:
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return value
+
+    def put(self, key: tuple, value: dict):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_render(self, key: tuple, render) -> dict:
+        """Return the cached value for ``key`` or store what ``render()`` returns."""
+        value = self.get(key)
+        if value is not None:
+            return value
+        # Render outside the lock; two racing misses render the same thing twice.
+        value = render()
+        self.put(key, value)
+        return value
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
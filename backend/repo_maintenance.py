@@ -0,0 +1,165 @@
+"""Background housekeeping for the content repository.
+
+Every save adds commits and every sync fetches and rebases, but nothing
+repacked or pruned the repository, so fetch and rebase slowed down as
+history grew. This scheduler runs git's housekeeping commands, each on its
+own schedule. It only runs while the server is idle: the song mutation lock
+must be free and nobody may have held it for ``idle_after`` seconds. It
+takes that lock for one task at a time, so a save that arrives waits for
+at most one task, and the git processes run at the lowest CPU priority.
+"""
+
+import shutil
+import subprocess
+import threading
+import time
+
+HOUR = 3600.0
+DAY = 24 * HOUR
+
+# name -> (seconds between runs, git arguments)
+MAINTENANCE_TASKS = {
+    "commit-graph": (HOUR, ["commit-graph", "write", "--reachable", "--changed-paths"]),
+    "repack": (DAY, ["repack", "-d", "-l", "--geometric=2", "--write-midx"]),
+    "prune": (7 * DAY, ["prune", "--expire=2.weeks.ago"]),
+}
+
+
+def repo_size(repo_dir: str) -> dict:
+    """Return object counts and sizes (in KiB) from ``git count-objects -v``."""
+    output = subprocess.run(
+        ["git", "count-objects", "-v"],
+        cwd=repo_dir,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    size = {}
+    for line in output.splitlines():
+        name, _, value = line.partition(":")
+        if value.strip().isdigit():
+            size[name.strip().replace("-", "_")] = int(value)
+    return size
+
+
+class RepoMaintenance:
+    def __init__(
+        self,
+        repo_dir_getter,
+        lock,
+        *,
+        tasks: dict[str, tuple[float, list[str]]] = MAINTENANCE_TASKS,
+        idle_after: float = 300.0,
+        check_interval: float = 60.0,
+        clock=time.monotonic,
+    ):
+        """``lock`` is the song mutation lock; it must offer ``idle_for()``."""
+        self.repo_dir_getter = repo_dir_getter
+        self.lock = lock
+        self.tasks = tasks
+        self.idle_after = idle_after
+        self.check_interval = check_interval
+        self.clock = clock
+        self.state_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread: threading.Thread | None = None
+        self.last_runs: dict[str, dict] = {}
+        self.size: dict | None = None
+        self.skipped_busy = 0
+
+    def due_tasks(self) -> list[str]:
+        now = self.clock()
+        with self.state_lock:
+            return [
+                name
+                for name, (interval, _args) in self.tasks.items()
+                if name not in self.last_runs or now - self.last_runs[name]["finished_at"] >= interval
+            ]
+
+    def command(self, args: list[str]) -> list[str]:
+        nice = shutil.which("nice")
+        return [nice, "-n", "19", "git", *args] if nice else ["git", *args]
+
+    def run_task(self, repo_dir: str, name: str) -> dict:
+        started = self.clock()
+        try:
+            subprocess.run(
+                self.command(self.tasks[name][1]),
+                cwd=repo_dir,
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+            ok, error = True, None
+        except (OSError, subprocess.CalledProcessError) as failure:
+            ok = False
+            error = (getattr(failure, "stderr", None) or str(failure)).strip()
+        finished = self.clock()
+        return {"ok": ok, "error": error, "duration": round(finished - started, 3), "finished_at": finished}
+
+    def run_due(self, force: bool = False) -> list[str]:
+        """Run every due task the server is idle for; return the names that ran."""
+        repo_dir = self.repo_dir_getter()
+        if not repo_dir:
+            return []
+        ran = []
+        for name in self.due_tasks():
+            if not force and self.lock.idle_for() < self.idle_after:
+                break
+            if not self.lock.acquire(blocking=False):
+                with self.state_lock:
+                    self.skipped_busy += 1
+                break
+            try:
+                result = self.run_task(repo_dir, name)
+            finally:
+                # Housekeeping is not activity; it must not postpone itself.
+                self.lock.release(activity=False)
+            if not result["ok"]:
+                print(f"Content repo maintenance task {name} failed: {result['error']}")
+            with self.state_lock:
+                self.last_runs[name] = result
+            ran.append(name)
+        if ran:
+            try:
+                size = repo_size(repo_dir)
+            except (OSError, subprocess.CalledProcessError):
+                size = None
+            with self.state_lock:
+                self.size = size
+        return ran
+
+    def run(self):
+        while not self.stop_event.wait(self.check_interval):
+            self.run_due()
+
+    def start(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name="content-repo-maintenance", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def stats(self) -> dict:
+        now = self.clock()
+        with self.state_lock:
+            tasks = {}
+            for name, (interval, _args) in self.tasks.items():
+                last = self.last_runs.get(name)
+                tasks[name] = {
+                    "interval": interval,
+                    "ok": None if last is None else last["ok"],
+                    "duration": None if last is None else last["duration"],
+                    "error": None if last is None else last["error"],
+                    "seconds_since_run": None if last is None else round(now - last["finished_at"], 3),
+                }
+            return {
+                "idle_after": self.idle_after,
+                "idle_for": round(self.lock.idle_for(), 3),
+                "skipped_busy": self.skipped_busy,
+                "size": self.size,
+                "tasks": tasks,
+            }
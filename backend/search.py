@@ -0,0 +1,251 @@
+"""In-memory full-text search over the song catalogue.
+
+Every song is tokenized into titles, interpreters, categories and lyrics. A
+token's posting list is a sorted ``array`` of ``doc << FIELD_BITS | fields``
+values, so a 50k song catalogue costs a few bytes per (token, song) pair
+instead of a dict entry. Document numbers only grow, which keeps appends
+sorted; an update removes the old postings and indexes the song under a new
+number. Typos are tolerated by expanding unknown query terms to vocabulary
+tokens that share enough trigrams.
+"""
+
+import bisect
+import re
+import threading
+import unicodedata
+from array import array
+
+from backend.chordpro import song_lyrics
+
+FIELD_WEIGHTS = {"title": 8.0, "interpret": 4.0, "categories": 3.0, "lyrics": 1.0}
+FIELD_MASKS = {field: 1 << position for position, field in enumerate(FIELD_WEIGHTS)}
+FIELD_BITS = len(FIELD_WEIGHTS)
+FIELD_MASK = (1 << FIELD_BITS) - 1
+MASK_WEIGHTS = [
+    sum(weight for field, weight in FIELD_WEIGHTS.items() if mask & FIELD_MASKS[field])
+    for mask in range(1 << FIELD_BITS)
+]
+MAX_DOCUMENT_NUMBER = (1 << (32 - FIELD_BITS)) - 1
+TOKEN_RE = re.compile(r"[^\W_]+")
+MAX_PREFIX_EXPANSIONS = 30
+MAX_FUZZY_EXPANSIONS = 10
+MIN_FUZZY_TERM_LENGTH = 3
+MIN_FUZZY_SIMILARITY = 0.5
+PREFIX_MATCH_QUALITY = 0.8
+FUZZY_MATCH_QUALITY = 0.6
+TITLE_PREFIX_BONUS = 10.0
+TITLE_EXACT_BONUS = 20.0
+
+
+def fold_text(text: str) -> str:
+    """Casefold and strip accents so "Ježíš" matches "jezis"."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_RE.findall(fold_text(text))
+
+
+def trigrams(token: str) -> set[str]:
+    padded = f"  {token} "
+    return {padded[position:position + 3] for position in range(len(padded) - 2)}
+
+
+def unique_terms(query: str) -> list[str]:
+    return list(dict.fromkeys(tokenize(query)))
+
+
+class SongSearchIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.token_numbers: dict[str, int] = {}
+        self.tokens: list[str] = []
+        self.sorted_tokens: list[str] = []
+        self.postings: list[array] = []
+        self.trigram_tokens: dict[str, array] = {}
+        self.token_trigram_counts = array("H")
+        self.document_numbers: dict[str, int] = {}
+        self.documents: dict[int, dict] = {}
+        self.document_tokens: dict[int, array] = {}
+        self.next_document_number = 0
+
+    def __len__(self) -> int:
+        return len(self.document_numbers)
+
+    def token_number(self, token: str) -> int:
+        number = self.token_numbers.get(token)
+        if number is not None:
+            return number
+        number = len(self.tokens)
+        self.token_numbers[token] = number
+        self.tokens.append(token)
+        self.postings.append(array("I"))
+        bisect.insort(self.sorted_tokens, token)
+        token_trigrams = trigrams(token)
+        self.token_trigram_counts.append(min(len(token_trigrams), 0xFFFF))
+        for trigram in token_trigrams:
+            self.trigram_tokens.setdefault(trigram, array("I")).append(number)
+        return number
+
+    def update(self, filename: str, song: dict):
+        """Index or re-index one parsed song (see backend.chordpro.parse_chordpro)."""
+        fields = {}
+        for field, text in (
+            ("title", song["title"]),
+            ("interpret", song.get("interpret") or ""),
+            ("categories", " ".join(song.get("categories") or [])),
+            ("lyrics", "\n".join(song_lyrics(song))),
+        ):
+            for token in tokenize(text):
+                fields[token] = fields.get(token, 0) | FIELD_MASKS[field]
+
+        with self.lock:
+            self._remove(filename)
+            if self.next_document_number > MAX_DOCUMENT_NUMBER:
+                self._renumber()
+            number = self.next_document_number
+            self.next_document_number += 1
+            token_numbers = array("I")
+            for token, mask in fields.items():
+                token_number = self.token_number(token)
+                self.postings[token_number].append(number << FIELD_BITS | mask)
+                token_numbers.append(token_number)
+            self.document_numbers[filename] = number
+            self.document_tokens[number] = token_numbers
+            self.documents[number] = {
+                "filename": filename,
+                "id": song["id"],
+                "title": song["title"],
+                "key": song.get("key"),
+                "interpret": song.get("interpret"),
+                "categories": list(song.get("categories") or []),
+                "folded_title": fold_text(song["title"]).strip(),
+            }
+
+    def remove(self, filename: str):
+        with self.lock:
+            self._remove(filename)
+
+    def filenames(self) -> set[str]:
+        with self.lock:
+            return set(self.document_numbers)
+
+    def _remove(self, filename: str):
+        number = self.document_numbers.pop(filename, None)
+        if number is None:
+            return
+        del self.documents[number]
+        lowest = number << FIELD_BITS
+        for token_number in self.document_tokens.pop(number):
+            postings = self.postings[token_number]
+            position = bisect.bisect_left(postings, lowest)
+            if position < len(postings) and postings[position] >> FIELD_BITS == number:
+                del postings[position]
+
+    def _renumber(self):
+        """Compact document numbers once they would overflow the posting encoding."""
+        mapping = {old: new for new, old in enumerate(sorted(self.documents))}
+        for position, postings in enumerate(self.postings):
+            self.postings[position] = array(
+                "I",
+                (mapping[value >> FIELD_BITS] << FIELD_BITS | value & FIELD_MASK for value in postings),
+            )
+        self.documents = {mapping[old]: document for old, document in self.documents.items()}
+        self.document_tokens = {mapping[old]: tokens for old, tokens in self.document_tokens.items()}
+        self.document_numbers = {filename: mapping[old] for filename, old in self.document_numbers.items()}
+        self.next_document_number = len(mapping)
+
+    def term_candidates(self, term: str, *, allow_prefix: bool) -> list[tuple[int, float]]:
+        """Return (token number, match quality) pairs for one query term."""
+        candidates = {}
+        exact = self.token_numbers.get(term)
+        if exact is not None and self.postings[exact]:
+            candidates[exact] = 1.0
+
+        if allow_prefix:
+            position = bisect.bisect_right(self.sorted_tokens, term)
+            for token in self.sorted_tokens[position:position + MAX_PREFIX_EXPANSIONS]:
+                if not token.startswith(term):
+                    break
+                candidates.setdefault(self.token_numbers[token], PREFIX_MATCH_QUALITY)
+
+        if not candidates and len(term) >= MIN_FUZZY_TERM_LENGTH:
+            term_trigrams = trigrams(term)
+            shared = {}
+            for trigram in term_trigrams:
+                for token_number in self.trigram_tokens.get(trigram, ()):
+                    shared[token_number] = shared.get(token_number, 0) + 1
+            similar = []
+            for token_number, count in shared.items():
+                similarity = 2 * count / (len(term_trigrams) + self.token_trigram_counts[token_number])
+                if similarity < MIN_FUZZY_SIMILARITY or not self.postings[token_number]:
+                    continue
+                if abs(len(self.tokens[token_number]) - len(term)) <= 2:
+                    similar.append((similarity, token_number))
+            similar.sort(reverse=True)
+            for similarity, token_number in similar[:MAX_FUZZY_EXPANSIONS]:
+                candidates[token_number] = FUZZY_MATCH_QUALITY * similarity
+        return list(candidates.items())
+
+    def term_scores(self, term: str, *, allow_prefix: bool) -> dict[int, tuple[float, int]]:
+        """Score every document matching a term, keeping its best match and fields."""
+        scores = {}
+        for token_number, quality in self.term_candidates(term, allow_prefix=allow_prefix):
+            for value in self.postings[token_number]:
+                number = value >> FIELD_BITS
+                mask = value & FIELD_MASK
+                score = quality * MASK_WEIGHTS[mask]
+                previous = scores.get(number)
+                if previous is None:
+                    scores[number] = (score, mask)
+                else:
+                    scores[number] = (max(previous[0], score), previous[1] | mask)
+        return scores
+
+    def search(self, query: str, *, limit: int = 20, offset: int = 0) -> dict:
+        """Rank songs matching every query term; the last term also matches as a prefix."""
+        terms = unique_terms(query)
+        if not terms:
+            return {"query": query, "total": 0, "results": []}
+
+        folded_query = " ".join(terms)
+        with self.lock:
+            per_term = [
+                self.term_scores(term, allow_prefix=position == len(terms) - 1)
+                for position, term in enumerate(terms)
+            ]
+            per_term.sort(key=len)
+            matches = {}
+            for number, (score, mask) in per_term[0].items():
+                total = score
+                for scores in per_term[1:]:
+                    match = scores.get(number)
+                    if match is None:
+                        break
+                    total += match[0]
+                    mask |= match[1]
+                else:
+                    matches[number] = (total, mask)
+
+            ranked = []
+            for number, (score, mask) in matches.items():
+                document = self.documents[number]
+                title = " ".join(tokenize(document["folded_title"]))
+                if title == folded_query:
+                    score += TITLE_EXACT_BONUS
+                elif title.startswith(folded_query):
+                    score += TITLE_PREFIX_BONUS
+                ranked.append((-score, document["folded_title"], document["filename"], mask, number))
+            ranked.sort()
+
+            results = []
+            for negative_score, _title, _filename, mask, number in ranked[offset:offset + limit]:
+                document = self.documents[number]
+                results.append({
+                    **{key: value for key, value in document.items() if key != "folded_title"},
+                    "categories": list(document["categories"]),
+                    "score": round(-negative_score, 3),
+                    "matched_fields": [field for field, bit in FIELD_MASKS.items() if mask & bit],
+                })
+        return {"query": query, "total": len(ranked), "results": results}
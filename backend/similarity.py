@@ -0,0 +1,163 @@
+"""Similar-song recommendations from chord progressions and categories.
+
+Each song becomes one unit-length row of a contiguous float32 matrix:
+
+* a histogram of chords by scale degree and quality (major, minor,
+  diminished) relative to the song's key,
+* a histogram of chord transitions by root interval and the two qualities,
+* one column per category.
+
+Because the chord features are relative to the key, the same progression
+in G and in D looks identical. Rows are unit length, so ranking the whole
+catalogue against one song is a single matrix-vector product. An update
+rewrites only that song's row; removed rows are zeroed and reused.
+"""
+
+import threading
+
+import numpy as np
+
+from backend.chords import NOTE_SEQUENCE, chord_identity, key_root, normalize_root
+from backend.search import fold_text
+
+QUALITY_CLASSES = 3
+DEGREE_FEATURES = 12 * QUALITY_CLASSES
+TRANSITION_FEATURES = 12 * QUALITY_CLASSES * QUALITY_CLASSES
+CHORD_FEATURES = DEGREE_FEATURES + TRANSITION_FEATURES
+DEGREE_WEIGHT = 0.5
+TRANSITION_WEIGHT = 0.7
+CATEGORY_WEIGHT = 0.5
+
+
+def quality_class(quality: str) -> int:
+    if quality.startswith(("dim", "°", "ø")):
+        return 2
+    if quality.startswith("m") and not quality.startswith("maj"):
+        return 1
+    return 0
+
+
+def song_chord_sequence(song: dict) -> list[tuple[int, int]]:
+    """Return (root semitone, quality class) for every chord in playing order."""
+    sequence = []
+    for section in song["sections"]:
+        for line in section["lines"]:
+            for token in line["tokens"]:
+                identity = chord_identity(token["chord"]) if token["chord"] else None
+                if identity is not None:
+                    sequence.append((identity[0], quality_class(identity[1])))
+    return sequence
+
+
+def song_tonic(song: dict, sequence: list[tuple[int, int]]) -> int:
+    root = key_root(song.get("key") or "")
+    normalized = normalize_root(root) if root else None
+    if normalized in NOTE_SEQUENCE:
+        return NOTE_SEQUENCE.index(normalized)
+    return sequence[0][0] if sequence else 0
+
+
+def unit(vector: np.ndarray) -> np.ndarray:
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+def chord_features(song: dict) -> np.ndarray:
+    sequence = song_chord_sequence(song)
+    tonic = song_tonic(song, sequence)
+    degrees = np.zeros(DEGREE_FEATURES, dtype=np.float32)
+    transitions = np.zeros(TRANSITION_FEATURES, dtype=np.float32)
+    previous = None
+    for root, quality in sequence:
+        degrees[((root - tonic) % 12) * QUALITY_CLASSES + quality] += 1
+        if previous is not None and previous != (root, quality):
+            interval = (root - previous[0]) % 12
+            transitions[(interval * QUALITY_CLASSES + previous[1]) * QUALITY_CLASSES + quality] += 1
+        previous = (root, quality)
+    # Square roots keep one chord repeated for every verse from dominating.
+    return np.concatenate((
+        DEGREE_WEIGHT * unit(np.sqrt(degrees)),
+        TRANSITION_WEIGHT * unit(np.sqrt(transitions)),
+    ))
+
+
+class SongSimilarityIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rows: dict[str, int] = {}
+        self.free_rows: list[int] = []
+        self.documents: dict[int, dict] = {}
+        self.categories: dict[str, int] = {}
+        self.matrix = np.zeros((0, CHORD_FEATURES), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _grow(self, rows: int, columns: int):
+        height, width = self.matrix.shape
+        if rows <= height and columns <= width:
+            return
+        # Grow rows geometrically and leave spare columns for new categories.
+        new_height = height if rows <= height else max(rows, height * 2, 64)
+        new_width = width if columns <= width else columns + 32
+        grown = np.zeros((new_height, new_width), dtype=np.float32)
+        grown[:height, :width] = self.matrix
+        self.matrix = grown
+
+    def update(self, filename: str, song: dict):
+        chords = chord_features(song)
+        category_keys = {fold_text(category) for category in song.get("categories") or []}
+        with self.lock:
+            for category in sorted(category_keys):
+                self.categories.setdefault(category, CHORD_FEATURES + len(self.categories))
+            row = self.rows.get(filename)
+            if row is None:
+                row = self.free_rows.pop() if self.free_rows else len(self.rows)
+            self._grow(row + 1, CHORD_FEATURES + len(self.categories))
+
+            vector = np.zeros(self.matrix.shape[1], dtype=np.float32)
+            vector[:CHORD_FEATURES] = chords
+            if category_keys:
+                columns = [self.categories[category] for category in category_keys]
+                vector[columns] = CATEGORY_WEIGHT / np.sqrt(len(columns))
+            self.matrix[row] = unit(vector)
+            self.rows[filename] = row
+            self.documents[row] = {
+                "filename": filename,
+                "id": song["id"],
+                "title": song["title"],
+                "key": song.get("key"),
+                "interpret": song.get("interpret"),
+                "categories": list(song.get("categories") or []),
+            }
+
+    def remove(self, filename: str):
+        with self.lock:
+            row = self.rows.pop(filename, None)
+            if row is None:
+                return
+            self.matrix[row] = 0
+            del self.documents[row]
+            self.free_rows.append(row)
+
+    def similar(self, filename: str, limit: int = 10) -> list[dict] | None:
+        """Return the songs most similar to ``filename``, or None if it is not indexed."""
+        with self.lock:
+            row = self.rows.get(filename)
+            if row is None:
+                return None
+            used = len(self.rows) + len(self.free_rows)
+            scores = self.matrix[:used] @ self.matrix[row]
+            scores[row] = -1
+            if self.free_rows:
+                scores[self.free_rows] = -1
+            count = min(limit, len(self.rows) - 1)
+            if count <= 0:
+                return []
+            best = np.argpartition(-scores, count - 1)[:count]
+            best = best[np.argsort(-scores[best], kind="stable")]
+            return [
+                {**self.documents[int(other)], "score": round(float(scores[other]), 4)}
+                for other in best
+                if scores[other] > 0
+            ]
@@ -0,0 +1,66 @@
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from backend.archive import ArchiveEntry, archive_length, iter_archive_bytes, tar_segments, zip_segments
+
+
+@pytest.fixture
+def entries(tmp_path):
+    files = {
+        "songs/amazing-grace.pro": "{title: Amazing Grace}\n[G]Amazing grace\n",
+        "songs/ünïcode.pro": "{title: Ünïcode}\n",
+        "data/songs.index.json": "[]" * 400,
+    }
+    result = []
+    for index, (name, content) in enumerate(files.items()):
+        path = tmp_path / str(index)
+        path.write_text(content, encoding="utf-8")
+        result.append(ArchiveEntry(name, str(path), path.stat().st_size, path.stat().st_mtime))
+    return result, files
+
+
+@pytest.mark.parametrize("build_segments", [tar_segments, zip_segments])
+def test_archive_length_matches_streamed_bytes(entries, build_segments):
+    archive_entries, _files = entries
+    segments = build_segments(archive_entries)
+
+    payload = b"".join(iter_archive_bytes(segments))
+
+    assert len(payload) == archive_length(segments)
+
+
+def test_zip_export_is_readable(entries):
+    archive_entries, files = entries
+
+    payload = b"".join(iter_archive_bytes(zip_segments(archive_entries)))
+
+    with zipfile.ZipFile(io.BytesIO(payload)) as bundle:
+        assert bundle.testzip() is None
+        assert {name: bundle.read(name).decode("utf-8") for name in bundle.namelist()} == files
+
+
+def test_tar_export_is_readable(entries):
+    archive_entries, files = entries
+
+    payload = b"".join(iter_archive_bytes(tar_segments(archive_entries)))
+
+    with tarfile.open(fileobj=io.BytesIO(payload)) as bundle:
+        assert {
+            member.name: bundle.extractfile(member).read().decode("utf-8") for member in bundle
+        } == files
+
+
+def test_ranges_reassemble_the_full_archive(entries):
+    archive_entries, _files = entries
+    segments = zip_segments(archive_entries)
+    full = b"".join(iter_archive_bytes(segments))
+
+    pieces = [
+        b"".join(iter_archive_bytes(segments, start, min(start + 97, len(full))))
+        for start in range(0, len(full), 97)
+    ]
+
+    assert b"".join(pieces) == full
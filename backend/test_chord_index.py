@@ -0,0 +1,68 @@
+import pytest
+
+from backend.chord_index import SongChordIndex, song_chords
+from backend.chordpro import parse_chordpro
+
+
+def indexed(*sources: str) -> SongChordIndex:
+    index = SongChordIndex()
+    for source in sources:
+        song = parse_chordpro(source)
+        index.update(f"{song['id']}.pro", song)
+    return index
+
+
+def titles(result: dict) -> list[str]:
+    return [song["title"] for song in result["results"]]
+
+
+def test_song_chords_normalize_spelling_and_ignore_bass_and_labels():
+    song = parse_chordpro("{title: A}\n[Bb]One [A#/D]two [Bridge]three [N.C.]four [Em7]five\n")
+
+    assert song_chords(song) == {(10, ""), (4, "m7")}
+
+
+def test_subset_query_returns_only_playable_songs():
+    index = indexed(
+        "{title: Amazing}\n[G]One [C]two [D]three\n",
+        "{title: Blessed}\n[G]One [Em]two\n",
+        "{title: Crown}\n[G]One [Bm]two\n",
+        "{title: Silent}\nNo chords here\n",
+    )
+
+    result = index.query(["G", "C", "D", "Em"])
+
+    assert titles(result) == ["Amazing", "Blessed"]
+    assert result["total"] == 2
+    assert result["results"][0]["missing"] == []
+
+
+def test_transposed_query_reports_smallest_shift():
+    index = indexed(
+        "{title: In A}\n{key: A}\n[A]One [D]two [E]three [F#m]four\n",
+        "{title: In G}\n{key: G}\n[G]One [C]two\n",
+    )
+
+    assert titles(index.query(["G", "C", "D", "Em"])) == ["In G"]
+    result = index.query(["G", "C", "D", "Em"], transpose=True)
+    assert [(song["title"], song["steps"]) for song in result["results"]] == [("In A", -2), ("In G", 0)]
+    assert result["results"][0]["chords"] == ["C", "D", "Em", "G"]
+
+
+def test_max_missing_ranks_by_missing_chords_and_pages():
+    index = indexed(
+        "{title: Two Extra}\n[G]One [B7]two [F]three\n",
+        "{title: Fits}\n[G]One [C]two\n",
+        "{title: One Extra}\n[G]One [B7]two\n",
+    )
+
+    result = index.query(["G", "C"], max_missing=2)
+
+    assert titles(result) == ["Fits", "One Extra", "Two Extra"]
+    assert result["results"][2]["missing"] == ["B7", "F"]
+    assert titles(index.query(["G", "C"], max_missing=2, limit=1, offset=1)) == ["One Extra"]
+
+
+def test_query_rejects_unreadable_chords():
+    with pytest.raises(ValueError):
+        indexed().query(["G", "Refrain"])
@@ -0,0 +1,44 @@
+from backend.chordpro import parse_chordpro, parse_tokens, song_lyrics
+
+
+def test_parse_chordpro_matches_builder_metadata_rules():
+    song = parse_chordpro(
+        "{title: First Title}\n"
+        "{title: Ježíš Kristus}\n"
+        "{artist: Someone}\n"
+        "{categories: Advent; Worship, advent}\n"
+        "{category:  Christmas   Songs }\n"
+        "{key: G}\n"
+        "\n"
+        "{section: Chorus}\n"
+        "[G]Glory to [C]God\n"
+    )
+
+    assert song["id"] == "je-kristus"
+    assert song["title"] == "Ježíš Kristus"
+    assert song["interpret"] == "Someone"
+    assert song["key"] == "G"
+    assert song["categories"] == ["Advent", "Worship", "Christmas Songs"]
+    assert [section["name"] for section in song["sections"]] == ["Chorus"]
+    assert song_lyrics(song) == ["Glory to God"]
+
+
+def test_parse_tokens_keeps_lyric_before_first_chord():
+    assert parse_tokens("Oh [G]come [D7]all") == [
+        {"chord": None, "lyric": "Oh "},
+        {"chord": "G", "lyric": "come "},
+        {"chord": "D7", "lyric": "all"},
+    ]
+    assert parse_tokens("[Em]") == [{"chord": "Em", "lyric": ""}]
+
+
+def test_parse_tokens_stops_a_lyric_at_a_stray_bracket_like_the_frontend():
+    assert parse_tokens("x[C]foo [ bar") == [
+        {"chord": None, "lyric": "x"},
+        {"chord": "C", "lyric": "foo "},
+        {"chord": None, "lyric": "[ bar"},
+    ]
+    assert parse_tokens("[C]a [b [D]c") == [
+        {"chord": "C", "lyric": "a "},
+        {"chord": "b [D", "lyric": "c"},
+    ]
@@ -0,0 +1,75 @@
+import pytest
+
+from backend.chordpro import parse_chordpro
+from backend.chords import render_transposed_song, transpose_chord, transpose_delta
+from backend.render_cache import RenderCache
+
+
+@pytest.mark.parametrize("chord,steps,expected", [
+    ("F#", 1, "G"),
+    ("Bb", 2, "C"),
+    ("Db", -1, "C"),
+    ("F#m7", 1, "Gm7"),
+    ("Bbmaj7", -2, "G#maj7"),
+    ("C/E", 2, "D/F#"),
+    ("F#m7/C#", -2, "Em7/B"),
+    ("N.C.", 3, "N.C."),
+])
+def test_transpose_chord_matches_frontend(chord, steps, expected):
+    assert transpose_chord(chord, steps) == expected
+
+
+def test_transpose_delta_handles_flats_sharps_and_minor_keys():
+    assert transpose_delta("Bb", "C") == 2
+    assert transpose_delta("F#", "Eb") == -3
+    assert transpose_delta("F#m", "Bbm") == 4
+    assert transpose_delta(None, "C") == 0
+
+
+def test_render_uses_target_key_spelling_and_leaves_source_untouched():
+    song = parse_chordpro("{title: Grace}\n{key: C}\n[C/E]Amazing [F#]grace\n")
+
+    rendered = render_transposed_song(song, "Bb")
+
+    assert rendered["key"] == "Bb"
+    assert rendered["original_key"] == "C"
+    assert rendered["steps"] == -2
+    line = rendered["sections"][0]["lines"][0]
+    assert [token["chord"] for token in line["tokens"]] == ["Bb/D", "E"]
+    assert line["raw"] == "[Bb/D]Amazing [E]grace"
+    assert song["sections"][0]["lines"][0]["raw"] == "[C/E]Amazing [F#]grace"
+
+
+def test_render_respells_without_transposing():
+    song = parse_chordpro("{title: Grace}\n{key: Bb}\n[A#]Amazing\n")
+
+    rendered = render_transposed_song(song, None, "flat")
+
+    assert rendered["key"] == "Bb"
+    assert rendered["sections"][0]["lines"][0]["tokens"][0]["chord"] == "Bb"
+
+
+def test_render_cache_evicts_least_recently_used():
+    cache = RenderCache(max_entries=2)
+    rendered = []
+
+    def render(value):
+        rendered.append(value)
+        return {"value": value}
+
+    cache.get_or_render(("a",), lambda: render("a"))
+    cache.get_or_render(("b",), lambda: render("b"))
+    cache.get_or_render(("a",), lambda: render("a"))
+    cache.get_or_render(("c",), lambda: render("c"))
+    cache.get_or_render(("a",), lambda: render("a"))
+    cache.get_or_render(("b",), lambda: render("b"))
+
+    assert rendered == ["a", "b", "c", "b"]
+    assert cache.stats() == {
+        "entries": 2,
+        "max_entries": 2,
+        "hits": 2,
+        "misses": 4,
+        "evictions": 2,
+        "hit_rate": 0.3333,
+    }
@@ -0,0 +1,63 @@
+import pytest
+
+from backend.drafts import DraftStore, DraftTooLarge
+from backend.testing import FakeClock
+
+
+def test_drafts_are_kept_per_editor_and_replaced_on_save():
+    store = DraftStore(clock=FakeClock(1000.0))
+
+    store.save("phone", "song.pro", "first", "rev-1")
+    store.save("laptop", "song.pro", "other editor", "rev-1")
+    summary = store.save("phone", "song.pro", "second", "rev-1")
+
+    assert summary["size"] == len("second")
+    assert store.get("phone", "song.pro")["content"] == "second"
+    assert store.get("laptop", "song.pro")["content"] == "other editor"
+    assert [draft["filename"] for draft in store.list("phone")] == ["song.pro"]
+    assert store.stats()["total_bytes"] == len("second") + len("other editor")
+
+
+def test_drafts_expire_after_ttl():
+    clock = FakeClock(1000.0)
+    store = DraftStore(ttl=60, clock=clock)
+    store.save("phone", "song.pro", "draft", None)
+
+    clock.now += 61
+
+    assert store.get("phone", "song.pro") is None
+    assert store.stats()["metrics"]["expired"] == 1
+    assert store.stats()["total_bytes"] == 0
+
+
+def test_limits_drop_the_least_recently_saved_drafts():
+    clock = FakeClock(1000.0)
+    store = DraftStore(max_bytes=10, max_per_editor=2, max_total_bytes=20, clock=clock)
+
+    with pytest.raises(DraftTooLarge):
+        store.save("phone", "big.pro", "x" * 11, None)
+
+    for name in ["a.pro", "b.pro", "c.pro"]:
+        clock.now += 1
+        store.save("phone", name, "12345", None)
+    assert [draft["filename"] for draft in store.list("phone")] == ["c.pro", "b.pro"]
+
+    clock.now += 1
+    store.save("laptop", "d.pro", "1234567890", None)
+    clock.now += 1
+    store.save("laptop", "e.pro", "1234567890", None)
+    assert store.stats()["total_bytes"] <= 20
+    assert store.get("phone", "b.pro") is None
+    assert store.stats()["metrics"]["evicted"] == 3
+
+
+def test_discard_skips_a_draft_saved_again_since():
+    clock = FakeClock(1000.0)
+    store = DraftStore(clock=clock)
+    first = store.save("phone", "song.pro", "first", None)
+    clock.now += 1
+    store.save("phone", "song.pro", "second", None)
+
+    assert store.discard("phone", "song.pro", published=True, saved_at=first["saved_at"]) is False
+    assert store.discard("phone", "song.pro") is True
+    assert store.get("phone", "song.pro") is None
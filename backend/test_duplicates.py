@@ -0,0 +1,38 @@
+from backend.chordpro import parse_chordpro
+from backend.duplicates import SongDuplicateIndex, lyric_shingles
+
+VERSE = (
+    "[G]Amazing grace how [C]sweet the sound\n"
+    "That saved a wretch like me\n"
+    "I once was lost but now am found\n"
+    "Was blind but now I see\n"
+)
+
+
+def test_shingles_ignore_chords_case_and_accents():
+    plain = parse_chordpro("{title: A}\nJežíš je Pán\n")
+    chorded = parse_chordpro("{title: B}\n[G]JEZIS je [C]pan\n")
+
+    assert lyric_shingles(plain) == lyric_shingles(chorded) == {"jezis je pan"}
+
+
+def test_near_duplicates_are_found_and_updated_incrementally():
+    index = SongDuplicateIndex()
+    index.update("amazing-grace.pro", parse_chordpro("{title: Amazing Grace}\n" + VERSE))
+    index.update(
+        "amazing-grace-2.pro",
+        parse_chordpro("{title: Amazing Grace (alt)}\n" + VERSE.replace("Was blind", "Was blind,")),
+    )
+    index.update("other.pro", parse_chordpro("{title: Other}\nHoly holy holy Lord God almighty\n"))
+    index.update("empty.pro", parse_chordpro("{title: Empty}\n[G] [C]\n"))
+
+    result = index.duplicates()
+    assert [[song["filename"] for song in pair["songs"]] for pair in result["pairs"]] == [
+        ["amazing-grace-2.pro", "amazing-grace.pro"],
+    ]
+    assert result["pairs"][0]["similarity"] == 1.0
+    assert len(index) == 3
+
+    index.update("amazing-grace-2.pro", parse_chordpro("{title: Amazing Grace (alt)}\nA completely new text now\n"))
+    assert index.duplicates()["pairs"] == []
+    assert index.crowded == set()
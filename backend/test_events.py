@@ -0,0 +1,89 @@
+import asyncio
+import json
+
+from backend.events import CatalogueEventHub, CatalogueSubscriber
+from backend.test_generations import publish
+
+
+def test_subscriber_merges_pending_events():
+    subscriber = CatalogueSubscriber()
+    subscriber.offer({"generation": "generation-2", "since": "generation-1", "reload": False, "states": {"a": "added"}})
+    subscriber.offer({"generation": "generation-3", "since": "generation-2", "reload": False,
+                      "states": {"a": "updated", "b": "removed"}})
+
+    assert subscriber.pending == {
+        "generation": "generation-3",
+        "since": "generation-1",
+        "reload": False,
+        "states": {"a": "added", "b": "removed"},
+    }
+
+
+def test_subscriber_replaces_large_backlog_with_reload():
+    subscriber = CatalogueSubscriber(max_pending_ids=2)
+    subscriber.offer({"generation": "generation-2", "since": "generation-1", "reload": False,
+                      "states": {"a": "added", "b": "added"}})
+    subscriber.offer({"generation": "generation-3", "since": "generation-2", "reload": False,
+                      "states": {"c": "added"}})
+
+    assert subscriber.pending["reload"] is True
+    assert subscriber.pending["states"] == {}
+
+
+def test_hub_detects_new_generation(tmp_path):
+    output = publish(tmp_path, "generation-1", None, added=["a"])
+    hub = CatalogueEventHub()
+    hub.generation = "generation-1"
+
+    assert hub.detect(output) is None
+    publish(tmp_path, "generation-2", "generation-1", updated=["a"], added=["b"])
+    assert hub.detect(output) == {
+        "generation": "generation-2",
+        "since": "generation-1",
+        "reload": False,
+        "states": {"a": "updated", "b": "added"},
+    }
+    assert hub.detect(output) is None
+
+
+def test_stream_sends_coalesced_update_then_unsubscribes():
+    hub = CatalogueEventHub()
+    hub.generation = "generation-1"
+
+    async def exercise():
+        subscriber = hub.subscribe()
+        disconnect = asyncio.Event()
+
+        async def is_disconnected():
+            return disconnect.is_set()
+
+        frames = hub.stream(subscriber, is_disconnected, keepalive=0.01)
+        received = [await anext(frames), await anext(frames), await anext(frames)]
+        hub.broadcast({"generation": "generation-2", "since": "generation-1", "reload": False, "states": {"a": "added"}})
+        hub.broadcast({"generation": "generation-3", "since": "generation-2", "reload": False, "states": {"b": "updated"}})
+        while True:
+            frame = await anext(frames)
+            if frame.startswith(b"event:"):
+                received.append(frame)
+                break
+        disconnect.set()
+        async for _frame in frames:
+            pass
+        return received
+
+    received = asyncio.run(exercise())
+
+    assert received[0].startswith(b"retry:")
+    assert received[1] == b'event: catalogue-generation\ndata: {"generation":"generation-1"}\n\n'
+    assert received[2] == b": keepalive\n\n"
+    name, data = received[3].decode("utf-8").strip().split("\n")
+    assert name == "event: catalogue-updated"
+    assert json.loads(data.removeprefix("data: ")) == {
+        "generation": "generation-3",
+        "since": "generation-1",
+        "reload": False,
+        "added": ["a"],
+        "updated": ["b"],
+        "removed": [],
+    }
+    assert hub.subscribers == set()
@@ -0,0 +1,59 @@
+import pytest
+
+from backend.chordpro import parse_chordpro
+from backend.facets import SongFacetIndex
+
+
+def song(title, **meta):
+    directives = "".join(f"{{{tag}: {value}}}\n" for tag, value in meta.items())
+    return parse_chordpro(f"{{title: {title}}}\n{directives}")
+
+
+@pytest.fixture
+def index():
+    facets = SongFacetIndex()
+    facets.update("amazing-grace.pro", song("Amazing Grace", key="G", categories="Hymns, Classics", artist="John Newton"))
+    facets.update("be-thou.pro", song("Be Thou My Vision", key="D", category="hymns"))
+    facets.update("holy-night.pro", song("O Holy Night", key="G", category="Christmas"))
+    facets.update("zion.pro", song("Zion", key="Em", category="Worship", artist="john newton"))
+    return facets
+
+
+def titles(result):
+    return [item["title"] for item in result["songs"]]
+
+
+def test_filters_combine_across_facets_and_alternate_within_one(index):
+    assert titles(index.query({"category": ["HYMNS"]})) == ["Amazing Grace", "Be Thou My Vision"]
+    assert titles(index.query({"category": ["hymns"], "key": ["G"]})) == ["Amazing Grace"]
+    assert titles(index.query({"key": ["G", "Em"]})) == ["Amazing Grace", "O Holy Night", "Zion"]
+    assert titles(index.query({"interpreter": ["John Newton"]})) == ["Amazing Grace", "Zion"]
+    assert index.query({"key": ["g"]})["total"] == 0
+
+
+def test_facet_counts_ignore_their_own_filter(index):
+    result = index.query({"category": ["Hymns"]})
+
+    assert result["facets"]["category"][:2] == [
+        {"value": "Hymns", "count": 2},
+        {"value": "Christmas", "count": 1},
+    ]
+    assert result["facets"]["key"] == [{"value": "D", "count": 1}, {"value": "G", "count": 1}]
+
+
+def test_cursor_pages_stay_consistent_across_updates(index):
+    first = index.query({}, limit=2)
+    assert titles(first) == ["Amazing Grace", "Be Thou My Vision"]
+
+    index.update("a-new-song.pro", song("A New Song"))
+    index.remove("holy-night.pro")
+    second = index.query({}, limit=2, cursor=first["next_cursor"])
+
+    assert titles(second) == ["Zion"]
+    assert second["next_cursor"] is None
+    assert index.query({}, limit=2)["facets"]["key"][0] == {"value": "D", "count": 1}
+
+
+def test_invalid_cursor_is_rejected(index):
+    with pytest.raises(ValueError):
+        index.query({}, cursor="not-a-cursor")
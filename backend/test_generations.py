@@ -0,0 +1,59 @@
+import json
+
+from backend.generations import active_generation, changes_since, merge_change_sets
+
+
+def publish(root, name, previous, *, added=(), updated=(), removed=(), record=True):
+    generations = root / ".data-generations"
+    generation_dir = generations / name
+    generation_dir.mkdir(parents=True)
+    change_set = {
+        "version": 1,
+        "generation": name,
+        "previous": previous,
+        "added": list(added),
+        "updated": list(updated),
+        "removed": list(removed),
+    }
+    (generation_dir / "changes.json").write_text(json.dumps(change_set), encoding="utf-8")
+    if record:
+        (generations / "changes").mkdir(exist_ok=True)
+        (generations / "changes" / f"{name}.json").write_text(json.dumps(change_set), encoding="utf-8")
+    output = root / "data"
+    if output.is_symlink():
+        output.unlink()
+    output.symlink_to(generation_dir)
+    return str(output)
+
+
+def test_changes_since_merges_the_chain_to_the_requested_generation(tmp_path):
+    publish(tmp_path, "generation-1", None, added=["a", "b"])
+    publish(tmp_path, "generation-2", "generation-1", added=["c"], updated=["a"])
+    output = publish(tmp_path, "generation-3", "generation-2", removed=["c", "b"], updated=["a"])
+
+    assert active_generation(output) == "generation-3"
+    assert changes_since(output, "generation-1")["states"] == {"a": "updated", "b": "removed"}
+    assert changes_since(output, "generation-3") == {"generation": "generation-3", "reload": False, "states": {}}
+
+
+def test_changes_since_requests_reload_when_history_is_missing(tmp_path):
+    publish(tmp_path, "generation-1", None, added=["a"])
+    output = publish(tmp_path, "generation-2", "generation-1", updated=["a"])
+
+    assert changes_since(output, "generation-0")["reload"] is True
+    assert changes_since(output, "not a generation")["reload"] is True
+
+
+def test_change_set_inside_generation_covers_an_unrecorded_publish(tmp_path):
+    publish(tmp_path, "generation-1", None, added=["a"])
+    output = publish(tmp_path, "generation-2", "generation-1", added=["b"], record=False)
+
+    assert changes_since(output, "generation-1")["states"] == {"b": "added"}
+
+
+def test_merge_treats_remove_then_add_as_update():
+    assert merge_change_sets([
+        {"added": [], "updated": [], "removed": ["a"]},
+        {"added": ["a", "b"], "updated": [], "removed": []},
+        {"added": [], "updated": ["b"], "removed": []},
+    ]) == {"a": "updated", "b": "added"}
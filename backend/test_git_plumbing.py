@@ -0,0 +1,81 @@
+import pytest
+
+from backend.git_plumbing import CliGitPlumbing, DulwichGitPlumbing, plumbing_backend
+from backend.testing import run_git
+
+BACKENDS = [CliGitPlumbing, DulwichGitPlumbing]
+
+
+@pytest.fixture
+def repo(tmp_path):
+    remote = tmp_path / "remote.git"
+    repo = tmp_path / "content"
+    run_git(tmp_path, "init", "--bare", "-b", "main", str(remote))
+    run_git(tmp_path, "init", "-b", "main", str(repo))
+    run_git(repo, "remote", "add", "origin", str(remote))
+    (repo / ".gitignore").write_text(".DS_Store\n", encoding="utf-8")
+    (repo / "songs").mkdir()
+    (repo / "songs" / "kept.pro").write_text("{title: Kept}\n", encoding="utf-8")
+    (repo / "songs" / "doomed.pro").write_text("{title: Doomed}\n", encoding="utf-8")
+    (repo / "README.md").write_text("songs\n", encoding="utf-8")
+    run_git(repo, "add", ".")
+    run_git(repo, "-c", "user.name=Test", "-c", "user.email=test@example.com", "commit", "-m", "Initial")
+    run_git(repo, "push", "-u", "origin", "main")
+    return repo
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_add_and_commit_a_single_file(repo, backend):
+    git = backend(str(repo))
+    (repo / "songs" / "kept.pro").write_text("{title: Kept}\n{key: G}\n", encoding="utf-8")
+    (repo / "README.md").write_text("edited elsewhere\n", encoding="utf-8")
+
+    assert git.status("songs/kept.pro") == (False, True)
+    git.add("songs/kept.pro")
+    assert git.status("songs/kept.pro") == (True, True)
+    assert git.status("songs/doomed.pro") == (False, True)
+
+    git.commit("Update song: kept.pro", "Holy Songs Bot", "bot@local")
+
+    assert run_git(repo, "log", "-1", "--format=%s|%an|%ae") == "Update song: kept.pro|Holy Songs Bot|bot@local"
+    assert run_git(repo, "show", "--name-only", "--format=", "HEAD") == "songs/kept.pro"
+    assert run_git(repo, "status", "--porcelain", "--untracked-files=no") == "M README.md"
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_adding_a_directory_stages_new_changed_and_deleted_files(repo, backend):
+    git = backend(str(repo))
+    (repo / "songs" / "doomed.pro").unlink()
+    (repo / "songs" / "added.pro").write_text("{title: Added}\n", encoding="utf-8")
+    (repo / "songs" / ".DS_Store").write_text("finder metadata", encoding="utf-8")
+
+    git.add("songs")
+    git.commit("Recover local song changes: songs", "Holy Songs Bot", "bot@local")
+
+    changes = run_git(repo, "show", "--name-status", "--format=", "HEAD").splitlines()
+    assert sorted(changes) == ["A\tsongs/added.pro", "D\tsongs/doomed.pro"]
+    assert git.status(".") == (False, False)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_history_queries_match_git(repo, backend, tmp_path):
+    git = backend(str(repo))
+    base = run_git(repo, "rev-parse", "HEAD")
+    for number in range(3):
+        (repo / "songs" / f"new-{number}.pro").write_text(f"{{title: New {number}}}\n", encoding="utf-8")
+        git.add(f"songs/new-{number}.pro")
+        git.commit(f"Add new-{number}", "Holy Songs Bot", "bot@local")
+    run_git(repo, "fetch", "origin", "main")
+
+    assert git.rev_parse("HEAD") == run_git(repo, "rev-parse", "HEAD")
+    assert git.rev_parse("FETCH_HEAD") == base
+    assert git.count_commits("FETCH_HEAD", "HEAD") == 3
+    assert git.count_commits(base, base) == 0
+    assert git.is_ancestor("FETCH_HEAD", "HEAD") is True
+    assert git.is_ancestor("HEAD", base) is False
+
+
+def test_unknown_backend_falls_back_to_the_command_line(capsys):
+    assert plumbing_backend("libgit2") is CliGitPlumbing
+    assert "Unknown git backend" in capsys.readouterr().out
+    assert plumbing_backend("dulwich") is DulwichGitPlumbing
@@ -0,0 +1,139 @@
+import asyncio
+import subprocess
+
+import pytest
+
+from backend.git_transport import (
+    CircuitBreaker,
+    GitTransportPolicy,
+    GitTransportUnavailable,
+    is_transient_git_failure,
+    transport_operation,
+)
+from backend.testing import FakeClock
+
+
+def git_error(stderr: str) -> subprocess.CalledProcessError:
+    return subprocess.CalledProcessError(128, ["git", "fetch", "origin", "main"], output="", stderr=stderr)
+
+
+def scripted_attempts(*outcomes):
+    calls = []
+    remaining = iter(outcomes)
+
+    def attempt(timeout):
+        calls.append(timeout)
+        outcome = next(remaining)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    return attempt, calls
+
+
+def policy(monkeypatch, **kwargs) -> GitTransportPolicy:
+    monkeypatch.setattr("backend.git_transport.time.sleep", lambda _seconds: None)
+    return GitTransportPolicy({"fetch": 5, "push": 9}, **kwargs)
+
+
+def test_transport_operation_skips_config_options():
+    assert transport_operation(["git", "-c", "credential.helper=", "push", "origin", "HEAD:main"]) == "push"
+    assert transport_operation(["git", "fetch", "--quiet", "origin"]) == "fetch"
+
+
+def test_transient_failures_are_recognized():
+    assert is_transient_git_failure(git_error("fatal: unable to access: Could not resolve host: github.com"))
+    assert is_transient_git_failure(git_error("error: RPC failed; HTTP 502 curl 22"))
+    assert not is_transient_git_failure(git_error("! [rejected] HEAD -> main (fetch first)"))
+    assert not is_transient_git_failure(git_error("fatal: Authentication failed"))
+
+
+def test_transient_failures_are_retried_with_the_operation_timeout(monkeypatch):
+    transport = policy(monkeypatch, retries=2)
+    ok = subprocess.CompletedProcess(["git"], 0, "", "")
+    attempt, calls = scripted_attempts(
+        git_error("fatal: the remote end hung up unexpectedly"),
+        subprocess.TimeoutExpired(["git", "fetch"], 5),
+        ok,
+    )
+
+    assert transport.run(["git", "fetch", "origin", "main"], attempt) is ok
+    assert calls == [5, 5, 5]
+    assert transport.stats()["counters"] == {"attempts": 3, "retries": 2, "timeouts": 1, "failures": 0}
+    assert transport.breaker.state == "closed"
+
+
+def test_rejected_push_is_not_retried(monkeypatch):
+    transport = policy(monkeypatch, retries=2)
+    attempt, calls = scripted_attempts(git_error("! [rejected] HEAD -> main (non-fast-forward)"))
+
+    with pytest.raises(subprocess.CalledProcessError):
+        transport.run(["git", "push", "origin", "HEAD:main"], attempt)
+
+    assert calls == [9]
+    assert transport.breaker.consecutive_failures == 0
+
+
+def test_timeouts_surface_as_called_process_errors(monkeypatch):
+    transport = policy(monkeypatch, retries=0)
+    attempt, _calls = scripted_attempts(subprocess.TimeoutExpired(["git", "push"], 9))
+
+    with pytest.raises(subprocess.CalledProcessError) as error:
+        transport.run(["git", "push", "origin", "HEAD:main"], attempt)
+
+    assert "timed out after 9s" in error.value.stderr
+
+
+def test_circuit_opens_fails_fast_and_closes_after_a_successful_trial(monkeypatch):
+    clock = FakeClock()
+    transport = policy(monkeypatch, retries=0, breaker=CircuitBreaker(failure_threshold=2, reset_after=30, clock=clock))
+    down = git_error("fatal: unable to access: Failed to connect to github.com port 443")
+    attempt, calls = scripted_attempts(down, down)
+
+    for _ in range(2):
+        with pytest.raises(subprocess.CalledProcessError):
+            transport.run(["git", "fetch", "origin", "main"], attempt)
+    assert transport.breaker.state == "open"
+
+    with pytest.raises(GitTransportUnavailable) as error:
+        transport.run(["git", "fetch", "origin", "main"], attempt)
+    assert "kept locally" in error.value.stderr
+    assert len(calls) == 2
+
+    clock.now = 31
+    ok = subprocess.CompletedProcess(["git"], 0, "", "")
+    assert transport.run(["git", "fetch", "origin", "main"], lambda _timeout: ok) is ok
+    assert transport.stats()["circuit"]["state"] == "closed"
+
+
+def test_failed_trial_reopens_the_circuit(monkeypatch):
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_after=30, clock=clock)
+    transport = policy(monkeypatch, retries=0, breaker=breaker)
+    down = git_error("fatal: unable to access: Connection timed out")
+    attempt, _calls = scripted_attempts(down, down)
+
+    with pytest.raises(subprocess.CalledProcessError):
+        transport.run(["git", "fetch"], attempt)
+    clock.now = 31
+    with pytest.raises(subprocess.CalledProcessError):
+        transport.run(["git", "fetch"], attempt)
+
+    assert breaker.state == "open"
+    assert breaker.retry_in() == 30
+
+
+def test_async_attempts_share_the_policy():
+    transport = GitTransportPolicy({"fetch": 5}, retries=1, backoff=0)
+    calls = []
+
+    async def attempt(timeout):
+        calls.append(timeout)
+        if len(calls) == 1:
+            raise git_error("fatal: early EOF")
+        return subprocess.CompletedProcess(["git"], 0, "fetched", "")
+
+    result = asyncio.run(transport.run_async(["git", "fetch", "origin"], attempt))
+
+    assert result.stdout == "fetched"
+    assert calls == [5, 5]
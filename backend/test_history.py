@@ -0,0 +1,109 @@
+from backend import history
+from backend.history import SongHistoryIndex, parse_log
+from backend.testing import commit_song, make_repo, run_git
+
+
+def make_history_repo(tmp_path):
+    repo = make_repo(tmp_path)
+    (repo / "README.md").write_text("Songs\n", encoding="utf-8")
+    commit_song(repo, "amazing-grace.pro", "{title: Amazing Grace}\n", "Create: amazing-grace.pro")
+    return repo
+
+
+def test_parse_log_keeps_song_files_and_renames():
+    output = (
+        "\x01abc\x00Ann\x00ann@example.com\x00100\x00Rename\x00\n"
+        "R100\0songs/old.pro\0songs/new.pro\0"
+        "M\0README.md\0"
+        "A\0songs/nested/skip.pro\0"
+    )
+
+    changes = parse_log(output, "songs")
+
+    assert changes == [{
+        "commit": "abc",
+        "author": "Ann",
+        "email": "ann@example.com",
+        "timestamp": 100,
+        "subject": "Rename",
+        "status": "R",
+        "filename": "new.pro",
+        "previous_filename": "old.pro",
+    }]
+
+
+def test_update_only_reads_commits_since_last_indexed_head(tmp_path, monkeypatch):
+    repo = make_history_repo(tmp_path)
+    index = SongHistoryIndex()
+
+    assert index.update(str(repo), "songs") == 1
+    first = run_git(repo, "rev-parse", "HEAD")
+    second = commit_song(repo, "amazing-grace.pro", "{title: Amazing Grace}\n{key: G}\n", "Update: amazing-grace.pro")
+
+    log_ranges = []
+    original_git = history.git
+
+    def recording_git(repo_dir, *args, **kwargs):
+        if args[0] == "log":
+            log_ranges.append(args[6])
+        return original_git(repo_dir, *args, **kwargs)
+
+    monkeypatch.setattr(history, "git", recording_git)
+
+    assert index.update(str(repo), "songs") == 1
+    assert index.update(str(repo), "songs") == 0
+    assert log_ranges == [f"{first}..{second}"]
+
+    result = index.history("amazing-grace.pro")
+    assert result["total"] == 2
+    assert [entry["subject"] for entry in result["history"]] == [
+        "Update: amazing-grace.pro",
+        "Create: amazing-grace.pro",
+    ]
+    assert result["history"][0]["author"] == "Test User"
+    assert index.history("missing.pro") is None
+
+
+def test_history_follows_renames_and_pages(tmp_path):
+    repo = make_history_repo(tmp_path)
+    commit_song(repo, "amazing-grace.pro", "{title: Amazing Grace}\n{key: G}\n", "Update: amazing-grace.pro")
+    run_git(repo, "mv", "songs/amazing-grace.pro", "songs/grace.pro")
+    run_git(repo, "commit", "-q", "-m", "Rename: grace.pro")
+    # A new song that reuses the old name is not part of grace.pro's history.
+    commit_song(repo, "amazing-grace.pro", "{title: Another Amazing Grace}\n", "Create: amazing-grace.pro again")
+    index = SongHistoryIndex()
+    index.update(str(repo), "songs")
+
+    result = index.history("grace.pro")
+
+    assert [entry["subject"] for entry in result["history"]] == [
+        "Rename: grace.pro",
+        "Update: amazing-grace.pro",
+        "Create: amazing-grace.pro",
+    ]
+    assert result["history"][0]["previous_filename"] == "amazing-grace.pro"
+    page = index.history("grace.pro", limit=1, offset=1)
+    assert page["total"] == 3
+    assert [entry["subject"] for entry in page["history"]] == ["Update: amazing-grace.pro"]
+    assert index.history("amazing-grace.pro")["total"] == 1
+
+
+def test_rewritten_head_drops_abandoned_commits(tmp_path):
+    repo = make_history_repo(tmp_path)
+    commit_song(repo, "amazing-grace.pro", "{title: Amazing Grace}\n{key: G}\n", "Update: amazing-grace.pro")
+    commit_song(repo, "amazing-grace.pro", "{title: Amazing Grace}\n{key: A}\n", "Update: amazing-grace.pro")
+    index = SongHistoryIndex()
+    index.update(str(repo), "songs")
+    assert index.history("amazing-grace.pro")["total"] == 3
+
+    # Squash the two updates the way the push scheduler does.
+    run_git(repo, "reset", "-q", "--soft", "HEAD~2")
+    run_git(repo, "commit", "-q", "-m", "Update: amazing-grace.pro (squashed)")
+    assert index.update(str(repo), "songs") == 1
+
+    result = index.history("amazing-grace.pro")
+    assert [entry["subject"] for entry in result["history"]] == [
+        "Update: amazing-grace.pro (squashed)",
+        "Create: amazing-grace.pro",
+    ]
+    assert len(index) == 2
@@ -1,11 +1,19 @@
 import asyncio
+import errno
+import io
+import json
 import os
 import pytest
 import queue
 import subprocess
+import tarfile
+import threading
+import time
+import zipfile
 from fastapi import HTTPException
 
 import backend.main as main
+from backend.git_plumbing import DulwichGitPlumbing
 from backend.utils import sanitize_filename
 
 @pytest.mark.parametrize("input_title,expected_output", [
@@ -44,6 +52,8 @@ def test_enqueue_content_sync_records_saved_locally(monkeypatch, tmp_path):
 @pytest.mark.parametrize("path,expected", [
     ("assets/index-abc123.js", "public, max-age=31536000, immutable"),
     ("data/songs.index.json", "public, max-age=0, must-revalidate"),
+    ("data/search.manifest.json", "public, max-age=0, must-revalidate"),
+    ("data/search/03-0123456789abcdef.json", "public, max-age=31536000, immutable"),
     ("index.html", "no-cache"),
     ("logo-black-96.png", "public, max-age=86400"),
 ])
@@ -74,11 +84,71 @@ def test_rebuild_songs_uses_configured_output_directory(monkeypatch, tmp_path):
     assert captured["kwargs"]["env"]["SONGS_DIR"] == str(songs_dir)
 
 
+def test_rebuild_songs_async_uses_configured_output_directory(monkeypatch, tmp_path):
+    output_dir = tmp_path / "generated-data"
+    songs_dir = tmp_path / "songs"
+    songs_dir.mkdir()
+    captured = {}
+
+    async def run(command, **kwargs):
+        captured["command"] = command
+        captured["kwargs"] = kwargs
+        return subprocess.CompletedProcess(command, 0, stdout="", stderr="")
+
+    monkeypatch.setattr(main, "SONGS_OUTPUT_DIR", str(output_dir))
+    monkeypatch.setattr(main, "SONGS_DIR", str(songs_dir))
+    monkeypatch.setenv("GITHUB_TOKEN", "github_pat_testSecret123456789")
+    monkeypatch.setattr(main, "run_subprocess_async", run)
+
+    result = asyncio.run(main.rebuild_songs_async())
+
+    assert result["ok"] is True
+    assert captured["command"] == ["npm", "run", "build:songs"]
+    assert captured["kwargs"]["env"]["SONGS_OUTPUT_DIR"] == str(output_dir)
+    assert "GITHUB_TOKEN" not in captured["kwargs"]["env"]
+
+
+def test_run_subprocess_async_raises_with_captured_output(tmp_path):
+    with pytest.raises(subprocess.CalledProcessError) as error:
+        asyncio.run(main.run_subprocess_async(["git", "rev-parse", "HEAD"], cwd=str(tmp_path)))
+
+    assert error.value.returncode != 0
+    assert "not a git repository" in error.value.stderr
+
+
+def test_waiting_async_saves_hold_no_threads_while_worker_owns_lock():
+    lock = main.SongMutationLock()
+    order = []
+
+    async def exercise():
+        lock.acquire()
+        threads_before = threading.active_count()
+
+        async def save(index):
+            async with lock:
+                order.append(index)
+
+        waiters = [asyncio.create_task(save(index)) for index in range(20)]
+        await asyncio.sleep(0.05)
+        assert order == []
+        assert threading.active_count() == threads_before
+
+        lock.release()
+        await asyncio.gather(*waiters)
+
+    asyncio.run(exercise())
+
+    assert order == list(range(20))
+    assert lock.locked() is False
+
+
 @pytest.mark.parametrize("path,expected", [
     ("/api/version", True),
     ("/assets/index-abc123.js", True),
     ("/data/songs.index.json", True),
     ("/logo-black-96.png", False),
+    ("/api/export", False),
+    ("/api/events", False),
 ])
 def test_should_gzip_path(path, expected):
     assert main.should_gzip_path(path) is expected
@@ -250,12 +320,52 @@ def init_content_repo(tmp_path):
     return repo, remote, song_path
 
 
-def test_untracked_files_do_not_block_content_repo_rebase(monkeypatch, tmp_path):
+def test_song_history_and_revision_endpoints_read_the_content_repo(monkeypatch, tmp_path):
+    repo, _remote, song_path = init_content_repo(tmp_path)
+    monkeypatch.setattr(main, "CONTENT_REPO_DIR", str(repo))
+    monkeypatch.setattr(main, "SONGS_DIR", str(repo / "songs"))
+    monkeypatch.setattr(main, "song_history_index", main.SongHistoryIndex())
+    first = run_git(repo, "rev-parse", "HEAD").stdout.strip()
+
+    history = main.song_history("country-roads.pro", limit=50, offset=0)
+    assert [entry["commit"] for entry in history["history"]] == [first]
+
+    song_path.write_text("{title: Country Roads}\n{key: A}\n", encoding="utf-8")
+    run_git(repo, "commit", "-am", "Update: country-roads.pro via Holy Songs editor")
+    assert main.refresh_song_history() == 1
+    history = main.song_history("country-roads.pro", limit=1, offset=0)
+    assert history["total"] == 2
+    assert history["history"][0]["subject"] == "Update: country-roads.pro via Holy Songs editor"
+
+    old = main.song_at_revision("country-roads.pro", first[:12])
+    assert old["commit"] == first
+    assert old["content"] == "{title: Country Roads}\n"
+    assert old["revision"] == main.song_revision(old["content"])
+
+    with pytest.raises(HTTPException) as missing:
+        main.song_history("unknown.pro", limit=50, offset=0)
+    assert missing.value.status_code == 404
+    with pytest.raises(HTTPException) as unknown_revision:
+        main.song_at_revision("country-roads.pro", "0" * 40)
+    assert unknown_revision.value.status_code == 404
+    with pytest.raises(HTTPException) as invalid:
+        main.song_at_revision("country-roads.pro", "HEAD~1")
+    assert invalid.value.status_code == 400
+
+
+def test_content_repo_branch_is_not_cached_from_a_detached_head(monkeypatch, tmp_path):
     repo, _remote, _song_path = init_content_repo(tmp_path)
-    (repo / ".DS_Store").write_text("finder metadata", encoding="utf-8")
     monkeypatch.setattr(main, "CONTENT_REPO_DIR", str(repo))
+    monkeypatch.delenv("CONTENT_REPO_PUSH_BRANCH", raising=False)
+    main.forget_content_repo_metadata()
+    run_git(repo, "checkout", "--detach")
+
+    with pytest.raises(subprocess.CalledProcessError):
+        main.content_repo_branch()
 
-    assert main.content_repo_has_uncommitted_tracked_changes() is False
+    run_git(repo, "checkout", "main")
+    assert main.content_repo_branch() == "main"
+    main.forget_content_repo_metadata()
 
 
 def test_sync_pushes_pending_local_commits_when_file_has_no_new_diff(monkeypatch, tmp_path):
@@ -280,6 +390,220 @@ def test_sync_pushes_pending_local_commits_when_file_has_no_new_diff(monkeypatch
     assert "Update song: country-roads.pro via Holy Songs editor" in remote_log
 
 
+def test_sync_rebases_onto_prefetched_remote_and_verifies_before_push(monkeypatch, tmp_path):
+    repo, remote, song_path = init_content_repo(tmp_path)
+    other_repo = tmp_path / "other"
+    run_git(tmp_path, "clone", str(remote), str(other_repo))
+    run_git(other_repo, "config", "user.name", "Other User")
+    run_git(other_repo, "config", "user.email", "other@example.com")
+
+    def push_remote_song(filename: str, title: str):
+        (other_repo / "songs" / filename).write_text(f"{{title: {title}}}\n", encoding="utf-8")
+        run_git(other_repo, "add", "songs")
+        run_git(other_repo, "commit", "-m", f"Add {title}")
+        run_git(other_repo, "push", "origin", "main")
+
+    builds = []
+    monkeypatch.setattr(main, "CONTENT_REPO_DIR", str(repo))
+    monkeypatch.setattr(main, "ensure_content_repo_safe_directory", lambda: None)
+    monkeypatch.setattr(main, "rebuild_songs", lambda: builds.append(1) or {"ok": True, "message": "rebuilt"})
+    monkeypatch.setenv("CONTENT_REPO_PUSH_REMOTE", "origin")
+    monkeypatch.setenv("CONTENT_REPO_PUSH_BRANCH", "main")
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    monkeypatch.delenv("CONTENT_REPO_PUSH_REMOTE_URL", raising=False)
+    poller = main.RemotePoller(main.prefetch_content_remote, 60)
+    monkeypatch.setattr(main, "content_remote_poller", poller)
+
+    push_remote_song("prefetched.pro", "Prefetched")
+    assert poller.poll_once() is True
+    # The remote moves again after the last poll; the sync must not push over it.
+    push_remote_song("late.pro", "Late")
+
+    song_path.write_text("{title: Country Roads}\n{key: A}\n", encoding="utf-8")
+    result = main.sync_content_repo(str(song_path), "Update song")
+
+    assert result["ok"] is True
+    assert result["pushed"] is True
+    assert len(builds) == 2
+    assert (repo / "songs" / "prefetched.pro").exists()
+    assert (repo / "songs" / "late.pro").exists()
+    remote_log = run_git(remote, "log", "--format=%s", "main").stdout.splitlines()
+    assert remote_log[:3] == ["Update song: country-roads.pro via Holy Songs editor", "Add Late", "Add Prefetched"]
+
+
+def test_prefetch_leaves_fetch_head_alone(monkeypatch, tmp_path):
+    repo, _remote, _song_path = init_content_repo(tmp_path)
+    monkeypatch.setattr(main, "CONTENT_REPO_DIR", str(repo))
+    monkeypatch.setattr(main, "ensure_content_repo_safe_directory", lambda: None)
+    monkeypatch.setenv("CONTENT_REPO_PUSH_BRANCH", "main")
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    monkeypatch.delenv("CONTENT_REPO_PUSH_REMOTE_URL", raising=False)
+
+    commit = main.prefetch_content_remote()
+
+    assert commit == run_git(repo, "rev-parse", "HEAD").stdout.strip()
+    assert not (repo / ".git" / "FETCH_HEAD").exists()
+
+
+def count_git_processes(monkeypatch) -> list[str]:
+    commands = []
+    real_run = subprocess.run
+    real_run_async = main.run_subprocess_async
+
+    def git_command(args):
+        return next(arg for arg in args[1:] if not arg.startswith("-") and "=" not in arg)
+
+    def counting_run(args, **kwargs):
+        commands.append(git_command(args))
+        return real_run(args, **kwargs)
+
+    async def counting_run_async(args, **kwargs):
+        commands.append(git_command(args))
+        return await real_run_async(args, **kwargs)
+
+    monkeypatch.setattr(main.subprocess, "run", counting_run)
+    monkeypatch.setattr(main, "run_subprocess_async", counting_run_async)
+    return commands
+
+
+@pytest.mark.parametrize("token", [None, "github_pat_testSecret123456789"])
+def test_sync_spawns_a_bounded_number_of_git_processes(monkeypatch, tmp_path, token):
+    repo, remote, song_path = init_content_repo(tmp_path)
+    monkeypatch.setattr(main, "CONTENT_REPO_DIR", str(repo))
+    monkeypatch.setattr(main, "rebuild_songs", lambda: {"ok": True, "message": "rebuilt"})
+    monkeypatch.setattr(main, "content_remote_poller", None)
+    monkeypatch.setenv("CONTENT_REPO_PUSH_REMOTE", "origin")
+    monkeypatch.delenv("CONTENT_REPO_PUSH_BRANCH", raising=False)
+    monkeypatch.delenv("CONTENT_REPO_PUSH_REMOTE_URL", raising=False)
+    monkeypatch.delenv("CONTENT_REPO_TOKEN", raising=False)
+    monkeypatch.setenv("HOME", str(tmp_path))
+    if token:
+        # The token only changes how the remote URL is resolved; the local
+        # bare remote ignores the askpass credential.
+        monkeypatch.setenv("GITHUB_TOKEN", token)
+    else:
+        monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    main.forget_content_repo_metadata()
+    commands = count_git_processes(monkeypatch)
+
+    song_path.write_text("{title: Country Roads}\n{key: A}\n", encoding="utf-8")
+    assert main.sync_content_repo(str(song_path), "Update song")["pushed"] is True
+    first_sync = list(commands)
+
+    commands.clear()
+    song_path.write_text("{title: Country Roads}\n{key: B}\n", encoding="utf-8")
+    assert main.sync_content_repo(str(song_path), "Update song")["pushed"] is True
+    assert commands == ["add", "status", "commit", "fetch", "merge-base", "rev-list", "push"]
+    # Repository facts are looked up once and then reused.
+    assert len(first_sync) - len(commands) == (4 if token else 3)
+
+    commands.clear()
+    assert main.sync_content_repo(str(song_path), "Update song")["pushed"] is False
+    assert commands == ["add", "status", "fetch", "merge-base", "rev-list"]
+    assert "Update song: country-roads.pro" in run_git(remote, "log", "-1", "--format=%s", "main").stdout
+
+
+def test_push_refresh_reads_head_once_and_skips_an_up_to_date_rebase(monkeypatch, tmp_path):
+    repo, remote, _song_path = init_content_repo(tmp_path)
+    monkeypatch.setattr(main, "CONTENT_REPO_DIR", str(repo))
+    monkeypatch.setattr(main, "SONGS_DIR", str(repo / "songs"))
+    monkeypatch.setattr(main, "ensure_content_repo_safe_directory", lambda: None)
+    async def rebuild(_changed_files=None):
+        return {"ok": True, "message": "rebuilt"}
+
+    monkeypatch.setattr(main, "rebuild_songs_async", rebuild)
+    monkeypatch.setattr(main, "refresh_song_indexes", lambda filenames=None: 0)
+    monkeypatch.setattr(main, "refresh_song_history", lambda: None)
+    monkeypatch.setenv("CONTENT_REPO_PUSH_REMOTE", "origin")
+    monkeypatch.setenv("CONTENT_REPO_PUSH_BRANCH", "main")
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    monkeypatch.delenv("CONTENT_REPO_TOKEN", raising=False)
+    monkeypatch.delenv("CONTENT_REPO_PUSH_REMOTE_URL", raising=False)
+    commands = count_git_processes(monkeypatch)
+
+    up_to_date = asyncio.run(main._refresh_changed_songs_from_push())
+    assert up_to_date["changed"] is False
+    assert commands == ["fetch", "merge-base"]
+
+    other_repo = tmp_path / "other"
+    run_git(tmp_path, "clone", str(remote), str(other_repo))
+    (other_repo / "songs" / "added.pro").write_text("{title: Added}\n", encoding="utf-8")
+    run_git(other_repo, "add", "-A")
+    run_git(other_repo, "-c", "user.name=Other", "-c", "user.email=other@example.com", "commit", "-m", "Add")
+    run_git(other_repo, "push", "origin", "main")
+    commands.clear()
+
+    changed = asyncio.run(main._refresh_changed_songs_from_push())
+    assert changed["files"] == ["added.pro"]
+    assert commands.count("rev-parse") == 1
+
+
+def test_dulwich_backend_syncs_without_forking_git_for_local_steps(monkeypatch, tmp_path):
+    repo, remote, song_path = init_content_repo(tmp_path)
+    monkeypatch.setattr(main, "CONTENT_REPO_DIR", str(repo))
+    monkeypatch.setattr(main, "ensure_content_repo_safe_directory", lambda: None)
+    monkeypatch.setattr(main, "rebuild_songs", lambda: {"ok": True, "message": "rebuilt"})
+    monkeypatch.setattr(main, "content_remote_poller", None)
+    monkeypatch.setattr(main, "content_git_plumbing", DulwichGitPlumbing)
+    monkeypatch.setenv("CONTENT_REPO_PUSH_REMOTE", "origin")
+    monkeypatch.setenv("CONTENT_REPO_PUSH_BRANCH", "main")
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    monkeypatch.delenv("CONTENT_REPO_TOKEN", raising=False)
+    monkeypatch.delenv("CONTENT_REPO_PUSH_REMOTE_URL", raising=False)
+    commands = count_git_processes(monkeypatch)
+
+    song_path.write_text("{title: Country Roads}\n{key: A}\n", encoding="utf-8")
+    result = main.sync_content_repo(str(song_path), "Update song")
+
+    assert result["pushed"] is True
+    assert commands == ["fetch", "push"]
+    assert run_git(remote, "log", "-1", "--format=%s|%an", "main").stdout.strip() == (
+        "Update song: country-roads.pro via Holy Songs editor|Holy Songs Bot"
+    )
+    assert run_git(repo, "status", "--porcelain").stdout == ""
+
+
+def test_scheduled_push_squashes_repeated_saves_of_one_file(monkeypatch, tmp_path):
+    repo, remote, song_path = init_content_repo(tmp_path)
+    other_song = repo / "songs" / "amazing-grace.pro"
+    monkeypatch.setattr(main, "CONTENT_REPO_DIR", str(repo))
+    monkeypatch.setattr(main, "SONGS_DIR", str(repo / "songs"))
+    monkeypatch.setattr(main, "ensure_content_repo_safe_directory", lambda: None)
+    monkeypatch.setattr(main, "rebuild_songs", lambda: {"ok": True, "message": "rebuilt"})
+    monkeypatch.setattr(main, "content_remote_poller", None)
+    monkeypatch.setattr(main, "CONTENT_REPO_SQUASH_COMMITS", True)
+    scheduler = main.PushScheduler(main.push_scheduled_content_commits, 300)
+    monkeypatch.setattr(main, "content_push_scheduler", scheduler)
+    monkeypatch.setenv("CONTENT_REPO_PUSH_REMOTE", "origin")
+    monkeypatch.setenv("CONTENT_REPO_PUSH_BRANCH", "main")
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    monkeypatch.delenv("CONTENT_REPO_PUSH_REMOTE_URL", raising=False)
+    remote_head = run_git(remote, "rev-parse", "main").stdout.strip()
+
+    for key in ("A", "B", "C"):
+        song_path.write_text(f"{{title: Country Roads}}\n{{key: {key}}}\n", encoding="utf-8")
+        result = main.sync_content_repo(str(song_path), "Update song")
+        assert result["ok"] is True and result["pushed"] is False
+        assert "push is scheduled" in result["message"]
+    other_song.write_text("{title: Amazing Grace}\n", encoding="utf-8")
+    main.sync_content_repo(str(other_song), "Create song")
+    assert run_git(remote, "rev-parse", "main").stdout.strip() == remote_head
+
+    result = scheduler.flush_now()
+
+    assert result["ok"] is True and result["pushed"] is True
+    assert result["squashed"] == 2
+    assert run_git(remote, "log", "--format=%s", f"{remote_head}..main").stdout.splitlines() == [
+        "Create song: amazing-grace.pro via Holy Songs editor",
+        "Update song: country-roads.pro via Holy Songs editor",
+    ]
+    assert "{key: C}" in run_git(remote, "show", "main:songs/country-roads.pro").stdout
+    assert run_git(repo, "status", "--porcelain").stdout == ""
+    metrics = main.get_push_scheduler_diagnostics()["metrics"]
+    assert metrics["pushes_saved"] == 3
+    assert metrics["squashed_commits"] == 2
+
+
 def test_remote_refresh_build_failure_is_reported_as_sync_failure(monkeypatch, tmp_path):
     repo, remote, song_path = init_content_repo(tmp_path)
     other_repo = tmp_path / "other"
@@ -524,6 +848,33 @@ def test_git_transport_uses_temporary_askpass_without_token_in_argv(monkeypatch)
     assert not os.path.exists(captured["askpass_path"])
 
 
+def test_git_transport_times_out_a_hung_fetch(monkeypatch, tmp_path):
+    repo, _remote, _song_path = init_content_repo(tmp_path)
+    hang = tmp_path / "hang.sh"
+    hang.write_text("#!/bin/sh\nsleep 30\n", encoding="utf-8")
+    hang.chmod(0o755)
+    transport = main.GitTransportPolicy({"fetch": 0.2}, retries=0)
+    monkeypatch.setattr(main, "content_git_transport", transport)
+    monkeypatch.setattr(main, "CONTENT_REPO_DIR", str(repo))
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    monkeypatch.delenv("CONTENT_REPO_TOKEN", raising=False)
+    run_git(repo, "config", "core.sshCommand", str(hang))
+
+    started = time.monotonic()
+    with pytest.raises(subprocess.CalledProcessError) as error:
+        main.run_git_transport(
+            ["fetch", "ssh://example.invalid/content.git", "main"],
+            cwd=str(repo),
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+
+    assert time.monotonic() - started < 10
+    assert "timed out" in error.value.stderr
+    assert main.get_git_transport_diagnostics()["counters"]["timeouts"] == 1
+
+
 def test_sync_failure_redacts_token_from_result_job_and_log(monkeypatch, tmp_path, capsys):
     repo, _remote, song_path = init_content_repo(tmp_path)
     token = "github_pat_testSecret123456789"
@@ -565,12 +916,36 @@ def test_sync_failure_redacts_token_from_result_job_and_log(monkeypatch, tmp_pat
     assert "[REDACTED]" in result["message"]
 
 
+def async_build_results(*results):
+    remaining = iter(results)
+    last = {}
+
+    async def rebuild():
+        last["result"] = next(remaining, last.get("result"))
+        return last["result"]
+
+    return rebuild
+
+
+async def fail_if_rebuilt():
+    pytest.fail("duplicate content must be rejected before rebuilding")
+
+
 @pytest.fixture
 def isolated_songs(monkeypatch, tmp_path):
     songs_dir = tmp_path / "songs"
     songs_dir.mkdir()
     monkeypatch.setattr(main, "SONGS_DIR", str(songs_dir))
-    monkeypatch.setattr(main, "rebuild_songs", lambda: {"ok": True, "message": "rebuilt"})
+    monkeypatch.setattr(main, "song_search_index", main.SongSearchIndex())
+    monkeypatch.setattr(main, "song_facet_index", main.SongFacetIndex())
+    monkeypatch.setattr(main, "song_chord_index", main.SongChordIndex())
+    monkeypatch.setattr(main, "song_similarity_index", main.SongSimilarityIndex())
+    monkeypatch.setattr(main, "song_duplicate_index", main.SongDuplicateIndex())
+    monkeypatch.setattr(main, "song_index_signatures", {})
+    monkeypatch.setattr(main, "song_history_index", main.SongHistoryIndex())
+    monkeypatch.setattr(main, "song_base_cache", main.RenderCache())
+    monkeypatch.setattr(main, "song_drafts", main.DraftStore())
+    monkeypatch.setattr(main, "rebuild_songs_async", async_build_results({"ok": True, "message": "rebuilt"}))
     monkeypatch.setattr(
         main,
         "enqueue_content_sync",
@@ -591,14 +966,10 @@ def test_get_song_exposes_content_revision(isolated_songs):
 def test_create_rejects_duplicate_normalized_id_before_writing(monkeypatch, isolated_songs):
     existing = isolated_songs / "original-name.pro"
     existing.write_text("{title: Grace of the Holy Garden}\n", encoding="utf-8")
-    monkeypatch.setattr(
-        main,
-        "rebuild_songs",
-        lambda: pytest.fail("duplicate content must be rejected before rebuilding"),
-    )
+    monkeypatch.setattr(main, "rebuild_songs_async", fail_if_rebuilt)
 
     with pytest.raises(HTTPException) as error:
-        main.create_song(main.SongContent(content="{title: GRACE---of the holy garden!}\n"))
+        asyncio.run(main.create_song(main.SongContent(content="{title: GRACE---of the holy garden!}\n")))
 
     assert error.value.status_code == 409
     assert error.value.detail["code"] == "duplicate_song_id"
@@ -614,19 +985,17 @@ def test_update_rejects_title_change_that_collides(monkeypatch, isolated_songs):
     first_path = isolated_songs / "first-song.pro"
     first_path.write_text(original_content, encoding="utf-8")
     (isolated_songs / "second-song.pro").write_text("{title: Second Song}\n", encoding="utf-8")
-    monkeypatch.setattr(
-        main,
-        "rebuild_songs",
-        lambda: pytest.fail("duplicate content must be rejected before rebuilding"),
-    )
+    monkeypatch.setattr(main, "rebuild_songs_async", fail_if_rebuilt)
 
     with pytest.raises(HTTPException) as error:
-        main.update_song(
-            "first-song.pro",
-            main.SongContent(
-                content="{title: Second---Song!}\n",
-                expected_revision=main.song_revision(original_content),
-            ),
+        asyncio.run(
+            main.update_song(
+                "first-song.pro",
+                main.SongContent(
+                    content="{title: Second---Song!}\n",
+                    expected_revision=main.song_revision(original_content),
+                ),
+            )
         )
 
     assert error.value.status_code == 409
@@ -642,16 +1011,20 @@ def test_two_editors_cannot_silently_overwrite_each_other(isolated_songs):
     song_path.write_text(original_content, encoding="utf-8")
     loaded_revision = main.get_song("shared-song.pro")["revision"]
 
-    first_response = main.update_song(
-        "shared-song.pro",
-        main.SongContent(content=first_edit, expected_revision=loaded_revision),
+    first_response = asyncio.run(
+        main.update_song(
+            "shared-song.pro",
+            main.SongContent(content=first_edit, expected_revision=loaded_revision),
+        )
     )
 
     assert first_response["revision"] == main.song_revision(first_edit)
     with pytest.raises(HTTPException) as error:
-        main.update_song(
-            "shared-song.pro",
-            main.SongContent(content=second_edit, expected_revision=loaded_revision),
+        asyncio.run(
+            main.update_song(
+                "shared-song.pro",
+                main.SongContent(content=second_edit, expected_revision=loaded_revision),
+            )
         )
 
     assert error.value.status_code == 409
@@ -666,15 +1039,241 @@ def test_two_editors_cannot_silently_overwrite_each_other(isolated_songs):
     assert song_path.read_text(encoding="utf-8") == first_edit
 
 
+def test_song_saves_read_and_write_files_off_the_event_loop(isolated_songs, monkeypatch):
+    song_path = isolated_songs / "shared-song.pro"
+    song_path.write_text("{title: Shared Song}\n{key: C}\n", encoding="utf-8")
+    loaded = main.get_song("shared-song.pro")
+    threads = []
+
+    def recording(function):
+        def record(*args):
+            threads.append((function.__name__, threading.current_thread()))
+            return function(*args)
+        return record
+
+    monkeypatch.setattr(main, "read_song_text", recording(main.read_song_text))
+    monkeypatch.setattr(main, "apply_song_files", recording(main.apply_song_files))
+
+    asyncio.run(
+        main.update_song(
+            "shared-song.pro",
+            main.SongContent(content="{title: Shared Song}\n{key: D}\n", expected_revision=loaded["revision"]),
+        )
+    )
+
+    assert [name for name, _thread in threads] == ["read_song_text", "apply_song_files"]
+    assert all(thread is not threading.main_thread() for _name, thread in threads)
+
+
+def test_patch_applies_line_changes_to_the_loaded_revision(isolated_songs):
+    song_path = isolated_songs / "shared-song.pro"
+    song_path.write_text("{title: Shared Song}\n{key: C}\n", encoding="utf-8")
+    loaded = main.get_song("shared-song.pro")
+
+    response = asyncio.run(
+        main.patch_song(
+            "shared-song.pro",
+            main.SongPatch(
+                changes=[main.SongLineChange(start=1, delete=1, lines=["{key: D}"])],
+                expected_revision=loaded["revision"],
+            ),
+        )
+    )
+
+    assert song_path.read_text(encoding="utf-8") == "{title: Shared Song}\n{key: D}\n"
+    assert response["revision"] == main.song_revision("{title: Shared Song}\n{key: D}\n")
+    assert response["merged"] is False
+    assert "changes" not in response
+
+
+def test_patch_merges_a_stale_base_when_edits_do_not_overlap(isolated_songs):
+    song_path = isolated_songs / "shared-song.pro"
+    song_path.write_text("{title: Shared Song}\n{key: C}\n[C]Verse\n", encoding="utf-8")
+    loaded_revision = main.get_song("shared-song.pro")["revision"]
+    song_path.write_text("{title: Shared Song}\n{key: C}\n[C]Verse\n[G]Chorus\n", encoding="utf-8")
+
+    response = asyncio.run(
+        main.patch_song(
+            "shared-song.pro",
+            main.SongPatch(
+                changes=[main.SongLineChange(start=1, delete=1, lines=["{key: D}"])],
+                expected_revision=loaded_revision,
+            ),
+        )
+    )
+
+    assert song_path.read_text(encoding="utf-8") == "{title: Shared Song}\n{key: D}\n[C]Verse\n[G]Chorus\n"
+    assert response["merged"] is True
+    assert response["changes"] == [{"start": 3, "delete": 0, "lines": ["[G]Chorus"]}]
+
+
+def test_patch_conflict_returns_a_diff_instead_of_the_song(isolated_songs):
+    song_path = isolated_songs / "shared-song.pro"
+    song_path.write_text("{title: Shared Song}\n{key: C}\n", encoding="utf-8")
+    loaded_revision = main.get_song("shared-song.pro")["revision"]
+    song_path.write_text("{title: Shared Song}\n{key: E}\n", encoding="utf-8")
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(
+            main.patch_song(
+                "shared-song.pro",
+                main.SongPatch(
+                    changes=[main.SongLineChange(start=1, delete=1, lines=["{key: D}"])],
+                    expected_revision=loaded_revision,
+                ),
+            )
+        )
+
+    assert error.value.status_code == 409
+    assert error.value.detail["code"] == "revision_conflict"
+    assert error.value.detail["changes"] == [{"start": 1, "delete": 1, "lines": ["{key: E}"]}]
+    assert "current_content" not in error.value.detail
+    assert song_path.read_text(encoding="utf-8") == "{title: Shared Song}\n{key: E}\n"
+
+
+def test_patch_with_unknown_base_returns_the_current_song(isolated_songs):
+    song_path = isolated_songs / "shared-song.pro"
+    song_path.write_text("{title: Shared Song}\n", encoding="utf-8")
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(
+            main.patch_song(
+                "shared-song.pro",
+                main.SongPatch(changes=[], expected_revision=main.song_revision("never served")),
+            )
+        )
+
+    assert error.value.status_code == 409
+    assert error.value.detail["current_content"] == "{title: Shared Song}\n"
+
+
+def test_patch_rejects_changes_outside_the_song(isolated_songs):
+    song_path = isolated_songs / "shared-song.pro"
+    song_path.write_text("{title: Shared Song}\n", encoding="utf-8")
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(
+            main.patch_song(
+                "shared-song.pro",
+                main.SongPatch(
+                    changes=[main.SongLineChange(start=4, delete=1)],
+                    expected_revision=main.song_revision("{title: Shared Song}\n"),
+                ),
+            )
+        )
+
+    assert error.value.status_code == 400
+    assert error.value.detail["code"] == "invalid_patch"
+
+
+def test_patch_finds_a_base_that_is_only_in_git_history(monkeypatch, tmp_path, isolated_songs):
+    repo, _remote, song_path = init_content_repo(tmp_path)
+    monkeypatch.setattr(main, "CONTENT_REPO_DIR", str(repo))
+    monkeypatch.setattr(main, "SONGS_DIR", str(repo / "songs"))
+    song_path.write_text("{title: Country Roads}\n{key: A}\n", encoding="utf-8")
+    run_git(repo, "commit", "-am", "Add key")
+
+    response = asyncio.run(
+        main.patch_song(
+            "country-roads.pro",
+            main.SongPatch(
+                changes=[main.SongLineChange(start=0, delete=0, lines=["{artist: John Denver}"])],
+                expected_revision=main.song_revision("{title: Country Roads}\n"),
+            ),
+        )
+    )
+
+    assert response["merged"] is True
+    assert song_path.read_text(encoding="utf-8") == "{artist: John Denver}\n{title: Country Roads}\n{key: A}\n"
+
+
+def test_drafts_skip_the_save_pipeline_until_published(monkeypatch, isolated_songs):
+    song_path = isolated_songs / "shared-song.pro"
+    song_path.write_text("{title: Shared Song}\n{key: C}\n", encoding="utf-8")
+    loaded_revision = main.get_song("shared-song.pro")["revision"]
+    syncs = []
+    rebuilds = []
+
+    async def record_rebuild(*_args):
+        rebuilds.append(True)
+        return {"ok": True, "message": "rebuilt"}
+
+    monkeypatch.setattr(main, "rebuild_songs_async", record_rebuild)
+    monkeypatch.setattr(main, "enqueue_content_sync", lambda path, action, **_kwargs: syncs.append(action) or {})
+
+    for key in ["D", "E"]:
+        main.save_draft(
+            "shared-song.pro",
+            main.SongDraft(content=f"{{title: Shared Song}}\n{{key: {key}}}\n", base_revision=loaded_revision),
+            editor_id="phone",
+        )
+
+    assert song_path.read_text(encoding="utf-8") == "{title: Shared Song}\n{key: C}\n"
+    assert syncs == [] and rebuilds == []
+    assert main.get_draft("shared-song.pro", editor_id="phone")["content"] == "{title: Shared Song}\n{key: E}\n"
+    with pytest.raises(HTTPException) as other_editor:
+        main.get_draft("shared-song.pro", editor_id="laptop")
+    assert other_editor.value.status_code == 404
+
+    response = asyncio.run(main.publish_draft("shared-song.pro", editor_id="phone"))
+
+    assert song_path.read_text(encoding="utf-8") == "{title: Shared Song}\n{key: E}\n"
+    assert response["revision"] == main.song_revision("{title: Shared Song}\n{key: E}\n")
+    assert syncs == ["Update song"] and rebuilds
+    assert main.list_drafts(editor_id="phone") == {"drafts": []}
+
+
+def test_publishing_a_stale_draft_conflicts_and_keeps_it(isolated_songs):
+    song_path = isolated_songs / "shared-song.pro"
+    song_path.write_text("{title: Shared Song}\n{key: C}\n", encoding="utf-8")
+    loaded_revision = main.get_song("shared-song.pro")["revision"]
+    main.save_draft(
+        "shared-song.pro",
+        main.SongDraft(content="{title: Shared Song}\n{key: D}\n", base_revision=loaded_revision),
+        editor_id="phone",
+    )
+    song_path.write_text("{title: Shared Song}\n{key: E}\n", encoding="utf-8")
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(main.publish_draft("shared-song.pro", editor_id="phone"))
+
+    assert error.value.status_code == 409
+    assert main.get_draft("shared-song.pro", editor_id="phone")["content"] == "{title: Shared Song}\n{key: D}\n"
+
+
+def test_drafts_need_an_editor_id_and_an_existing_song(isolated_songs):
+    with pytest.raises(HTTPException) as missing_editor:
+        main.require_editor_id(None)
+    assert missing_editor.value.status_code == 400
+    assert missing_editor.value.detail["code"] == "editor_id_required"
+
+    with pytest.raises(HTTPException) as missing_song:
+        main.save_draft("missing.pro", main.SongDraft(content="{title: Missing}\n"), editor_id="phone")
+    assert missing_song.value.status_code == 404
+
+
+def test_drafts_belong_to_the_proxy_identity_when_there_is_one():
+    phone = main.require_editor_id("phone", None, None, "alice")
+    laptop = main.require_editor_id("laptop", None, None, "alice")
+    impostor = main.require_editor_id("alice", None, None, "mallory")
+
+    assert phone == laptop == "user:alice"
+    assert impostor == "user:mallory"
+    assert main.require_editor_id("phone", "bob@example.ie", None, "bob") == "user:bob@example.ie"
+    assert main.require_editor_id("alice", None, None, None) != phone
+
+
 def test_update_requires_expected_revision(isolated_songs):
     original_content = "{title: Shared Song}\n"
     song_path = isolated_songs / "shared-song.pro"
     song_path.write_text(original_content, encoding="utf-8")
 
     with pytest.raises(HTTPException) as error:
-        main.update_song(
-            "shared-song.pro",
-            main.SongContent(content="{title: Shared Song}\n{key: D}\n"),
+        asyncio.run(
+            main.update_song(
+                "shared-song.pro",
+                main.SongContent(content="{title: Shared Song}\n{key: D}\n"),
+            )
         )
 
     assert error.value.status_code == 428
@@ -687,21 +1286,24 @@ def test_failed_update_build_rolls_file_and_catalogue_back(monkeypatch, isolated
     changed_content = "{title: Shared Song}\n{key: D}\n"
     song_path = isolated_songs / "shared-song.pro"
     song_path.write_text(original_content, encoding="utf-8")
-    build_results = iter(
-        [
+    monkeypatch.setattr(
+        main,
+        "rebuild_songs_async",
+        async_build_results(
             {"ok": False, "message": "invalid song"},
             {"ok": True, "message": "catalogue restored"},
-        ]
+        ),
     )
-    monkeypatch.setattr(main, "rebuild_songs", lambda: next(build_results))
 
     with pytest.raises(HTTPException) as error:
-        main.update_song(
-            "shared-song.pro",
-            main.SongContent(
-                content=changed_content,
-                expected_revision=main.song_revision(original_content),
-            ),
+        asyncio.run(
+            main.update_song(
+                "shared-song.pro",
+                main.SongContent(
+                    content=changed_content,
+                    expected_revision=main.song_revision(original_content),
+                ),
+            )
         )
 
     assert error.value.status_code == 422
@@ -712,16 +1314,17 @@ def test_failed_update_build_rolls_file_and_catalogue_back(monkeypatch, isolated
 
 
 def test_failed_create_build_removes_new_file(monkeypatch, isolated_songs):
-    build_results = iter(
-        [
+    monkeypatch.setattr(
+        main,
+        "rebuild_songs_async",
+        async_build_results(
             {"ok": False, "message": "invalid song"},
             {"ok": True, "message": "catalogue restored"},
-        ]
+        ),
     )
-    monkeypatch.setattr(main, "rebuild_songs", lambda: next(build_results))
 
     with pytest.raises(HTTPException) as error:
-        main.create_song(main.SongContent(content="{title: Broken Song}\n"))
+        asyncio.run(main.create_song(main.SongContent(content="{title: Broken Song}\n")))
 
     assert error.value.status_code == 422
     assert error.value.detail["rollback_succeeded"] is True
@@ -734,7 +1337,7 @@ def test_delete_rejects_stale_revision(isolated_songs):
     song_path.write_text(current_content, encoding="utf-8")
 
     with pytest.raises(HTTPException) as error:
-        main.delete_song("shared-song.pro", expected_revision=main.song_revision("older content"))
+        asyncio.run(main.delete_song("shared-song.pro", expected_revision=main.song_revision("older content")))
 
     assert error.value.status_code == 409
     assert error.value.detail["code"] == "revision_conflict"
@@ -771,3 +1374,803 @@ def test_rebase_conflict_aborts_without_picking_a_winner(monkeypatch, tmp_path):
     assert song_path.read_text(encoding="utf-8") == local_content
     assert run_git(repo, "status", "--porcelain").stdout == ""
     assert not (repo / ".git" / "rebase-merge").exists()
+
+
+def test_async_refresh_rebases_onto_remote_changes(monkeypatch, tmp_path):
+    repo, remote, song_path = init_content_repo(tmp_path)
+    other_repo = tmp_path / "other"
+    run_git(tmp_path, "clone", str(remote), str(other_repo))
+    run_git(other_repo, "config", "user.name", "Other User")
+    run_git(other_repo, "config", "user.email", "other@example.com")
+    remote_content = "{title: Country Roads}\n{key: D}\n"
+    (other_repo / "songs" / "country-roads.pro").write_text(remote_content, encoding="utf-8")
+    run_git(other_repo, "add", "songs/country-roads.pro")
+    run_git(other_repo, "commit", "-m", "Remote song update")
+    run_git(other_repo, "push", "origin", "main")
+
+    monkeypatch.setattr(main, "CONTENT_REPO_DIR", str(repo))
+    monkeypatch.setattr(main, "ensure_content_repo_safe_directory", lambda: None)
+    monkeypatch.setattr(main, "rebuild_songs_async", async_build_results({"ok": True, "message": "rebuilt"}))
+    monkeypatch.setenv("CONTENT_REPO_PUSH_REMOTE", "origin")
+    monkeypatch.setenv("CONTENT_REPO_PUSH_BRANCH", "main")
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    monkeypatch.delenv("CONTENT_REPO_PUSH_REMOTE_URL", raising=False)
+
+    result = asyncio.run(main.refresh_from_github())
+
+    assert result == {"ok": True, "changed": True, "message": "Content repo refreshed from GitHub."}
+    assert song_path.read_text(encoding="utf-8") == remote_content
+
+
+def test_batch_applies_all_operations_with_one_rebuild_and_sync(monkeypatch, isolated_songs):
+    first_content = "{title: First Song}\n"
+    second_content = "{title: Second Song}\n"
+    (isolated_songs / "first-song.pro").write_text(first_content, encoding="utf-8")
+    (isolated_songs / "second-song.pro").write_text(second_content, encoding="utf-8")
+    builds = []
+    syncs = []
+
+    async def rebuild():
+        builds.append(sorted(path.name for path in isolated_songs.iterdir()))
+        return {"ok": True, "message": "rebuilt"}
+
+    def enqueue(path, action, **kwargs):
+        syncs.append((path, action, kwargs))
+        return {"job_id": "sync-test", "status": "saved_locally"}
+
+    monkeypatch.setattr(main, "rebuild_songs_async", rebuild)
+    monkeypatch.setattr(main, "enqueue_content_sync", enqueue)
+
+    response = asyncio.run(
+        main.batch_update_songs(
+            main.SongBatch(
+                operations=[
+                    {"action": "create", "content": "{title: Third Song}\n"},
+                    {
+                        "action": "update",
+                        "filename": "first-song.pro",
+                        "content": "{title: First Song}\n{key: G}\n",
+                        "expected_revision": main.song_revision(first_content),
+                    },
+                    {
+                        "action": "delete",
+                        "filename": "second-song.pro",
+                        "expected_revision": main.song_revision(second_content),
+                    },
+                ]
+            )
+        )
+    )
+
+    assert builds == [["first-song.pro", "third-song.pro"]]
+    assert syncs == [(str(isolated_songs), "Batch edit 3 songs", {"rebuild_required": False})]
+    assert [result["action"] for result in response["results"]] == ["create", "update", "delete"]
+    assert response["results"][0]["filename"] == "third-song.pro"
+    assert response["results"][1]["revision"] == main.song_revision("{title: First Song}\n{key: G}\n")
+    assert (isolated_songs / "first-song.pro").read_text(encoding="utf-8").endswith("{key: G}\n")
+
+
+def test_batch_rejects_ids_that_collide_within_the_batch(monkeypatch, isolated_songs):
+    monkeypatch.setattr(main, "rebuild_songs_async", fail_if_rebuilt)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(
+            main.batch_update_songs(
+                main.SongBatch(
+                    operations=[
+                        {"action": "create", "content": "{title: Same Song}\n"},
+                        {"action": "create", "content": "{title: SAME---song}\n"},
+                    ]
+                )
+            )
+        )
+
+    assert error.value.status_code == 409
+    assert error.value.detail["code"] == "duplicate_song_id"
+    assert error.value.detail["song_id"] == "same-song"
+    assert list(isolated_songs.iterdir()) == []
+
+
+def test_batch_stale_revision_names_the_failing_operation(isolated_songs):
+    (isolated_songs / "first-song.pro").write_text("{title: First Song}\n", encoding="utf-8")
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(
+            main.batch_update_songs(
+                main.SongBatch(
+                    operations=[
+                        {"action": "create", "content": "{title: Other Song}\n"},
+                        {
+                            "action": "delete",
+                            "filename": "first-song.pro",
+                            "expected_revision": main.song_revision("older content"),
+                        },
+                    ]
+                )
+            )
+        )
+
+    assert error.value.status_code == 409
+    assert error.value.detail["code"] == "revision_conflict"
+    assert error.value.detail["operation_index"] == 1
+    assert sorted(path.name for path in isolated_songs.iterdir()) == ["first-song.pro"]
+
+
+def test_failed_batch_build_rolls_every_file_back(monkeypatch, isolated_songs):
+    original_content = "{title: First Song}\n"
+    (isolated_songs / "first-song.pro").write_text(original_content, encoding="utf-8")
+    monkeypatch.setattr(
+        main,
+        "rebuild_songs_async",
+        async_build_results(
+            {"ok": False, "message": "invalid song"},
+            {"ok": True, "message": "catalogue restored"},
+        ),
+    )
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(
+            main.batch_update_songs(
+                main.SongBatch(
+                    operations=[
+                        {"action": "create", "content": "{title: New Song}\n"},
+                        {
+                            "action": "delete",
+                            "filename": "first-song.pro",
+                            "expected_revision": main.song_revision(original_content),
+                        },
+                    ]
+                )
+            )
+        )
+
+    assert error.value.status_code == 422
+    assert error.value.detail["rollback_succeeded"] is True
+    assert sorted(path.name for path in isolated_songs.iterdir()) == ["first-song.pro"]
+    assert (isolated_songs / "first-song.pro").read_text(encoding="utf-8") == original_content
+
+
+def test_search_follows_saves_and_reconciles_external_edits(isolated_songs):
+    (isolated_songs / "amazing-grace.pro").write_text("{title: Amazing Grace}\n[G]How sweet the sound\n", encoding="utf-8")
+    assert main.refresh_song_indexes() == 1
+
+    asyncio.run(main.create_song(main.SongContent(content="{title: Holy Night}\n[C]All is calm\n")))
+    assert [item["filename"] for item in main.search_songs(q="calm", limit=20, offset=0)["results"]] == ["holy-night.pro"]
+
+    (isolated_songs / "amazing-grace.pro").unlink()
+    (isolated_songs / "be-thou.pro").write_text("{title: Be Thou My Vision}\n", encoding="utf-8")
+    assert main.refresh_song_indexes() == 2
+    assert main.refresh_song_indexes() == 0
+    assert main.search_songs(q="sweet", limit=20, offset=0)["total"] == 0
+    assert main.search_songs(q="vison", limit=20, offset=0)["results"][0]["id"] == "be-thou-my-vision"
+
+
+def test_song_query_reflects_saved_categories_and_rejects_bad_cursor(isolated_songs):
+    asyncio.run(main.create_song(main.SongContent(content="{title: Holy Night}\n{category: Christmas}\n{key: C}\n")))
+
+    result = main.query_songs(category=["christmas"], key=[], interpreter=[], limit=50, cursor=None, facet_limit=50)
+
+    assert [song["filename"] for song in result["songs"]] == ["holy-night.pro"]
+    assert result["facets"]["key"] == [{"value": "C", "count": 1}]
+    with pytest.raises(HTTPException) as error:
+        main.query_songs(category=[], key=[], interpreter=[], limit=50, cursor="%%%", facet_limit=50)
+    assert error.value.detail["code"] == "invalid_cursor"
+
+
+def test_index_changes_returns_entries_from_the_active_generation(monkeypatch, tmp_path):
+    generations = tmp_path / ".data-generations"
+    for name, previous, index, changes in (
+        ("generation-1", None, [{"id": "a", "title": "A"}], {"added": ["a"], "updated": [], "removed": []}),
+        (
+            "generation-2",
+            "generation-1",
+            [{"id": "a", "title": "A2"}, {"id": "b", "title": "B"}],
+            {"added": ["b"], "updated": ["a"], "removed": []},
+        ),
+    ):
+        (generations / name).mkdir(parents=True)
+        (generations / name / "songs.index.json").write_text(json.dumps(index), encoding="utf-8")
+        (generations / name / "changes.json").write_text(
+            json.dumps({"version": 1, "generation": name, "previous": previous, **changes}),
+            encoding="utf-8",
+        )
+    (tmp_path / "data").symlink_to(generations / "generation-2")
+    monkeypatch.setattr(main, "SONGS_OUTPUT_DIR", str(tmp_path / "data"))
+
+    changes = main.get_index_changes(since="generation-1")
+
+    assert changes["generation"] == "generation-2"
+    assert changes["added"] == [{"id": "b", "title": "B"}]
+    assert changes["updated"] == [{"id": "a", "title": "A2"}]
+    assert main.get_index_changes(since="generation-0")["reload"] is True
+
+
+def count_fsyncs(monkeypatch):
+    calls = []
+    real_fsync = os.fsync
+
+    def fsync(file_descriptor):
+        calls.append(file_descriptor)
+        real_fsync(file_descriptor)
+
+    monkeypatch.setattr(main.os, "fsync", fsync)
+    return calls
+
+
+@pytest.mark.parametrize("mode,expected_fsyncs", [
+    ("strict", 6),
+    ("group", 4),
+    ("relaxed", 0),
+])
+def test_durability_mode_controls_fsyncs_per_transaction(monkeypatch, isolated_songs, mode, expected_fsyncs):
+    monkeypatch.setattr(main, "SONG_WRITE_DURABILITY", mode)
+    changes = [
+        (str(isolated_songs / f"song-{index}.pro"), f"{{title: Song {index}}}\n", None)
+        for index in range(3)
+    ]
+    fsyncs = count_fsyncs(monkeypatch)
+
+    main.apply_song_files(changes)
+
+    assert len(fsyncs) == expected_fsyncs
+    assert sorted(path.name for path in isolated_songs.iterdir()) == ["song-0.pro", "song-1.pro", "song-2.pro"]
+
+
+def test_group_commit_failure_restores_every_file(monkeypatch, isolated_songs):
+    monkeypatch.setattr(main, "SONG_WRITE_DURABILITY", "group")
+    (isolated_songs / "first-song.pro").write_text("{title: First Song}\n", encoding="utf-8")
+    real_replace = os.replace
+    replaced = []
+
+    def fail_second_replace(source, destination):
+        replaced.append(destination)
+        if len(replaced) == 2:
+            raise OSError("disk full")
+        real_replace(source, destination)
+
+    monkeypatch.setattr(main.os, "replace", fail_second_replace)
+
+    with pytest.raises(OSError, match="disk full"):
+        main.apply_song_files([
+            (str(isolated_songs / "first-song.pro"), "{title: First Song}\n{key: G}\n", "{title: First Song}\n"),
+            (str(isolated_songs / "second-song.pro"), "{title: Second Song}\n", None),
+        ])
+
+    assert sorted(path.name for path in isolated_songs.iterdir()) == ["first-song.pro"]
+    assert (isolated_songs / "first-song.pro").read_text(encoding="utf-8") == "{title: First Song}\n"
+
+
+@pytest.mark.parametrize("mode,failpoint", [
+    ("strict", "before-replace"),
+    ("strict", "after-replace"),
+    ("group", "group-before-rename"),
+    ("group", "group-after-first-rename"),
+])
+def test_crash_during_write_leaves_whole_files_and_recovers_temporaries(monkeypatch, tmp_path, mode, failpoint):
+    songs_dir = tmp_path / "songs"
+    songs_dir.mkdir()
+    old_contents = {f"song-{index}.pro": f"{{title: Song {index}}}\n" for index in range(3)}
+    new_contents = {name: content + "{key: A}\n" for name, content in old_contents.items()}
+    for name, content in old_contents.items():
+        (songs_dir / name).write_text(content, encoding="utf-8")
+    script = (
+        "import sys\n"
+        "import backend.main as main\n"
+        f"main.SONGS_DIR = {str(songs_dir)!r}\n"
+        f"main.write_song_files([(main.os.path.join(main.SONGS_DIR, name), content) for name, content in {new_contents!r}.items()])\n"
+    )
+    env = {
+        **os.environ,
+        "SONG_WRITE_DURABILITY": mode,
+        "SONG_WRITE_ENABLE_FAILURE_INJECTION": "1",
+        "SONG_WRITE_FAILPOINT": failpoint,
+        "SONG_WRITE_FAILURE_MODE": "crash",
+    }
+
+    result = subprocess.run(
+        ["python3", "-c", script],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(main.__file__))),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 86, result.stderr
+    for name in old_contents:
+        assert (songs_dir / name).read_text(encoding="utf-8") in (old_contents[name], new_contents[name])
+    monkeypatch.setattr(main, "SONGS_DIR", str(songs_dir))
+    main.remove_stale_song_temporaries()
+    assert sorted(path.name for path in songs_dir.iterdir()) == sorted(old_contents)
+
+
+class FakeUpload:
+    def __init__(self, payload: bytes, chunk_size: int = 7):
+        self.payload = payload
+        self.chunk_size = chunk_size
+
+    async def stream(self):
+        for offset in range(0, len(self.payload), self.chunk_size):
+            yield self.payload[offset:offset + self.chunk_size]
+
+
+def zip_archive(files: dict[str, bytes]) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as bundle:
+        for name, data in files.items():
+            bundle.writestr(name, data)
+    return buffer.getvalue()
+
+
+def tar_archive(files: dict[str, bytes]) -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as bundle:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            bundle.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def test_import_zip_reports_each_file_and_applies_one_change(monkeypatch, isolated_songs):
+    (isolated_songs / "old-song.pro").write_text("{title: Old Song}\n", encoding="utf-8")
+    builds = []
+    syncs = []
+
+    async def rebuild():
+        builds.append(sorted(path.name for path in isolated_songs.iterdir()))
+        return {"ok": True, "message": "rebuilt"}
+
+    def enqueue(path, action, **_kwargs):
+        syncs.append((path, action))
+        return {"job_id": "sync-test", "status": "saved_locally"}
+
+    monkeypatch.setattr(main, "rebuild_songs_async", rebuild)
+    monkeypatch.setattr(main, "enqueue_content_sync", enqueue)
+    payload = zip_archive(
+        {
+            "library/amazing-grace.pro": b"{title: Amazing Grace}\n[G]Amazing grace\n",
+            "library/how-great.pro": b"{title: How Great}\n",
+            "library/no-title.pro": b"[C]Just chords\n",
+            "library/old.pro": b"{title: OLD song}\n{key: D}\n",
+            "library/README.txt": b"ignored",
+            "__MACOSX/library/._amazing-grace.pro": b"ignored",
+        }
+    )
+
+    response = asyncio.run(main.import_songs(FakeUpload(payload)))
+
+    assert builds == [["amazing-grace.pro", "how-great.pro", "old-song.pro"]]
+    assert syncs == [(str(isolated_songs), "Import 2 songs")]
+    assert response["counts"] == {"created": 2, "updated": 0, "unchanged": 0, "skipped": 1, "failed": 1}
+    statuses = {result["path"]: result["status"] for result in response["results"]}
+    assert statuses == {
+        "library/amazing-grace.pro": "created",
+        "library/how-great.pro": "created",
+        "library/no-title.pro": "failed",
+        "library/old.pro": "skipped",
+    }
+    assert (isolated_songs / "old-song.pro").read_text(encoding="utf-8") == "{title: Old Song}\n"
+
+
+def test_import_tar_can_update_existing_songs_and_rejects_duplicate_ids(isolated_songs):
+    (isolated_songs / "old-song.pro").write_text("{title: Old Song}\n", encoding="utf-8")
+    payload = tar_archive(
+        {
+            "old.pro": b"{title: Old Song}\n{key: E}\n",
+            "new.pro": b"{title: New Song}\n",
+            "copy-of-new.pro": b"{title: New---Song}\n",
+        }
+    )
+
+    response = asyncio.run(main.import_songs(FakeUpload(payload), existing="update"))
+
+    assert response["counts"]["updated"] == 1
+    assert response["counts"]["created"] == 1
+    failed = [result for result in response["results"] if result["status"] == "failed"]
+    assert failed == [
+        {"path": "copy-of-new.pro", "status": "failed", "error": 'Duplicate song ID "new-song" (also in new.pro)'}
+    ]
+    assert (isolated_songs / "old-song.pro").read_text(encoding="utf-8").endswith("{key: E}\n")
+
+
+def set_zip_central_header_field(payload: bytes, name: str, offset: int, value: int) -> bytes:
+    data = bytearray(payload)
+    position = 0
+    while True:
+        position = data.index(b"PK\x01\x02", position)
+        name_length = int.from_bytes(data[position + 28:position + 30], "little")
+        if data[position + 46:position + 46 + name_length] == name.encode("utf-8"):
+            data[position + offset:position + offset + 2] = value.to_bytes(2, "little")
+            return bytes(data)
+        position += 4
+
+
+def test_import_reports_unreadable_zip_members_and_keeps_the_rest(isolated_songs):
+    payload = zip_archive(
+        {
+            "corrupt.pro": b"{title: Corrupt}\n",
+            "encrypted.pro": b"{title: Encrypted}\n",
+            "unsupported.pro": b"{title: Unsupported}\n",
+            "good.pro": b"{title: Good}\n",
+        }
+    )
+    payload = payload.replace(b"{title: Corrupt}", b"{title: C0rrupt}")
+    payload = set_zip_central_header_field(payload, "encrypted.pro", 8, 0x1)
+    payload = set_zip_central_header_field(payload, "unsupported.pro", 10, 99)
+
+    response = asyncio.run(main.import_songs(FakeUpload(payload)))
+
+    statuses = {result["path"]: result["status"] for result in response["results"]}
+    assert statuses == {
+        "corrupt.pro": "failed",
+        "encrypted.pro": "failed",
+        "unsupported.pro": "failed",
+        "good.pro": "created",
+    }
+    errors = {result["path"]: result.get("error", "") for result in response["results"]}
+    assert "Bad CRC-32" in errors["corrupt.pro"]
+    assert "encrypted" in errors["encrypted.pro"]
+    assert sorted(path.name for path in isolated_songs.iterdir()) == ["good.pro"]
+
+
+def test_import_rejects_oversized_upload_before_touching_songs(monkeypatch, isolated_songs):
+    monkeypatch.setattr(main, "SONG_IMPORT_MAX_BYTES", 16)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(main.import_songs(FakeUpload(zip_archive({"a.pro": b"{title: A}\n"}))))
+
+    assert error.value.status_code == 413
+    assert list(isolated_songs.iterdir()) == []
+
+
+async def read_streaming_body(response):
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+def test_export_streams_snapshot_taken_before_later_writes(isolated_songs):
+    song_path = isolated_songs / "shared-song.pro"
+    song_path.write_text("{title: Shared Song}\n", encoding="utf-8")
+
+    async def exercise():
+        response = await main.export_catalogue(
+            archive_format="zip",
+            include_generated=False,
+            range_header=None,
+            if_range=None,
+        )
+        main.atomic_write_text(str(song_path), "{title: Shared Song}\n{key: D}\n")
+        return response, await read_streaming_body(response)
+
+    response, payload = asyncio.run(exercise())
+
+    assert response.status_code == 200
+    assert response.headers["content-length"] == str(len(payload))
+    with zipfile.ZipFile(io.BytesIO(payload)) as bundle:
+        assert bundle.read("songs/shared-song.pro") == b"{title: Shared Song}\n"
+
+
+def test_export_snapshots_beside_the_catalogue_and_copies_outside_the_lock(monkeypatch, isolated_songs):
+    (isolated_songs / "shared-song.pro").write_text("{title: Shared Song}\n", encoding="utf-8")
+    snapshot_dirs, _files = main.create_export_snapshot(include_generated=False)
+    assert [os.path.dirname(path) for path in snapshot_dirs] == [str(isolated_songs)]
+    main.remove_export_snapshot(snapshot_dirs)
+
+    def cross_device_link(_source, _destination):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    copied_under_lock = []
+    original_copy2 = main.shutil.copy2
+
+    def recording_copy2(source, destination):
+        copied_under_lock.append(main.song_mutation_lock.locked())
+        return original_copy2(source, destination)
+
+    monkeypatch.setattr(main.os, "link", cross_device_link)
+    monkeypatch.setattr(main.shutil, "copy2", recording_copy2)
+
+    async def exercise():
+        response = await main.export_catalogue(
+            archive_format="zip",
+            include_generated=False,
+            range_header=None,
+            if_range=None,
+        )
+        return await read_streaming_body(response)
+
+    payload = asyncio.run(exercise())
+
+    assert copied_under_lock == [False]
+    with zipfile.ZipFile(io.BytesIO(payload)) as bundle:
+        assert bundle.read("songs/shared-song.pro") == b"{title: Shared Song}\n"
+    assert [path.name for path in isolated_songs.iterdir()] == ["shared-song.pro"]
+
+
+def test_export_resumes_with_matching_if_range(isolated_songs):
+    (isolated_songs / "shared-song.pro").write_text("{title: Shared Song}\n", encoding="utf-8")
+
+    async def export(range_header=None, if_range=None):
+        response = await main.export_catalogue(
+            archive_format="tar",
+            include_generated=False,
+            range_header=range_header,
+            if_range=if_range,
+        )
+        return response, await read_streaming_body(response)
+
+    full_response, full_payload = asyncio.run(export())
+    etag = full_response.headers["etag"]
+    partial_response, partial_payload = asyncio.run(export("bytes=100-", etag))
+    stale_response, _stale_payload = asyncio.run(export("bytes=100-", '"stale"'))
+
+    assert partial_response.status_code == 206
+    assert partial_response.headers["content-range"] == f"bytes 100-{len(full_payload) - 1}/{len(full_payload)}"
+    assert partial_payload == full_payload[100:]
+    assert stale_response.status_code == 200
+
+
+def test_export_rejects_unsatisfiable_range(isolated_songs):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(
+            main.export_catalogue(
+                archive_format="zip",
+                include_generated=False,
+                range_header="bytes=999999-",
+                if_range=None,
+            )
+        )
+
+    assert error.value.status_code == 416
+
+
+def publish_song_data(monkeypatch, tmp_path, songs: dict[str, dict]):
+    generation_dir = tmp_path / ".data-generations" / "generation-1"
+    (generation_dir / "songs").mkdir(parents=True)
+    for song_id, song in songs.items():
+        (generation_dir / "songs" / f"{song_id}.json").write_text(json.dumps(song), encoding="utf-8")
+    (tmp_path / "data").symlink_to(generation_dir)
+    monkeypatch.setattr(main, "SONGS_OUTPUT_DIR", str(tmp_path / "data"))
+    return generation_dir
+
+
+def test_bulk_songs_returns_requested_order_and_revalidates(monkeypatch, tmp_path):
+    publish_song_data(monkeypatch, tmp_path, {"a": {"id": "a", "title": "A"}, "b": {"id": "b", "title": "B"}})
+
+    response = main.get_songs_bulk(ids=["b,a", "missing", "b"], response_format="json", if_none_match=None)
+
+    assert json.loads(response.body) == {
+        "generation": "generation-1",
+        "songs": [{"id": "b", "song": {"id": "b", "title": "B"}}, {"id": "a", "song": {"id": "a", "title": "A"}}],
+        "missing": ["missing"],
+    }
+    etag = response.headers["ETag"]
+    assert main.get_songs_bulk(ids=["b,a,missing"], response_format="json", if_none_match=etag).status_code == 304
+    assert main.get_songs_bulk(ids=["a,b,missing"], response_format="json", if_none_match=etag).status_code == 200
+
+
+def test_bulk_songs_etag_changes_with_content_and_streams_ndjson(monkeypatch, tmp_path):
+    generation_dir = publish_song_data(monkeypatch, tmp_path, {"a": {"id": "a", "title": "A"}})
+    before = main.post_songs_bulk(main.SongBulkRequest(ids=["a", "b"]), response_format="ndjson", if_none_match=None)
+    (generation_dir / "songs" / "a.json").write_text(json.dumps({"id": "a", "title": "A2"}), encoding="utf-8")
+
+    after = main.post_songs_bulk(main.SongBulkRequest(ids=["a", "b"]), response_format="ndjson", if_none_match=None)
+
+    assert before.headers["ETag"] != after.headers["ETag"]
+    assert after.media_type == "application/x-ndjson"
+    _generation, songs = main.read_published_songs(["a", "b"])
+    assert [json.loads(line) for line in main.bulk_song_lines(songs)] == [
+        {"id": "a", "song": {"id": "a", "title": "A2"}},
+        {"id": "b", "missing": True},
+    ]
+
+
+def test_bulk_songs_label_content_with_the_generation_it_was_read_from(monkeypatch, tmp_path):
+    publish_song_data(monkeypatch, tmp_path, {"a": {"id": "a", "title": "A"}})
+    next_generation = tmp_path / ".data-generations" / "generation-2"
+    (next_generation / "songs").mkdir(parents=True)
+    (next_generation / "songs" / "a.json").write_text(json.dumps({"id": "a", "title": "A2"}), encoding="utf-8")
+    realpath = os.path.realpath
+
+    def publish_after_resolving(path, *args, **kwargs):
+        resolved = realpath(path, *args, **kwargs)
+        if path == main.SONGS_OUTPUT_DIR:
+            # A publish switches the pointer right after the request resolved it.
+            (tmp_path / "data").unlink()
+            (tmp_path / "data").symlink_to(next_generation)
+        return resolved
+
+    monkeypatch.setattr(main.os.path, "realpath", publish_after_resolving)
+
+    generation, songs = main.read_published_songs(["a"])
+
+    assert generation == "generation-1"
+    assert json.loads(songs[0][1]) == {"id": "a", "title": "A"}
+
+
+@pytest.mark.parametrize("ids,code", [
+    ([], "no_song_ids"),
+    (["../secrets"], "invalid_song_id"),
+    ([",".join(f"song-{index}" for index in range(main.MAX_BULK_SONGS + 1))], "too_many_songs"),
+])
+def test_bulk_songs_rejects_bad_id_lists(ids, code):
+    with pytest.raises(HTTPException) as error:
+        main.parse_bulk_song_ids(ids)
+    assert error.value.detail["code"] == code
+
+
+def test_render_song_transposes_and_caches_by_revision(monkeypatch, isolated_songs):
+    monkeypatch.setattr(main, "song_render_cache", main.RenderCache())
+    song_file = isolated_songs / "grace.pro"
+    song_file.write_text("{title: Grace}\n{key: G}\n[G]Amazing [D/F#]grace\n", encoding="utf-8")
+
+    first = main.render_song("grace.pro", key="A", spelling="auto")
+    main.render_song("grace.pro", key="A", spelling="auto")
+    song_file.write_text("{title: Grace}\n{key: G}\n[G]Amazing [C]grace\n", encoding="utf-8")
+    edited = main.render_song("grace.pro", key="A", spelling="auto")
+
+    assert [token["chord"] for token in first["sections"][0]["lines"][0]["tokens"]] == ["A", "E/G#"]
+    assert [token["chord"] for token in edited["sections"][0]["lines"][0]["tokens"]] == ["A", "D"]
+    assert edited["revision"] != first["revision"]
+    assert main.get_render_cache_diagnostics()["hits"] == 1
+    with pytest.raises(HTTPException) as error:
+        main.render_song("grace.pro", key="H", spelling="auto")
+    assert error.value.detail["code"] == "invalid_key"
+
+
+def test_similar_songs_follow_saved_songs(isolated_songs):
+    for content in (
+        "{title: Seed}\n{key: G}\n[G]One [C]two [D]three [G]four\n",
+        "{title: Same Progression}\n{key: D}\n[D]One [G]two [A]three [D]four\n",
+        "{title: Minor Blues}\n{key: Am}\n[Am]One [F#dim]two [B7]three\n",
+    ):
+        asyncio.run(main.create_song(main.SongContent(content=content)))
+
+    results = main.similar_songs("seed.pro", limit=10)["results"]
+
+    assert results[0]["filename"] == "same-progression.pro"
+    assert results[0]["score"] == pytest.approx(1.0)
+    with pytest.raises(HTTPException) as error:
+        main.similar_songs("missing.pro", limit=10)
+    assert error.value.status_code == 404
+
+
+def test_duplicates_follow_saved_songs(isolated_songs):
+    verse = "Amazing grace how sweet the sound that saved a wretch like me\nI once was lost but now am found\n"
+    asyncio.run(main.create_song(main.SongContent(content="{title: Amazing Grace}\n" + verse)))
+    live = asyncio.run(main.create_song(main.SongContent(content="{title: Amazing Grace (Live)}\n" + verse)))
+    asyncio.run(main.create_song(main.SongContent(content="{title: Other}\nSomething else entirely here\n")))
+
+    pairs = main.list_duplicate_songs(min_similarity=0.7, limit=100)["pairs"]
+    assert [[song["filename"] for song in pair["songs"]] for pair in pairs] == [
+        ["amazing-grace-live.pro", "amazing-grace.pro"],
+    ]
+
+    asyncio.run(main.delete_song("amazing-grace-live.pro", expected_revision=live["revision"]))
+    assert main.list_duplicate_songs(min_similarity=0.7, limit=100)["pairs"] == []
+
+
+class FakeWebhookRequest:
+    def __init__(self, payload, headers: dict):
+        self.body = json.dumps(payload).encode("utf-8")
+        self.headers = {name.lower(): value for name, value in headers.items()}
+
+    async def stream(self):
+        yield self.body
+
+
+def signed_push(secret: str, payload, *, forge: bool = False) -> FakeWebhookRequest:
+    body = json.dumps(payload).encode("utf-8")
+    digest = main.hmac.new(secret.encode("utf-8"), body, main.hashlib.sha256).hexdigest()
+    if forge:
+        return FakeWebhookRequest(payload, {"X-Forgejo-Event": "push", "X-Forgejo-Signature": digest})
+    return FakeWebhookRequest(payload, {"X-GitHub-Event": "push", "X-Hub-Signature-256": f"sha256={digest}"})
+
+
+def test_push_webhook_rebuilds_only_changed_song_files(monkeypatch, tmp_path):
+    repo, remote, _song_path = init_content_repo(tmp_path)
+    (repo / "songs" / "kept.pro").write_text("{title: Kept}\n", encoding="utf-8")
+    (repo / "songs" / "doomed.pro").write_text("{title: Doomed}\n", encoding="utf-8")
+    run_git(repo, "add", "songs")
+    run_git(repo, "commit", "-m", "More songs")
+    run_git(repo, "push", "origin", "main")
+
+    other_repo = tmp_path / "other"
+    run_git(tmp_path, "clone", str(remote), str(other_repo))
+    run_git(other_repo, "config", "user.name", "Other User")
+    run_git(other_repo, "config", "user.email", "other@example.com")
+    (other_repo / "songs" / "country-roads.pro").write_text("{title: Take Me Home}\n", encoding="utf-8")
+    (other_repo / "songs" / "added.pro").write_text("{title: Added}\n", encoding="utf-8")
+    (other_repo / "README.md").write_text("not a song\n", encoding="utf-8")
+    run_git(other_repo, "rm", "-q", "songs/doomed.pro")
+    run_git(other_repo, "add", "-A")
+    run_git(other_repo, "commit", "-m", "Remote edits")
+    run_git(other_repo, "push", "origin", "main")
+
+    builds = []
+
+    async def record_build(changed_files=None):
+        builds.append(changed_files)
+        return {"ok": True, "message": "rebuilt"}
+
+    refreshed = []
+    monkeypatch.setattr(main, "CONTENT_REPO_DIR", str(repo))
+    monkeypatch.setattr(main, "SONGS_DIR", str(repo / "songs"))
+    monkeypatch.setattr(main, "CONTENT_WEBHOOK_SECRET", "s3cret")
+    monkeypatch.setattr(main, "ensure_content_repo_safe_directory", lambda: None)
+    monkeypatch.setattr(main, "rebuild_songs_async", record_build)
+    monkeypatch.setattr(main, "refresh_song_indexes", lambda filenames=None: refreshed.append(filenames) or 0)
+    monkeypatch.setattr(main, "push_refresh", main.PushRefreshRunner())
+    monkeypatch.setenv("CONTENT_REPO_PUSH_REMOTE", "origin")
+    monkeypatch.setenv("CONTENT_REPO_PUSH_BRANCH", "main")
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    monkeypatch.delenv("CONTENT_REPO_PUSH_REMOTE_URL", raising=False)
+
+    async def deliver():
+        first = await main.content_webhook(signed_push("s3cret", {"ref": "refs/heads/main"}))
+        second = await main.content_webhook(signed_push("s3cret", {"ref": "refs/heads/main"}, forge=True))
+        await main.push_refresh.task
+        return first, second
+
+    first, second = asyncio.run(deliver())
+
+    assert (first["status"], second["status"]) == ("started", "coalesced")
+    # The second delivery arrived while the first pass was running; its
+    # follow-up pass found nothing new, so only one rebuild happened.
+    assert builds == [{"files": ["added.pro", "country-roads.pro", "doomed.pro"], "previousIds": ["country-roads", "doomed"]}]
+    assert refreshed == [["added.pro", "country-roads.pro", "doomed.pro"]]
+    assert main.push_refresh.last_result["ok"] is True
+
+
+def test_push_webhook_rejects_payloads_that_are_not_objects(monkeypatch):
+    monkeypatch.setattr(main, "CONTENT_WEBHOOK_SECRET", "s3cret")
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(main.content_webhook(signed_push("s3cret", [])))
+
+    assert error.value.status_code == 400
+    assert error.value.detail["code"] == "invalid_payload"
+
+
+def test_push_webhook_compares_against_the_checked_out_branch(monkeypatch, tmp_path):
+    repo, _remote, _song_path = init_content_repo(tmp_path)
+    monkeypatch.setattr(main, "CONTENT_REPO_DIR", str(repo))
+    monkeypatch.setattr(main, "CONTENT_WEBHOOK_SECRET", "s3cret")
+    monkeypatch.setattr(main, "push_refresh", main.PushRefreshRunner())
+    monkeypatch.setattr(main.push_refresh, "trigger", lambda: "started")
+    monkeypatch.delenv("CONTENT_REPO_PUSH_BRANCH", raising=False)
+    main.forget_content_repo_metadata()
+
+    other_branch = asyncio.run(main.content_webhook(signed_push("s3cret", {"ref": "refs/heads/draft"})))
+    content_branch = asyncio.run(main.content_webhook(signed_push("s3cret", {"ref": "refs/heads/main"})))
+    main.forget_content_repo_metadata()
+
+    assert other_branch == {"ok": True, "status": "ignored", "ref": "refs/heads/draft"}
+    assert content_branch == {"ok": True, "status": "started"}
+
+
+@pytest.mark.parametrize("header", ["X-Hub-Signature-256", "X-Gitea-Signature", "X-Forgejo-Signature"])
+def test_push_webhook_rejects_non_ascii_signatures(monkeypatch, header):
+    monkeypatch.setattr(main, "CONTENT_WEBHOOK_SECRET", "s3cret")
+    request = FakeWebhookRequest({"ref": "refs/heads/main"}, {"X-GitHub-Event": "push", header: "sha256=\u00e9" * 8})
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(main.content_webhook(request))
+
+    assert error.value.status_code == 401
+
+
+def test_push_webhook_rejects_bad_signatures_and_ignores_other_events(monkeypatch):
+    monkeypatch.setattr(main, "CONTENT_WEBHOOK_SECRET", "s3cret")
+    monkeypatch.setenv("CONTENT_REPO_PUSH_BRANCH", "main")
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(main.content_webhook(signed_push("wrong", {"ref": "refs/heads/main"})))
+    assert error.value.status_code == 401
+
+    other_branch = asyncio.run(main.content_webhook(signed_push("s3cret", {"ref": "refs/heads/draft"})))
+    assert other_branch["status"] == "ignored"
+    body = b"{}"
+    ping = FakeWebhookRequest({}, {
+        "X-GitHub-Event": "ping",
+        "X-Hub-Signature-256": "sha256=" + main.hmac.new(b"s3cret", body, main.hashlib.sha256).hexdigest(),
+    })
+    assert asyncio.run(main.content_webhook(ping)) == {"ok": True, "status": "pong"}
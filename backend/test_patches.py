@@ -0,0 +1,50 @@
+import pytest
+
+from backend.patches import PatchConflict, apply_changes, diff_lines, join_lines, merge_changes, split_lines
+
+BASE = split_lines("{title: Shared Song}\n{key: C}\n[C]Verse one\n[G]Verse two\n[F]Chorus\n")
+
+
+def test_diff_lines_round_trips_through_apply_changes():
+    new = split_lines("{title: Shared Song}\n{key: D}\n[C]Verse one\n[F]Chorus\nOutro\n")
+
+    changes = diff_lines(BASE, new)
+
+    assert apply_changes(BASE, changes) == new
+    assert changes[0] == {"start": 1, "delete": 1, "lines": ["{key: D}"]}
+
+
+def test_apply_changes_rejects_unordered_or_out_of_range_changes():
+    with pytest.raises(ValueError):
+        apply_changes(BASE, [{"start": 3, "delete": 1, "lines": []}, {"start": 1, "delete": 1, "lines": []}])
+    with pytest.raises(ValueError):
+        apply_changes(BASE, [{"start": 5, "delete": 2, "lines": []}])
+
+
+def test_merge_changes_combines_edits_to_different_lines():
+    ours = [{"start": 1, "delete": 1, "lines": ["{key: D}"]}]
+    theirs = diff_lines(BASE, split_lines("{title: Shared Song}\n{key: C}\n[C]Verse one\n[G]Verse two\n[F]Chorus\nOutro\n"))
+
+    merged = join_lines(merge_changes(BASE, ours, theirs))
+
+    assert merged == "{title: Shared Song}\n{key: D}\n[C]Verse one\n[G]Verse two\n[F]Chorus\nOutro\n"
+
+
+def test_merge_changes_accepts_the_same_edit_from_both_sides():
+    change = [{"start": 1, "delete": 1, "lines": ["{key: D}"]}]
+
+    assert merge_changes(BASE, change, list(change))[1] == "{key: D}"
+
+
+@pytest.mark.parametrize(
+    "theirs",
+    [
+        [{"start": 1, "delete": 2, "lines": ["{key: E}"]}],
+        [{"start": 1, "delete": 0, "lines": ["{tempo: 90}"]}],
+    ],
+)
+def test_merge_changes_refuses_edits_to_the_same_lines(theirs):
+    ours = [{"start": 1, "delete": 1, "lines": ["{key: D}"]}]
+
+    with pytest.raises(PatchConflict):
+        merge_changes(BASE, ours, theirs)
@@ -0,0 +1,71 @@
+import threading
+
+from backend.push_scheduler import PushScheduler, squash_runs
+from backend.testing import FakeClock
+
+
+def test_squash_runs_groups_consecutive_equal_subjects():
+    subjects = ["Update song: a.pro", "Update song: a.pro", "Create song: b.pro", "Update song: a.pro"]
+
+    assert squash_runs(subjects) == [(0, 2), (2, 3), (3, 4)]
+    assert squash_runs([]) == []
+
+
+def test_requests_wait_for_the_interval_since_the_last_push():
+    clock = FakeClock(1000.0)
+    flushes = []
+    scheduler = PushScheduler(lambda: flushes.append(clock.now) or {"ok": True, "pushed": True}, 60, clock=clock)
+
+    scheduler.request()
+    assert scheduler.seconds_until_push() == 0
+    scheduler.flush_now()
+
+    clock.now += 5
+    scheduler.request()
+    scheduler.request()
+    assert scheduler.seconds_until_push() == 55
+
+    scheduler.flush_now()
+    stats = scheduler.stats()
+    assert stats["pending"] == 0
+    assert stats["next_push_in"] is None
+    assert stats["metrics"]["pushes"] == 2
+    assert stats["metrics"]["pushes_saved"] == 1
+
+
+def test_failed_flush_keeps_requests_pending_and_retries_later():
+    clock = FakeClock(1000.0)
+    results = iter([{"ok": False, "pushed": False, "message": "remote down"}, {"ok": True, "pushed": True}])
+    scheduler = PushScheduler(lambda: next(results), 30, clock=clock)
+
+    scheduler.request()
+    assert scheduler.flush_now()["ok"] is False
+    assert scheduler.stats()["pending"] == 1
+    assert scheduler.seconds_until_push() == 30
+
+    assert scheduler.flush_now()["ok"] is True
+    assert scheduler.stats()["metrics"]["failed_flushes"] == 1
+    assert scheduler.stats()["pending"] == 0
+
+
+def test_background_thread_flushes_and_stop_pushes_the_rest():
+    flushed = threading.Event()
+    calls = []
+
+    def flush():
+        calls.append(1)
+        flushed.set()
+        return {"ok": True, "pushed": True}
+
+    scheduler = PushScheduler(flush, 3600)
+    scheduler.start()
+    scheduler.request()
+    assert flushed.wait(timeout=5)
+
+    # The next push is an hour away, so shutdown has to push it.
+    scheduler.request()
+    result = scheduler.stop()
+
+    assert result == {"ok": True, "pushed": True}
+    assert len(calls) == 2
+    assert not scheduler.thread.is_alive()
@@ -0,0 +1,66 @@
+import random
+
+from backend.remote_poller import RemotePoller
+from backend.testing import FakeClock
+
+
+def test_successful_poll_is_fresh_until_two_intervals_pass():
+    clock = FakeClock(100.0)
+    poller = RemotePoller(lambda: "abc123", 30, clock=clock)
+
+    assert poller.fresh_commit() is None
+    assert poller.poll_once() is True
+    assert poller.fresh_commit() == "abc123"
+
+    clock.now += 61
+    assert poller.fresh_commit() is None
+    assert poller.fresh_commit(max_age=120) == "abc123"
+
+
+def test_failures_back_off_exponentially_and_keep_the_last_commit():
+    clock = FakeClock(100.0)
+    results = iter(["abc123"])
+
+    def fetch():
+        commit = next(results, None)
+        if commit is None:
+            raise RuntimeError("remote unreachable")
+        return commit
+
+    poller = RemotePoller(fetch, 10, max_backoff=60, jitter=0, clock=clock)
+    poller.poll_once()
+    assert poller.next_delay() == 10
+
+    assert poller.poll_once() is False
+    assert poller.next_delay() == 20
+    poller.poll_once()
+    poller.poll_once()
+    poller.poll_once()
+    assert poller.next_delay() == 60
+
+    stats = poller.stats()
+    assert stats["failures"] == 4
+    assert stats["last_error"] == "remote unreachable"
+    assert stats["commit"] == "abc123"
+    assert poller.fresh_commit() == "abc123"
+
+
+def test_jitter_spreads_delays_around_the_interval():
+    poller = RemotePoller(lambda: "abc123", 10, jitter=0.2, rng=random.Random(7))
+
+    delays = [poller.next_delay() for _ in range(50)]
+
+    assert all(8 <= delay <= 12 for delay in delays)
+    assert len({round(delay, 6) for delay in delays}) > 1
+
+
+def test_stop_ends_the_polling_thread():
+    polled = []
+    poller = RemotePoller(lambda: polled.append(1) or "abc123", 0.01)
+
+    poller.start()
+    poller.stop()
+    poller.thread.join(timeout=2)
+
+    assert not poller.thread.is_alive()
+    assert polled
@@ -0,0 +1,89 @@
+import os
+import subprocess
+
+from backend.main import SongMutationLock
+from backend.repo_maintenance import RepoMaintenance
+from backend.testing import FakeClock, make_repo
+
+
+class IdleLock(SongMutationLock):
+    def __init__(self, idle: float):
+        super().__init__()
+        self.idle = idle
+
+    def idle_for(self) -> float:
+        return 0.0 if self.locked() else self.idle
+
+
+def make_maintained_repo(tmp_path):
+    return make_repo(tmp_path, {f"song-{number}.pro": f"{{title: Song {number}}}\n" for number in range(3)})
+
+
+def test_idle_server_runs_every_task_and_reports_size(tmp_path):
+    repo = make_maintained_repo(tmp_path)
+    lock = IdleLock(idle=600)
+    maintenance = RepoMaintenance(lambda: str(repo), lock, idle_after=300)
+
+    assert maintenance.run_due() == ["commit-graph", "repack", "prune"]
+
+    stats = maintenance.stats()
+    assert all(task["ok"] for task in stats["tasks"].values())
+    assert os.path.exists(repo / ".git" / "objects" / "info" / "commit-graph")
+    assert stats["size"]["count"] == 0
+    assert stats["size"]["in_pack"] >= 9
+    assert not lock.locked()
+    assert subprocess.run(["git", "fsck", "--no-progress"], cwd=repo, capture_output=True).returncode == 0
+
+
+def test_tasks_wait_for_idle_and_for_their_interval(tmp_path):
+    repo = make_maintained_repo(tmp_path)
+    clock = FakeClock()
+    lock = IdleLock(idle=10)
+    maintenance = RepoMaintenance(lambda: str(repo), lock, idle_after=300, clock=clock)
+
+    assert maintenance.run_due() == []
+    lock.idle = 600
+    assert maintenance.run_due() == ["commit-graph", "repack", "prune"]
+
+    clock.now += 3601
+    assert maintenance.run_due() == ["commit-graph"]
+    assert maintenance.due_tasks() == []
+
+
+def test_busy_lock_is_never_waited_for(tmp_path):
+    repo = make_maintained_repo(tmp_path)
+    lock = IdleLock(idle=600)
+    maintenance = RepoMaintenance(lambda: str(repo), lock, idle_after=0)
+
+    with lock:
+        assert maintenance.run_due(force=True) == []
+
+    assert maintenance.stats()["skipped_busy"] == 1
+
+
+def test_maintenance_release_does_not_count_as_activity():
+    lock = SongMutationLock()
+    lock.last_released_at -= 100
+
+    assert lock.acquire(blocking=False)
+    lock.release(activity=False)
+    assert lock.idle_for() >= 100
+
+    with lock:
+        assert lock.idle_for() == 0
+    assert lock.idle_for() < 100
+
+
+def test_failed_task_is_reported(tmp_path):
+    not_a_repo = tmp_path / "plain"
+    not_a_repo.mkdir()
+    maintenance = RepoMaintenance(
+        lambda: str(not_a_repo),
+        IdleLock(idle=600),
+        tasks={"commit-graph": (60, ["commit-graph", "write", "--reachable"])},
+    )
+
+    assert maintenance.run_due() == ["commit-graph"]
+    task = maintenance.stats()["tasks"]["commit-graph"]
+    assert task["ok"] is False
+    assert "not a git repository" in task["error"]
@@ -0,0 +1,70 @@
+from backend.chordpro import parse_chordpro
+from backend.search import SongSearchIndex
+
+
+def song(title, body="", **meta):
+    directives = "".join(f"{{{tag}: {value}}}\n" for tag, value in meta.items())
+    return parse_chordpro(f"{{title: {title}}}\n{directives}{body}")
+
+
+def indexed(*songs):
+    index = SongSearchIndex()
+    for filename, parsed in songs:
+        index.update(filename, parsed)
+    return index
+
+
+def filenames(result):
+    return [item["filename"] for item in result["results"]]
+
+
+def test_title_matches_rank_above_lyric_matches():
+    index = indexed(
+        ("lyric.pro", song("Morning Song", "[G]Amazing grace how sweet the sound\n")),
+        ("title.pro", song("Amazing Grace", "[G]How sweet the sound\n")),
+    )
+
+    result = index.search("amazing grace")
+
+    assert filenames(result) == ["title.pro", "lyric.pro"]
+    assert [item["matched_fields"] for item in result["results"]] == [["title"], ["lyrics"]]
+
+
+def test_search_tolerates_typos_accents_and_partial_last_word():
+    index = indexed(
+        ("jezis.pro", song("Ježíš je Pán", interpret="Chvály")),
+        ("other.pro", song("Holy Night", category="Christmas")),
+    )
+
+    assert filenames(index.search("jezis")) == ["jezis.pro"]
+    assert filenames(index.search("chvaly pa")) == ["jezis.pro"]
+    assert filenames(index.search("christmsa")) == ["other.pro"]
+    assert filenames(index.search("hloy")) == []
+
+
+def test_update_and_remove_replace_previous_postings():
+    index = indexed(("song.pro", song("Old Title")))
+
+    index.update("song.pro", song("New Title"))
+    assert filenames(index.search("old")) == []
+    assert filenames(index.search("new")) == ["song.pro"]
+
+    index.remove("song.pro")
+    assert index.search("new")["total"] == 0
+    assert len(index) == 0
+
+
+def test_pagination_and_renumbering_keep_results_stable(monkeypatch):
+    import backend.search as search
+
+    monkeypatch.setattr(search, "MAX_DOCUMENT_NUMBER", 3)
+    index = indexed(*[(f"song-{number}.pro", song(f"Psalm {number}")) for number in range(6)])
+    index.update("song-0.pro", song("Psalm 0", "Shepherd\n"))
+
+    first_page = index.search("psalm", limit=4)
+    second_page = index.search("psalm", limit=4, offset=4)
+
+    assert first_page["total"] == 6
+    assert len(filenames(first_page)) == 4
+    assert sorted(filenames(first_page) + filenames(second_page)) == [f"song-{number}.pro" for number in range(6)]
+    assert filenames(index.search("shepherd")) == ["song-0.pro"]
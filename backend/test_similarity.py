@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from backend.chordpro import parse_chordpro
+from backend.similarity import SongSimilarityIndex, chord_features
+
+
+def song(source: str) -> dict:
+    return parse_chordpro(source)
+
+
+def test_chord_features_are_key_independent():
+    in_g = chord_features(song("{title: A}\n{key: G}\n[G]a [Em]b [C]c [D]d\n"))
+    in_bb = chord_features(song("{title: B}\n{key: Bb}\n[Bb]a [Gm]b [Eb]c [F]d\n"))
+
+    assert np.allclose(in_g, in_bb)
+
+
+def test_similar_ranks_progression_and_categories_and_reuses_rows():
+    index = SongSimilarityIndex()
+    index.update("seed.pro", song("{title: Seed}\n{key: G}\n{category: Praise}\n[G]a [C]b [D]c\n"))
+    index.update("twin.pro", song("{title: Twin}\n{key: E}\n{category: Praise}\n[E]a [A]b [B]c\n"))
+    index.update("cousin.pro", song("{title: Cousin}\n{key: C}\n{category: Advent}\n[C]a [F]b [G]c\n"))
+    index.update("other.pro", song("{title: Other}\n{key: Am}\n{category: Advent}\n[Am]a [Bdim]b [E7]c\n"))
+
+    results = index.similar("seed.pro", limit=2)
+
+    assert [result["filename"] for result in results] == ["twin.pro", "cousin.pro"]
+    assert results[0]["score"] == pytest.approx(1.0)
+    assert results[1]["score"] < results[0]["score"]
+
+    index.remove("twin.pro")
+    index.update("new.pro", song("{title: New}\n{key: D}\n[Dm]a [Gm]b\n"))
+    assert index.rows["new.pro"] == 1
+    assert "twin.pro" not in [result["filename"] for result in index.similar("seed.pro", limit=10)]
+    assert index.similar("missing.pro") is None
+
+
+def test_update_only_rewrites_the_changed_row():
+    index = SongSimilarityIndex()
+    index.update("a.pro", song("{title: A}\n{key: G}\n[G]a [C]b\n"))
+    index.update("b.pro", song("{title: B}\n{key: G}\n[G]a [D]b\n"))
+    before = index.matrix[index.rows["b.pro"]].copy()
+
+    index.update("a.pro", song("{title: A}\n{key: G}\n{category: New}\n[G]a [Em]b\n"))
+
+    assert np.array_equal(index.matrix[index.rows["b.pro"], :before.shape[0]], before)
+    assert np.linalg.norm(index.matrix[index.rows["a.pro"]]) == pytest.approx(1.0)
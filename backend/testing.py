@@ -0,0 +1,39 @@
+"""Helpers shared by the backend test modules."""
+
+import subprocess
+
+
+class FakeClock:
+    """Stands in for ``time.time``/``time.monotonic``; tests advance ``now``."""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def run_git(cwd, *args: str) -> str:
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def commit_song(repo, filename: str, content: str, message: str) -> str:
+    (repo / "songs" / filename).write_text(content, encoding="utf-8")
+    run_git(repo, "add", "-A")
+    run_git(repo, "commit", "-q", "-m", message)
+    return run_git(repo, "rev-parse", "HEAD")
+
+
+def make_repo(tmp_path, songs: dict[str, str] | None = None):
+    """Create ``tmp_path/content`` with a songs/ directory and a test identity.
+
+    Each of ``songs`` (filename -> content) is committed on its own, in order.
+    """
+    repo = tmp_path / "content"
+    run_git(tmp_path, "init", "-q", "-b", "main", str(repo))
+    run_git(repo, "config", "user.name", "Test User")
+    run_git(repo, "config", "user.email", "test@example.com")
+    (repo / "songs").mkdir()
+    for filename, content in (songs or {}).items():
+        commit_song(repo, filename, content, f"Create: {filename}")
+    return repo
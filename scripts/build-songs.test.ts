@@ -237,6 +237,196 @@ test('switches index and songs as one directory generation', async (t) => {
   await assertNoPublishDebris(fixture.outputDir);
 });
 
+async function readSearchShards(outputDir: string) {
+  const manifest = JSON.parse(
+    await fs.readFile(path.join(outputDir, 'search.manifest.json'), 'utf8')
+  ) as { version: number; shards: string[] };
+  const entries = new Map<string, string[]>();
+  for (const shard of manifest.shards) {
+    const shardEntries = JSON.parse(await fs.readFile(path.join(outputDir, shard), 'utf8')) as {
+      id: string;
+      lyrics: string[];
+    }[];
+    for (const entry of shardEntries) entries.set(entry.id, entry.lyrics);
+  }
+  return { manifest, entries };
+}
+
+test('keeps lyrics out of the index in content-hashed search shards', async (t) => {
+  const fixture = await makeBuildFixture();
+  t.after(() => fs.rm(fixture.root, { recursive: true, force: true }));
+
+  for (const name of ['first', 'second', 'third']) {
+    await fs.writeFile(
+      path.join(fixture.songsDir, `${name}.pro`),
+      `{title: ${name} Song}\n{section: Verse}\n[G]${name} words [C]here\n`,
+      'utf8'
+    );
+  }
+  assert.equal(runBuild(fixture.songsDir, fixture.outputDir).status, 0);
+
+  const index = JSON.parse(await fs.readFile(path.join(fixture.outputDir, 'songs.index.json'), 'utf8'));
+  assert.equal(index.every((entry: Record<string, unknown>) => !('sections' in entry)), true);
+  const first = await readSearchShards(fixture.outputDir);
+  assert.equal(first.manifest.shards.length, 16);
+  assert.deepEqual(first.entries.get('first-song'), ['first words here']);
+
+  await fs.writeFile(
+    path.join(fixture.songsDir, 'first.pro'),
+    '{title: first Song}\n[G]changed words\n',
+    'utf8'
+  );
+  assert.equal(runBuild(fixture.songsDir, fixture.outputDir).status, 0);
+
+  const second = await readSearchShards(fixture.outputDir);
+  const changed = second.manifest.shards.filter((shard) => !first.manifest.shards.includes(shard));
+  assert.equal(changed.length, 1);
+  assert.deepEqual(second.entries.get('first-song'), ['changed words']);
+  // Tabs still holding the previous manifest can load its shards from the new generation.
+  for (const shard of first.manifest.shards) {
+    await fs.access(path.join(fixture.outputDir, shard));
+  }
+  await assertNoPublishDebris(fixture.outputDir);
+});
+
+test('a group-durability build publishes the same catalogue as a strict one', async (t) => {
+  const strict = await makeBuildFixture();
+  const group = await makeBuildFixture();
+  t.after(() => fs.rm(strict.root, { recursive: true, force: true }));
+  t.after(() => fs.rm(group.root, { recursive: true, force: true }));
+
+  for (const fixture of [strict, group]) {
+    for (const name of ['first', 'second']) {
+      await fs.writeFile(
+        path.join(fixture.songsDir, `${name}.pro`),
+        `{title: ${name} Song}\n[G]${name} words\n`,
+        'utf8'
+      );
+    }
+  }
+  assert.equal(runBuild(strict.songsDir, strict.outputDir, { SONGS_BUILD_DURABILITY: 'strict' }).status, 0);
+  assert.equal(runBuild(group.songsDir, group.outputDir, { SONGS_BUILD_DURABILITY: 'group' }).status, 0);
+
+  assert.deepEqual(
+    await fs.readFile(path.join(group.outputDir, 'songs.index.json'), 'utf8'),
+    await fs.readFile(path.join(strict.outputDir, 'songs.index.json'), 'utf8')
+  );
+  assert.deepEqual(
+    (await readSearchShards(group.outputDir)).entries,
+    (await readSearchShards(strict.outputDir)).entries
+  );
+  assert.deepEqual(
+    (await fs.readdir(group.generatedSongsDir)).sort(),
+    (await fs.readdir(strict.generatedSongsDir)).sort()
+  );
+  await assertNoPublishDebris(group.outputDir);
+});
+
+test('records which song ids each generation added, updated and removed', async (t) => {
+  const fixture = await makeBuildFixture();
+  t.after(() => fs.rm(fixture.root, { recursive: true, force: true }));
+
+  await fs.writeFile(path.join(fixture.songsDir, 'kept.pro'), '{title: Kept}\n', 'utf8');
+  await fs.writeFile(path.join(fixture.songsDir, 'edited.pro'), '{title: Edited}\n{key: C}\n', 'utf8');
+  await fs.writeFile(path.join(fixture.songsDir, 'deleted.pro'), '{title: Deleted}\n', 'utf8');
+  assert.equal(runBuild(fixture.songsDir, fixture.outputDir).status, 0);
+  const first = JSON.parse(await fs.readFile(path.join(fixture.outputDir, 'generation.json'), 'utf8'));
+
+  await fs.writeFile(path.join(fixture.songsDir, 'edited.pro'), '{title: Edited}\n{key: D}\n', 'utf8');
+  await fs.rm(path.join(fixture.songsDir, 'deleted.pro'));
+  await fs.writeFile(path.join(fixture.songsDir, 'added.pro'), '{title: Added}\n', 'utf8');
+  assert.equal(runBuild(fixture.songsDir, fixture.outputDir).status, 0);
+
+  const second = JSON.parse(await fs.readFile(path.join(fixture.outputDir, 'generation.json'), 'utf8'));
+  const changes = JSON.parse(await fs.readFile(path.join(fixture.outputDir, 'changes.json'), 'utf8'));
+  assert.deepEqual(changes, {
+    version: 1,
+    generation: second.generation,
+    previous: first.generation,
+    added: ['added'],
+    updated: ['edited'],
+    removed: ['deleted'],
+  });
+  const recorded = path.join(fixture.root, '.data-generations', 'changes', `${second.generation}.json`);
+  assert.deepEqual(JSON.parse(await fs.readFile(recorded, 'utf8')), changes);
+  await assertNoPublishDebris(fixture.outputDir);
+});
+
+test('an incremental build writes the index in the same order as a full build', async (t) => {
+  const fixture = await makeBuildFixture();
+  t.after(() => fs.rm(fixture.root, { recursive: true, force: true }));
+
+  for (const name of ['alpha', 'bravo', 'charlie']) {
+    await fs.writeFile(path.join(fixture.songsDir, `${name}.pro`), `{title: ${name}}\n`, 'utf8');
+  }
+  assert.equal(runBuild(fixture.songsDir, fixture.outputDir).status, 0);
+
+  await fs.writeFile(path.join(fixture.songsDir, 'alpha.pro'), '{title: alpha}\n{key: G}\n', 'utf8');
+  const result = runBuild(fixture.songsDir, fixture.outputDir, {
+    SONGS_BUILD_CHANGED: JSON.stringify({ files: ['alpha.pro'], previousIds: ['alpha'] }),
+  });
+  assert.equal(result.status, 0, result.stderr);
+  const incrementalIndex = await fs.readFile(path.join(fixture.outputDir, 'songs.index.json'), 'utf8');
+
+  assert.equal(runBuild(fixture.songsDir, fixture.outputDir).status, 0);
+  const fullIndex = await fs.readFile(path.join(fixture.outputDir, 'songs.index.json'), 'utf8');
+
+  assert.equal(incrementalIndex, fullIndex);
+  assert.deepEqual(JSON.parse(fullIndex).map((entry: { id: string }) => entry.id), ['alpha', 'bravo', 'charlie']);
+});
+
+test('an incremental build re-parses only the listed files', async (t) => {
+  const fixture = await makeBuildFixture();
+  t.after(() => fs.rm(fixture.root, { recursive: true, force: true }));
+
+  await fs.writeFile(path.join(fixture.songsDir, 'kept.pro'), '{title: Kept}\n[G]kept words\n', 'utf8');
+  await fs.writeFile(path.join(fixture.songsDir, 'renamed.pro'), '{title: Old Name}\n', 'utf8');
+  await fs.writeFile(path.join(fixture.songsDir, 'deleted.pro'), '{title: Deleted}\n', 'utf8');
+  assert.equal(runBuild(fixture.songsDir, fixture.outputDir).status, 0);
+
+  // An unlisted edit must not be picked up: only the pushed files are rebuilt.
+  await fs.writeFile(path.join(fixture.songsDir, 'kept.pro'), '{title: Kept}\n[G]unlisted edit\n', 'utf8');
+  await fs.writeFile(path.join(fixture.songsDir, 'renamed.pro'), '{title: New Name}\n', 'utf8');
+  await fs.rm(path.join(fixture.songsDir, 'deleted.pro'));
+  await fs.writeFile(path.join(fixture.songsDir, 'added.pro'), '{title: Added}\n', 'utf8');
+  const result = runBuild(fixture.songsDir, fixture.outputDir, {
+    SONGS_BUILD_CHANGED: JSON.stringify({
+      files: ['added.pro', 'deleted.pro', 'renamed.pro'],
+      previousIds: ['deleted', 'old-name'],
+    }),
+  });
+  assert.equal(result.status, 0, result.stderr);
+
+  const index = JSON.parse(await fs.readFile(path.join(fixture.outputDir, 'songs.index.json'), 'utf8'));
+  assert.deepEqual(index.map((entry: { id: string }) => entry.id).sort(), ['added', 'kept', 'new-name']);
+  const shards = await readSearchShards(fixture.outputDir);
+  assert.deepEqual(shards.entries.get('kept'), ['kept words']);
+  const changes = JSON.parse(await fs.readFile(path.join(fixture.outputDir, 'changes.json'), 'utf8'));
+  assert.deepEqual(
+    { added: changes.added, updated: changes.updated, removed: changes.removed },
+    { added: ['added', 'new-name'], updated: [], removed: ['deleted', 'old-name'] }
+  );
+  await assertNoPublishDebris(fixture.outputDir);
+});
+
+test('an incremental build rejects a changed file that collides with a kept song', async (t) => {
+  const fixture = await makeBuildFixture();
+  t.after(() => fs.rm(fixture.root, { recursive: true, force: true }));
+
+  await fs.writeFile(path.join(fixture.songsDir, 'kept.pro'), '{title: Kept}\n', 'utf8');
+  assert.equal(runBuild(fixture.songsDir, fixture.outputDir).status, 0);
+  const before = await activeGeneration(fixture.outputDir);
+
+  await fs.writeFile(path.join(fixture.songsDir, 'copy.pro'), '{title: Kept}\n', 'utf8');
+  const result = runBuild(fixture.songsDir, fixture.outputDir, {
+    SONGS_BUILD_CHANGED: JSON.stringify({ files: ['copy.pro'], previousIds: [] }),
+  });
+
+  assert.notEqual(result.status, 0);
+  assert.match(result.stderr, /Duplicate song id/);
+  assert.equal(await activeGeneration(fixture.outputDir), before);
+});
+
 test('an injected publish error rolls back before the pointer switch', async (t) => {
   const fixture = await makeBuildFixture();
   t.after(() => fs.rm(fixture.root, { recursive: true, force: true }));
@@ -1,8 +1,15 @@
 import { promises as fs } from 'fs';
 import path from 'path';
-import { randomUUID } from 'node:crypto';
+import { createHash, randomUUID } from 'node:crypto';
 import { parseChordPro } from '../src/lib/parseChordPro';
-import { SongData, SongIndexEntry } from '../src/types';
+import {
+  CatalogueChangeSet,
+  CatalogueGeneration,
+  SearchManifest,
+  SearchShardEntry,
+  SongData,
+  SongIndexEntry,
+} from '../src/types';
 
 const OUTPUT_BASE = process.env.SONGS_OUTPUT_DIR || 'public/data';
 const OUTPUT_BASE_DIR = path.resolve(OUTPUT_BASE);
@@ -10,9 +17,31 @@ const OUTPUT_PARENT_DIR = path.dirname(OUTPUT_BASE_DIR);
 const OUTPUT_NAME = path.basename(OUTPUT_BASE_DIR);
 const OUTPUT_DIR = path.join(OUTPUT_BASE_DIR, 'songs');
 const INDEX_PATH = path.join(OUTPUT_BASE_DIR, 'songs.index.json');
+const SEARCH_MANIFEST_NAME = 'search.manifest.json';
+const SEARCH_DIR_NAME = 'search';
+// Lyrics live in id-hash buckets instead of the index. Shard names contain a
+// content hash, so an edit only changes the bucket holding that song and the
+// rest stay cached as immutable files.
+const SEARCH_SHARD_COUNT = 16;
 const GENERATIONS_DIR = path.join(OUTPUT_PARENT_DIR, `.${OUTPUT_NAME}-generations`);
 const JOURNAL_PATH = path.join(GENERATIONS_DIR, '.publish-journal.json');
 const RETAINED_PREVIOUS_GENERATIONS = 2;
+// Change sets are tiny, so delta history outlives the full generations.
+const CHANGES_DIR = path.join(GENERATIONS_DIR, 'changes');
+const RETAINED_CHANGE_SETS = 200;
+// Mirrors the backend's SONG_WRITE_DURABILITY. Relaxed builds keep atomic
+// renames but skip fsync, trading power-loss safety for build speed. Group
+// builds write the staged generation unsynced, then flush its files in one
+// parallel data-sync pass and each of its directories once.
+const SKIP_FSYNC = process.env.SONGS_BUILD_DURABILITY === 'relaxed';
+const GROUP_FSYNC = process.env.SONGS_BUILD_DURABILITY === 'group';
+
+// Set by the backend's push webhook: re-parse only these .pro files and keep
+// every other song exactly as the active generation published it.
+type IncrementalBuild = {
+  files: string[];
+  previousIds: string[];
+};
 
 type PreviousOutput =
   | { kind: 'missing' }
@@ -40,6 +69,7 @@ async function pathState(target: string) {
 }
 
 async function syncDirectory(dir: string) {
+  if (SKIP_FSYNC) return;
   let handle: Awaited<ReturnType<typeof fs.open>> | null = null;
   try {
     handle = await fs.open(dir, 'r');
@@ -54,17 +84,33 @@ async function syncDirectory(dir: string) {
   }
 }
 
-async function writeFileDurably(file: string, content: string) {
+// With a batch, the file is only recorded there; syncFileBatch flushes it later.
+async function writeFileDurably(file: string, content: string, batch?: string[]) {
   const handle = await fs.open(file, 'w');
   try {
     await handle.writeFile(content, 'utf8');
-    await handle.sync();
+    if (batch) batch.push(file);
+    else if (!SKIP_FSYNC) await handle.sync();
   } finally {
     await handle.close();
   }
 }
 
+async function syncFileBatch(files: string[]) {
+  await Promise.all(
+    files.map(async (file) => {
+      const handle = await fs.open(file, 'r');
+      try {
+        await handle.datasync();
+      } finally {
+        await handle.close();
+      }
+    })
+  );
+}
+
 async function syncDirectoryTree(directory: string) {
+  if (SKIP_FSYNC) return;
   const entries = await fs.readdir(directory, { withFileTypes: true });
   for (const entry of entries) {
     const entryPath = path.join(directory, entry.name);
@@ -93,8 +139,10 @@ async function hasChordProFiles(dir: string) {
   }
 }
 
-function assertUniqueSongIds(songs: SongData[]) {
-  const songsById = new Map<string, SongData[]>();
+type SongIdentity = Pick<SongData, 'id' | 'title' | 'sourcePath'>;
+
+function assertUniqueSongIds(songs: SongIdentity[]) {
+  const songsById = new Map<string, SongIdentity[]>();
 
   for (const song of songs) {
     const existing = songsById.get(song.id) || [];
@@ -144,6 +192,50 @@ async function outputPointsToGeneration(generationName: string) {
   return path.resolve(OUTPUT_PARENT_DIR, target) === generationPath(generationName);
 }
 
+function searchShardPath(generationDir: string, shard: string) {
+  const name = path.posix.basename(shard);
+  if (shard !== `${SEARCH_DIR_NAME}/${name}` || !/^[0-9]{2}-[0-9a-f]{16}\.json$/.test(name)) {
+    throw new Error(`Invalid search shard name: ${shard}`);
+  }
+  return path.join(generationDir, SEARCH_DIR_NAME, name);
+}
+
+async function readSearchManifest(generationDir: string): Promise<SearchManifest | null> {
+  try {
+    const manifest = JSON.parse(
+      await fs.readFile(path.join(generationDir, SEARCH_MANIFEST_NAME), 'utf8')
+    ) as Partial<SearchManifest>;
+    if (manifest.version !== 1 || !Array.isArray(manifest.shards)) {
+      throw new Error('Invalid search manifest');
+    }
+    return manifest as SearchManifest;
+  } catch (error) {
+    if ((error as NodeJS.ErrnoException).code === 'ENOENT') return null;
+    throw error;
+  }
+}
+
+function searchShardBucket(id: string) {
+  return parseInt(createHash('sha1').update(id).digest('hex').slice(0, 8), 16) % SEARCH_SHARD_COUNT;
+}
+
+function compareIds(left: { id: string }, right: { id: string }) {
+  return left.id < right.id ? -1 : left.id > right.id ? 1 : 0;
+}
+
+function buildSearchShards(entries: SearchShardEntry[]) {
+  const buckets: SearchShardEntry[][] = Array.from({ length: SEARCH_SHARD_COUNT }, () => []);
+  for (const entry of entries) {
+    buckets[searchShardBucket(entry.id)].push(entry);
+  }
+  return buckets.map((bucket, position) => {
+    bucket.sort(compareIds);
+    const content = JSON.stringify(bucket);
+    const hash = createHash('sha256').update(content).digest('hex').slice(0, 16);
+    return { name: `${SEARCH_DIR_NAME}/${String(position).padStart(2, '0')}-${hash}.json`, content };
+  });
+}
+
 async function isCompleteGeneration(generationDir: string) {
   try {
     const index = JSON.parse(await fs.readFile(path.join(generationDir, 'songs.index.json'), 'utf8'));
@@ -156,6 +248,10 @@ async function isCompleteGeneration(generationDir: string) {
         await fs.access(path.join(generationDir, 'songs', `${(entry as { id: string }).id}.json`));
       })
     );
+    const manifest = await readSearchManifest(generationDir);
+    if (manifest) {
+      await Promise.all(manifest.shards.map((shard) => fs.access(searchShardPath(generationDir, shard))));
+    }
     return true;
   } catch {
     return false;
@@ -292,6 +388,76 @@ function injectFailure(point: string) {
   throw new Error(`Injected song build failure at ${point}`);
 }
 
+async function activeGenerationName() {
+  const state = await pathState(OUTPUT_BASE_DIR);
+  if (!state?.isSymbolicLink()) return null;
+  const name = path.basename(path.resolve(OUTPUT_PARENT_DIR, await fs.readlink(OUTPUT_BASE_DIR)));
+  return /^generation-[a-zA-Z0-9.-]+$/.test(name) ? name : null;
+}
+
+async function readPreviousIndex(): Promise<SongIndexEntry[]> {
+  try {
+    const index = JSON.parse(await fs.readFile(INDEX_PATH, 'utf8'));
+    return Array.isArray(index) ? index : [];
+  } catch (error) {
+    if ((error as NodeJS.ErrnoException).code === 'ENOENT') return [];
+    throw error;
+  }
+}
+
+async function readFileIfExists(file: string) {
+  try {
+    return await fs.readFile(file, 'utf8');
+  } catch (error) {
+    if ((error as NodeJS.ErrnoException).code === 'ENOENT') return null;
+    throw error;
+  }
+}
+
+// Must run after copyRetainedSongs and before the new song JSON is written, so
+// the staged copies still hold the previous generation's content.
+async function computeChangeSet(
+  generation: string,
+  songs: SongData[],
+  index: SongIndexEntry[],
+  stagingSongsDir: string
+): Promise<CatalogueChangeSet> {
+  const previous = await activeGenerationName();
+  const previousIds = new Set((await readPreviousIndex()).map((entry) => entry.id));
+  const currentIds = new Set(index.map((entry) => entry.id));
+  const added: string[] = [];
+  const updated: string[] = [];
+
+  await Promise.all(
+    songs.map(async (song) => {
+      if (!previousIds.has(song.id)) {
+        added.push(song.id);
+        return;
+      }
+      const before = await readFileIfExists(path.join(stagingSongsDir, `${song.id}.json`));
+      if (before !== JSON.stringify(song, null, 2)) updated.push(song.id);
+    })
+  );
+
+  return {
+    version: 1,
+    generation,
+    previous,
+    added: added.sort(),
+    updated: updated.sort(),
+    removed: [...previousIds].filter((id) => !currentIds.has(id)).sort(),
+  };
+}
+
+async function recordChangeSet(changeSet: CatalogueChangeSet) {
+  await ensureDir(CHANGES_DIR);
+  const target = path.join(CHANGES_DIR, `${changeSet.generation}.json`);
+  const temporary = `${target}.${randomUUID()}.tmp`;
+  await writeFileDurably(temporary, JSON.stringify(changeSet));
+  await fs.rename(temporary, target);
+  await syncDirectory(CHANGES_DIR);
+}
+
 async function copyRetainedSongs(stagingSongsDir: string) {
   try {
     const entries = await fs.readdir(OUTPUT_DIR, { withFileTypes: true });
@@ -307,12 +473,42 @@ async function copyRetainedSongs(stagingSongsDir: string) {
   }
 }
 
-async function stageBuild(songs: SongData[], index: SongIndexEntry[]) {
+async function copyRetainedSearchShards(stagingDir: string) {
+  // Only the shards of the generation being replaced are kept. Tabs that loaded
+  // its manifest can finish loading lyrics; older shards are no longer listed.
+  let manifest: SearchManifest | null;
+  try {
+    manifest = await readSearchManifest(OUTPUT_BASE_DIR);
+  } catch {
+    return;
+  }
+  if (!manifest) return;
+  await Promise.all(
+    manifest.shards.map(async (shard) => {
+      try {
+        await fs.copyFile(searchShardPath(OUTPUT_BASE_DIR, shard), searchShardPath(stagingDir, shard));
+      } catch (error) {
+        if ((error as NodeJS.ErrnoException).code !== 'ENOENT') throw error;
+      }
+    })
+  );
+}
+
+async function stageBuild(
+  generationName: string,
+  songs: SongData[],
+  index: SongIndexEntry[],
+  searchEntries: SearchShardEntry[]
+) {
   await ensureDir(GENERATIONS_DIR);
   const stagingDir = await fs.mkdtemp(path.join(GENERATIONS_DIR, '.build-'));
   await fs.chmod(stagingDir, 0o755);
   const stagingSongsDir = path.join(stagingDir, 'songs');
+  const stagingSearchDir = path.join(stagingDir, SEARCH_DIR_NAME);
   const stagingIndexPath = path.join(stagingDir, 'songs.index.json');
+  // The staging directory is private until publish, so its files only have to
+  // be durable before isCompleteGeneration hands it over.
+  const batch: string[] | undefined = GROUP_FSYNC ? [] : undefined;
 
   try {
     await ensureDir(stagingSongsDir);
@@ -320,19 +516,39 @@ async function stageBuild(songs: SongData[], index: SongIndexEntry[]) {
     // A browser holding an older cached index can therefore still resolve all
     // of its /data/songs/<id>.json URLs after the pointer switches.
     await copyRetainedSongs(stagingSongsDir);
+    const changeSet = await computeChangeSet(generationName, songs, index, stagingSongsDir);
     await Promise.all(
       songs.map((song) =>
         writeFileDurably(
           path.join(stagingSongsDir, `${song.id}.json`),
-          JSON.stringify(song, null, 2)
+          JSON.stringify(song, null, 2),
+          batch
         )
       )
     );
-    await syncDirectory(stagingSongsDir);
+    if (!batch) await syncDirectory(stagingSongsDir);
+
+    await ensureDir(stagingSearchDir);
+    await copyRetainedSearchShards(stagingDir);
+    const shards = buildSearchShards(searchEntries);
+    await Promise.all(
+      shards.map((shard) => writeFileDurably(searchShardPath(stagingDir, shard.name), shard.content, batch))
+    );
+    if (!batch) await syncDirectory(stagingSearchDir);
+    const manifest: SearchManifest = { version: 1, shards: shards.map((shard) => shard.name) };
+    await writeFileDurably(path.join(stagingDir, SEARCH_MANIFEST_NAME), JSON.stringify(manifest), batch);
+    const generation: CatalogueGeneration = { version: 1, generation: generationName };
+    await writeFileDurably(path.join(stagingDir, 'generation.json'), JSON.stringify(generation), batch);
+    await writeFileDurably(path.join(stagingDir, 'changes.json'), JSON.stringify(changeSet), batch);
 
     // The index is written last inside the private generation. Only a complete,
     // validated generation is ever made visible by publishStagedBuild.
-    await writeFileDurably(stagingIndexPath, JSON.stringify(index, null, 2));
+    await writeFileDurably(stagingIndexPath, JSON.stringify(index, null, 2), batch);
+    if (batch) {
+      await syncFileBatch(batch);
+      await syncDirectory(stagingSongsDir);
+      await syncDirectory(stagingSearchDir);
+    }
     await syncDirectory(stagingDir);
     if (!(await isCompleteGeneration(stagingDir))) {
       throw new Error('Staged song catalogue failed validation.');
@@ -425,6 +641,7 @@ async function cleanupOldGenerations() {
         .slice(RETAINED_PREVIOUS_GENERATIONS)
         .map(({ fullPath }) => fs.rm(fullPath, { recursive: true, force: true }))
     );
+    await pruneChangeSets();
   } catch (error) {
     // Cleanup is deliberately best-effort. Once the pointer has switched, a
     // cleanup problem must not turn a successful, coherent publish into a failure.
@@ -432,8 +649,43 @@ async function cleanupOldGenerations() {
   }
 }
 
-async function publishStagedBuild(stagingDir: string) {
-  const generationName = `generation-${Date.now()}-${randomUUID()}`;
+async function recordPublishedChangeSet(generationDir: string) {
+  try {
+    const changeSet = JSON.parse(
+      await fs.readFile(path.join(generationDir, 'changes.json'), 'utf8')
+    ) as CatalogueChangeSet;
+    await recordChangeSet(changeSet);
+  } catch (error) {
+    // Like cleanup, this is best-effort after the pointer switch. A missing
+    // change set only makes clients that are further behind reload fully.
+    console.warn(`Could not record song catalogue changes: ${(error as Error).message}`);
+  }
+}
+
+async function pruneChangeSets() {
+  const entries = await fs.readdir(CHANGES_DIR, { withFileTypes: true });
+  const changeSets = await Promise.all(
+    entries
+      .filter((entry) => entry.isFile() && /^generation-[a-zA-Z0-9.-]+\.json$/.test(entry.name))
+      .map(async (entry) => {
+        const fullPath = path.join(CHANGES_DIR, entry.name);
+        return { fullPath, modified: (await fs.stat(fullPath)).mtimeMs };
+      })
+  );
+  const interrupted = entries
+    .filter((entry) => entry.name.endsWith('.tmp'))
+    .map((entry) => path.join(CHANGES_DIR, entry.name));
+  await Promise.all(
+    changeSets
+      .sort((a, b) => b.modified - a.modified)
+      .slice(RETAINED_CHANGE_SETS)
+      .map(({ fullPath }) => fullPath)
+      .concat(interrupted)
+      .map((fullPath) => fs.rm(fullPath, { force: true }))
+  );
+}
+
+async function publishStagedBuild(stagingDir: string, generationName: string) {
   const newGenerationDir = generationPath(generationName);
   const temporaryLinkName = `.${OUTPUT_NAME}-link-${randomUUID()}`;
   const temporaryLink = temporaryLinkPath(temporaryLinkName);
@@ -470,6 +722,7 @@ async function publishStagedBuild(stagingDir: string) {
     await syncDirectory(OUTPUT_PARENT_DIR);
     injectFailure('after-pointer-switch');
     await removeJournal();
+    await recordPublishedChangeSet(newGenerationDir);
     await cleanupOldGenerations();
   } catch (error) {
     await recoverInterruptedPublish();
@@ -483,6 +736,82 @@ async function publishStagedBuild(stagingDir: string) {
   }
 }
 
+function incrementalBuildRequest(): IncrementalBuild | null {
+  const raw = process.env.SONGS_BUILD_CHANGED;
+  if (!raw) return null;
+  const request = JSON.parse(raw) as Partial<IncrementalBuild>;
+  const isNameList = (value: unknown): value is string[] =>
+    Array.isArray(value) && value.every((item) => typeof item === 'string');
+  if (!isNameList(request.files) || !isNameList(request.previousIds)) {
+    throw new Error('SONGS_BUILD_CHANGED must list files and previousIds.');
+  }
+  for (const file of request.files) {
+    if (path.basename(file) !== file || !file.endsWith('.pro')) {
+      throw new Error(`Invalid changed song file: ${file}`);
+    }
+  }
+  return { files: request.files, previousIds: request.previousIds };
+}
+
+// The published index and search shards of every song the change did not
+// touch, or null when there is no complete generation to build on; the
+// caller then falls back to a full build.
+async function readRetainedSongs(incremental: IncrementalBuild) {
+  if (!(await activeGenerationName()) || !(await isCompleteGeneration(OUTPUT_BASE_DIR))) return null;
+  const manifest = await readSearchManifest(OUTPUT_BASE_DIR);
+  if (!manifest) return null;
+  const lyrics = new Map<string, string[]>();
+  for (const shard of manifest.shards) {
+    const entries = JSON.parse(
+      await fs.readFile(searchShardPath(OUTPUT_BASE_DIR, shard), 'utf8')
+    ) as SearchShardEntry[];
+    for (const entry of entries) lyrics.set(entry.id, entry.lyrics);
+  }
+
+  const replaced = new Set(incremental.previousIds);
+  const index = (await readPreviousIndex()).filter((entry) => !replaced.has(entry.id));
+  const searchEntries: SearchShardEntry[] = [];
+  for (const entry of index) {
+    const songLyrics = lyrics.get(entry.id);
+    if (!songLyrics) return null;
+    searchEntries.push({ id: entry.id, lyrics: songLyrics });
+  }
+  return { index, searchEntries };
+}
+
+async function readSongs(songsDir: string, files: string[]) {
+  const songs: SongData[] = [];
+  for (const entry of files) {
+    const fullPath = path.join(songsDir, entry);
+    // Files listed by an incremental build may have been deleted by the push.
+    const raw = await readFileIfExists(fullPath);
+    if (raw === null) continue;
+    songs.push(parseChordPro(raw, path.relative(process.cwd(), fullPath)));
+  }
+  return songs;
+}
+
+function songIndexEntry(song: SongData): SongIndexEntry {
+  return {
+    id: song.id,
+    title: song.title,
+    key: song.key,
+    interpret: song.interpret,
+    categories: song.categories
+  };
+}
+
+function songSearchEntry(song: SongData): SearchShardEntry {
+  return {
+    id: song.id,
+    lyrics: song.sections.flatMap((section) =>
+      section.lines
+        .map((line) => line.tokens.map((token) => token.lyric).join('').trim())
+        .filter((line) => line !== '')
+    )
+  };
+}
+
 async function build() {
   const localDir = path.resolve('songs');
   const siblingDir = path.resolve('..', 'holy-songs-content', 'songs');
@@ -499,37 +828,34 @@ async function build() {
 
   await recoverInterruptedPublish();
 
-  const entries = await fs.readdir(songsDir);
-  const songs: SongData[] = [];
-
-  for (const entry of entries) {
-    if (!entry.endsWith('.pro')) continue;
-    const fullPath = path.join(songsDir, entry);
-    const raw = await fs.readFile(fullPath, 'utf8');
-    const song = parseChordPro(raw, path.relative(process.cwd(), fullPath));
-    songs.push(song);
-  }
-
-  assertUniqueSongIds(songs);
-
-  const index: SongIndexEntry[] = [];
+  const incremental = incrementalBuildRequest();
+  const retained = incremental ? await readRetainedSongs(incremental) : null;
+  const files = retained
+    ? incremental!.files
+    : (await fs.readdir(songsDir)).filter((entry) => entry.endsWith('.pro'));
+  const songs = await readSongs(songsDir, files);
+
+  assertUniqueSongIds([
+    ...(retained?.index ?? []).map((entry) => ({ ...entry, sourcePath: 'published catalogue' })),
+    ...songs,
+  ]);
+
+  // Sorted so a full and an incremental build of the same tree write the same
+  // index; directory order and "changed songs last" would both leak into it.
+  const index: SongIndexEntry[] = [...(retained?.index ?? []), ...songs.map(songIndexEntry)].sort(compareIds);
+  const searchEntries: SearchShardEntry[] = [
+    ...(retained?.searchEntries ?? []),
+    ...songs.map(songSearchEntry),
+  ];
 
-  for (const song of songs) {
-    index.push({
-      id: song.id,
-      title: song.title,
-      key: song.key,
-      interpret: song.interpret,
-      categories: song.categories,
-      sections: song.sections.flatMap((section) =>
-        section.lines.map((line) => line.raw).filter((line) => line.trim() !== '')
-      )
-    });
-  }
-
-  const staged = await stageBuild(songs, index);
-  await publishStagedBuild(staged);
-  console.log(`Built ${songs.length} song(s).`);
+  const generationName = `generation-${Date.now()}-${randomUUID()}`;
+  const staged = await stageBuild(generationName, songs, index, searchEntries);
+  await publishStagedBuild(staged, generationName);
+  console.log(
+    retained
+      ? `Rebuilt ${songs.length} changed song(s); kept ${retained.index.length} published song(s).`
+      : `Built ${songs.length} song(s).`
+  );
 }
 
 build().catch((err) => {
@@ -0,0 +1,76 @@
+/// <reference types="node" />
+
+import assert from 'node:assert/strict';
+import { describe, it } from 'node:test';
+import { createIndexUpdateScheduler, listenForCatalogueGenerations } from './catalogueUpdates';
+
+// Stands in for one EventSource connection to /api/events.
+class FakeEventSource {
+  listeners = new Map<string, ((event: MessageEvent) => void)[]>();
+
+  addEventListener(type: string, listener: (event: MessageEvent) => void) {
+    this.listeners.set(type, [...(this.listeners.get(type) ?? []), listener]);
+  }
+
+  emit(type: string, payload: unknown) {
+    for (const listener of this.listeners.get(type) ?? []) {
+      listener({ data: JSON.stringify(payload) } as MessageEvent);
+    }
+  }
+}
+
+function browseTab(generation: string, published: () => string) {
+  const tab = { generation, updates: 0 };
+  const scheduler = createIndexUpdateScheduler(
+    () => tab.generation,
+    async () => {
+      tab.updates += 1;
+      tab.generation = published();
+    }
+  );
+  return { tab, scheduler };
+}
+
+describe('catalogueUpdates', () => {
+  it('catches up on a publish that happened while the event stream was disconnected', async () => {
+    let published = 'gen-1';
+    const { tab, scheduler } = browseTab('gen-1', () => published);
+
+    const first = new FakeEventSource();
+    listenForCatalogueGenerations(first, scheduler.schedule);
+    first.emit('catalogue-generation', { generation: 'gen-1' });
+    await scheduler.idle();
+    assert.equal(tab.updates, 0);
+
+    // The connection drops; a publish happens before the browser reconnects.
+    published = 'gen-2';
+    const reconnected = new FakeEventSource();
+    listenForCatalogueGenerations(reconnected, scheduler.schedule);
+    reconnected.emit('catalogue-generation', { generation: 'gen-2' });
+    await scheduler.idle();
+
+    assert.equal(tab.updates, 1);
+    assert.equal(tab.generation, 'gen-2');
+
+    reconnected.emit('catalogue-generation', { generation: 'gen-2' });
+    await scheduler.idle();
+    assert.equal(tab.updates, 1);
+  });
+
+  it('folds publishes announced during an update into one follow-up', async () => {
+    let published = 'gen-2';
+    const { tab, scheduler } = browseTab('gen-1', () => published);
+    const source = new FakeEventSource();
+    listenForCatalogueGenerations(source, scheduler.schedule);
+
+    source.emit('catalogue-updated', { generation: 'gen-2' });
+    published = 'gen-4';
+    source.emit('catalogue-updated', { generation: 'gen-3' });
+    source.emit('catalogue-updated', { generation: 'gen-4' });
+    await scheduler.idle();
+    await scheduler.idle();
+
+    assert.equal(tab.updates, 2);
+    assert.equal(tab.generation, 'gen-4');
+  });
+});
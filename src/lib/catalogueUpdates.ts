@@ -0,0 +1,53 @@
+// Both frames carry the generation the server has published: the first is sent
+// on every (re)connect, the second whenever a publish happens while connected.
+// Listening to the first is what catches publishes missed while disconnected.
+export const CATALOGUE_GENERATION_EVENTS = ['catalogue-generation', 'catalogue-updated'] as const;
+
+export type CatalogueEventSource = {
+  addEventListener(type: string, listener: (event: MessageEvent) => void): void;
+};
+
+export function listenForCatalogueGenerations(
+  source: CatalogueEventSource,
+  onGeneration: (generation: string | null) => void
+) {
+  for (const type of CATALOGUE_GENERATION_EVENTS) {
+    source.addEventListener(type, (event) => {
+      const payload = JSON.parse(event.data) as { generation?: string | null };
+      onGeneration(payload.generation ?? null);
+    });
+  }
+}
+
+// Runs one index update at a time. Publishes announced while an update is
+// running are folded into one follow-up; a generation the client already
+// shows is ignored.
+export function createIndexUpdateScheduler(
+  currentGeneration: () => string | null,
+  update: () => Promise<void>
+) {
+  let running: Promise<void> | null = null;
+  let pending = false;
+
+  function schedule(target: string | null) {
+    if (target && target === currentGeneration()) return;
+    if (running) {
+      pending = true;
+      return;
+    }
+    running = update()
+      .catch(() => undefined)
+      .finally(() => {
+        running = null;
+        if (pending) {
+          pending = false;
+          schedule(null);
+        }
+      });
+  }
+
+  return {
+    schedule,
+    idle: () => running ?? Promise.resolve(),
+  };
+}
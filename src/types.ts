@@ -30,5 +30,52 @@ export interface SongIndexEntry {
   key?: string;
   interpret?: string;
   categories?: string[];
-  sections: string[];
+}
+
+export interface SearchShardEntry {
+  id: string;
+  lyrics: string[];
+}
+
+export interface SearchManifest {
+  version: 1;
+  shards: string[];
+}
+
+export interface CatalogueGeneration {
+  version: 1;
+  generation: string;
+}
+
+export interface CatalogueChangeSet {
+  version: 1;
+  generation: string;
+  previous: string | null;
+  added: string[];
+  updated: string[];
+  removed: string[];
+}
+
+export interface IndexChanges {
+  generation: string | null;
+  since: string;
+  reload: boolean;
+  added: SongIndexEntry[];
+  updated: SongIndexEntry[];
+  removed: string[];
+}
+
+export interface CatalogueUpdatedEvent {
+  generation: string;
+  since: string | null;
+  reload: boolean;
+  added: string[];
+  updated: string[];
+  removed: string[];
+}
+
+export interface BulkSongs {
+  generation: string | null;
+  songs: { id: string; song: SongData }[];
+  missing: string[];
 }